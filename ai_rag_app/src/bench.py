@@ -0,0 +1,261 @@
+from __future__ import annotations
+import argparse
+import itertools
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from ai_rag_app.src.config import DOCS_DIR, CHUNK_SIZE, CHUNK_OVERLAP
+
+REPORTS_DIR = Path(__file__).resolve().parents[1] / "reports"
+
+CORPUS_SIZES = (10, 50, 200)  # docs per synthetic corpus
+K_VALUES = (1, 3, 5, 10)
+
+
+# ---------- synthetic corpus ----------
+
+
+def _seed_paragraphs(docs_dir: Path = DOCS_DIR) -> List[str]:
+    from ai_rag_app.src.index_docs import _normalize_ws, _read_text_file
+
+    paras: List[str] = []
+    for path in sorted(docs_dir.glob("*.md")):
+        text = _normalize_ws(_read_text_file(path))
+        paras.extend(p.strip() for p in text.split("\n\n") if p.strip())
+    return paras or ["Vector stores hold document chunks and support similarity search for RAG."]
+
+
+def make_corpus(out_dir: Path, n_docs: int, paras_per_doc: int = 12, seed: int = 0) -> Path:
+    """Write `n_docs` markdown files made of shuffled paragraphs from data/docs."""
+    rng = random.Random(seed)
+    seed_paras = _seed_paragraphs()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for i in range(n_docs):
+        paras = [rng.choice(seed_paras) for _ in range(paras_per_doc)]
+        # vary the text so chunks/embeddings aren't identical across docs
+        paras = [f"{p} (doc {i}, part {j})" for j, p in enumerate(paras)]
+        (out_dir / f"synthetic_{i:05d}.md").write_text("\n\n".join(paras), encoding="utf-8")
+    return out_dir
+
+
+def make_text(n_bytes: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    seed_paras = _seed_paragraphs()
+    parts: List[str] = []
+    size = 0
+    while size < n_bytes:
+        p = rng.choice(seed_paras)
+        parts.append(p)
+        size += len(p) + 2
+    return "\n\n".join(parts)
+
+
+# ---------- timing ----------
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    fn()  # warm-up (model loads, caches)
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "repeat": repeat}
+
+
+def _record(
+    results: Dict[str, Dict[str, Any]], name: str, t: Dict[str, float], work: float, unit: str
+) -> None:
+    results[name] = {
+        **{k: round(v, 6) if isinstance(v, float) else v for k, v in t.items()},
+        "throughput": round(work / t["median_s"], 3) if t["median_s"] > 0 else None,
+        "unit": unit,
+    }
+    print(
+        f"[bench] {name:40s} median={t['median_s'] * 1000:9.2f}ms  "
+        f"{results[name]['throughput']} {unit}"
+    )
+
+
+# ---------- benchmarks ----------
+
+
+def bench_chunking(results: Dict, repeat: int) -> None:
+    from ai_rag_app.src.index_docs import _chunk_paragraphs
+
+    for mb in (1, 8):
+        text = make_text(mb * 1024 * 1024)
+        t = _time(lambda: _chunk_paragraphs(text, CHUNK_SIZE, CHUNK_OVERLAP), repeat)
+        _record(results, f"chunk_paragraphs[{mb}MB]", t, len(text) / 1e6, "MB/s")
+
+
+def bench_read_pdf(results: Dict, repeat: int) -> None:
+    from pypdf import PdfReader
+
+    from ai_rag_app.src.index_docs import _read_pdf
+
+    for pdf in sorted(DOCS_DIR.glob("*.pdf"))[:1]:
+        pages = len(PdfReader(str(pdf)).pages)
+        t = _time(lambda: _read_pdf(pdf), repeat)
+        _record(results, f"read_pdf[{pdf.name}]", t, pages, "pages/s")
+
+
+def bench_build_index(results: Dict, repeat: int, work_dir: Path) -> Dict[int, Path]:
+    """Builds one store per corpus size; returns them (keyed by docs) so retrieve can reuse them."""
+    from ai_rag_app.src.index_docs import build_index_with_params
+    from ai_rag_app.src.retriever import get_collection
+
+    stores: Dict[int, Path] = {}
+    for n in CORPUS_SIZES:
+        docs = make_corpus(work_dir / f"docs_{n}", n)
+        builds = itertools.count()
+
+        def _build() -> None:
+            # a fresh persist dir per run so every sample is a cold build, not a re-index
+            stores[n] = work_dir / f"store_{n}_{next(builds)}"
+            build_index_with_params(docs, stores[n])
+
+        t = _time(_build, max(1, repeat // 3))
+        with get_collection(stores[n]) as col:
+            chunks = col.count()
+        _record(results, f"build_index[docs={n}]", t, chunks, "chunks/s")
+    return stores
+
+
+def bench_retrieve(results: Dict, repeat: int, stores: Dict[int, Path]) -> None:
+    from ai_rag_app.src.retriever import retrieve
+
+    q = "How do vector stores support retrieval augmented generation?"
+    for n, store in sorted(stores.items()):
+        t = _time(lambda: retrieve(q, k=5, persist_dir=store), repeat)
+        _record(results, f"retrieve[docs={n}]", t, 1, "queries/s")
+
+
+def bench_extractive(results: Dict, repeat: int) -> None:
+    from ai_rag_app.src.index_docs import _chunk_paragraphs
+    from ai_rag_app.src.rag_chain import _extractive_answer
+
+    q = "How do vector stores support retrieval augmented generation?"
+    chunks = _chunk_paragraphs(make_text(64 * 1024), CHUNK_SIZE, CHUNK_OVERLAP)
+    for k in K_VALUES:
+        ctx = chunks[:k]
+        t = _time(lambda: _extractive_answer(q, ctx), repeat)
+        _record(results, f"extractive_answer[k={k}]", t, 1, "answers/s")
+
+
+def bench_score_support(results: Dict, repeat: int) -> None:
+    from ai_rag_app.src.eval import score_support
+    from ai_rag_app.src.index_docs import _chunk_paragraphs
+    from ai_rag_app.src.rag_chain import _extractive_answer
+
+    q = "How do vector stores support retrieval augmented generation?"
+    chunks = _chunk_paragraphs(make_text(64 * 1024), CHUNK_SIZE, CHUNK_OVERLAP)
+    for k in (3, 10):
+        ctx = chunks[:k]
+        ans = _extractive_answer(q, ctx)
+        t = _time(lambda: score_support(ans, ctx), repeat)
+        _record(results, f"score_support[k={k}]", t, 1, "evals/s")
+
+
+BENCHES = ("chunking", "read_pdf", "build_index", "retrieve", "extractive", "score_support")
+
+
+def run(only: tuple[str, ...] = BENCHES, repeat: int = 5, out: Optional[Path] = None) -> Path:
+    results: Dict[str, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory(prefix="rag_bench_") as tmp:
+        work = Path(tmp)
+        if "chunking" in only:
+            bench_chunking(results, repeat)
+        if "read_pdf" in only:
+            bench_read_pdf(results, repeat)
+        stores: Dict[int, Path] = {}
+        if "build_index" in only or "retrieve" in only:
+            stores = bench_build_index(results, repeat, work)
+        if "retrieve" in only:
+            bench_retrieve(results, repeat * 4, stores)
+        if "extractive" in only:
+            bench_extractive(results, repeat)
+        if "score_support" in only:
+            bench_score_support(results, repeat)
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "results": results,
+    }
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = out or REPORTS_DIR / f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"[bench] wrote {out}")
+    return out
+
+
+# ---------- compare ----------
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], threshold: float = 0.10) -> List[Dict]:
+    """speedup = base median / new median; a regression is a slowdown beyond `threshold`."""
+    rows = []
+    for name in sorted(set(base["results"]) & set(new["results"])):
+        b = base["results"][name]["median_s"]
+        n = new["results"][name]["median_s"]
+        speedup = b / n if n else float("inf")
+        rows.append(
+            {
+                "bench": name,
+                "base_ms": round(b * 1000, 3),
+                "new_ms": round(n * 1000, 3),
+                "speedup": round(speedup, 3),
+                "regression": speedup < 1 / (1 + threshold),
+            }
+        )
+    return rows
+
+
+def _cli_compare(base_path: Path, new_path: Path, threshold: float) -> int:
+    base = json.loads(base_path.read_text(encoding="utf-8"))
+    new = json.loads(new_path.read_text(encoding="utf-8"))
+    rows = compare(base, new, threshold)
+    for r in rows:
+        flag = "  REGRESSION" if r["regression"] else ""
+        print(
+            f"{r['bench']:40s} {r['base_ms']:10.2f}ms -> {r['new_ms']:10.2f}ms "
+            f"x{r['speedup']:.2f}{flag}"
+        )
+    return 1 if any(r["regression"] for r in rows) else 0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Component microbenchmarks for the RAG hot paths.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("run", help="run benchmarks and write a JSON baseline")
+    r.add_argument("--only", default=",".join(BENCHES))
+    r.add_argument("--repeat", type=int, default=5)
+    r.add_argument("--out", type=Path, default=None)
+
+    c = sub.add_parser("compare", help="per-benchmark speedup between two baselines")
+    c.add_argument("base", type=Path)
+    c.add_argument("new", type=Path)
+    c.add_argument("--threshold", type=float, default=0.10)
+
+    args = ap.parse_args()
+    if args.cmd == "compare":
+        sys.exit(_cli_compare(args.base, args.new, args.threshold))
+    run(
+        only=tuple(b for b in args.only.split(",") if b in BENCHES),
+        repeat=args.repeat,
+        out=args.out,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+from __future__ import annotations
+import argparse
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import chromadb
+import numpy as np
+
+from .config import COLLECTION_NAME, VSTORE_DIR
+
+REPORTS_DIR = Path(__file__).resolve().parents[1] / "reports"
+EF_GRID = (10, 20, 40, 80, 160, 320)
+
+
+# ---------- collection access ----------
+
+
+@contextmanager
+def _open(persist_dir: Path) -> Iterator[Any]:
+    # chroma keeps one system per path and loads the HNSW segment with the search ef
+    # it had at load time, so a changed ef only shows up once every client on the path
+    # is closed and a new one opened (other open clients in this process pin the old one)
+    client = chromadb.PersistentClient(path=str(persist_dir))
+    try:
+        yield client.get_collection(COLLECTION_NAME)
+    finally:
+        client.close()
+
+
+def set_search_ef(persist_dir: Path, ef: int) -> None:
+    """Persist `ef` as the collection's search ef; the next _open() searches with it."""
+    with _open(persist_dir) as col:
+        col.modify(configuration={"hnsw": {"ef_search": int(ef)}})
+
+
+def load_vectors(col, page: int = 2000) -> Tuple[List[str], np.ndarray]:
+    ids, out = [], []
+    for offset in range(0, col.count(), page):
+        res = col.get(include=["embeddings"], limit=page, offset=offset)
+        ids.extend(res["ids"])
+        out.append(np.asarray(res["embeddings"], dtype=np.float32))
+    return ids, (np.vstack(out) if out else np.zeros((0, 0), dtype=np.float32))
+
+
+# ---------- ground truth ----------
+
+
+def sample_queries(vectors: np.ndarray, n: int, seed: int = 0) -> np.ndarray:
+    """Midpoints of random pairs of stored vectors: near real data, rarely a stored vector."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, len(vectors), size=n)
+    b = rng.integers(0, len(vectors), size=n)
+    return ((vectors[a] + vectors[b]) / 2).astype(np.float32)
+
+
+def exact_neighbors(vectors: np.ndarray, queries: np.ndarray, k: int, space: str) -> np.ndarray:
+    """Brute-force top-k row indices per query, in the collection's distance space."""
+    if space == "l2":
+        dist = (queries**2).sum(1)[:, None] - 2 * queries @ vectors.T + (vectors**2).sum(1)[None]
+    elif space == "ip":
+        dist = -(queries @ vectors.T)
+    elif space == "cosine":
+        qn = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        vn = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        dist = -(qn @ vn.T)
+    else:
+        raise ValueError(f"unknown HNSW space {space!r}")
+    k = min(k, vectors.shape[0])
+    top = np.argpartition(dist, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(dist, top, axis=1).argsort(axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def recall_at_k(found: List[List[int]], truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = [len(set(f[:k]) & set(t.tolist())) / k for f, t in zip(found, truth)]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+# ---------- calibration ----------
+
+
+def measure(col, queries: np.ndarray, truth: np.ndarray, row_of: Dict[str, int], k: int):
+    col.query(query_embeddings=queries[:1].tolist(), n_results=k)  # warm the segment
+    lat, found = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        res = col.query(query_embeddings=[q.tolist()], n_results=k, include=["distances"])
+        lat.append((time.perf_counter() - t0) * 1000)
+        found.append([row_of[i] for i in res["ids"][0]])
+    return {
+        "recall": round(recall_at_k(found, truth), 4),
+        "p50_ms": round(float(np.percentile(lat, 50)), 3),
+        "p95_ms": round(float(np.percentile(lat, 95)), 3),
+    }
+
+
+def recommend(rows: List[Dict[str, Any]], target: float) -> Dict[str, Any]:
+    """Smallest search ef reaching the target recall, else the best recall seen."""
+    ok = [r for r in rows if r["recall"] >= target]
+    if ok:
+        return {**min(ok, key=lambda r: r["ef_search"]), "meets_target": True}
+    return {**max(rows, key=lambda r: (r["recall"], -r["ef_search"])), "meets_target": False}
+
+
+def calibrate(
+    persist_dir: Path = VSTORE_DIR,
+    k: int = 5,
+    target: float = 0.95,
+    ef_grid: tuple = EF_GRID,
+    n_queries: int = 200,
+    queries: Optional[np.ndarray] = None,
+    apply: bool = False,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    with _open(persist_dir) as col:
+        hnsw = dict((col.configuration or {}).get("hnsw") or {})
+        ids, vectors = load_vectors(col)
+    original_ef = hnsw.get("ef_search")
+    if not ids:
+        raise SystemExit(f"[calibrate] collection in {persist_dir} is empty")
+    row_of = {i: n for n, i in enumerate(ids)}
+    if queries is None:
+        queries = sample_queries(vectors, n_queries, seed)
+    truth = exact_neighbors(vectors, queries, k, hnsw.get("space", "l2"))
+
+    rows = []
+    try:
+        for ef in sorted(ef_grid):
+            set_search_ef(persist_dir, ef)
+            with _open(persist_dir) as col:
+                stats = measure(col, queries, truth, row_of, k)
+            rows.append({"ef_search": ef, **stats})
+            print(
+                f"[calibrate] ef_search={ef:<4} recall@{k}={stats['recall']:.3f} "
+                f"p50={stats['p50_ms']:.2f}ms p95={stats['p95_ms']:.2f}ms"
+            )
+    finally:
+        best = recommend(rows, target) if rows else None
+        final_ef = best["ef_search"] if (apply and best) else original_ef
+        if final_ef is not None:
+            set_search_ef(persist_dir, final_ef)
+
+    return {
+        "persist_dir": str(persist_dir),
+        "vectors": len(ids),
+        "queries": len(queries),
+        "k": k,
+        "target_recall": target,
+        "hnsw": hnsw,
+        "results": rows,
+        "recommended": best,
+        "applied": bool(apply),
+    }
+
+
+def _qa_queries(persist_dir: Path) -> np.ndarray:
+    from .embeddings import get_model
+    from .eval_runner import load_qs
+
+    with _open(persist_dir) as col:
+        meta = col.get(limit=1, include=["metadatas"])["metadatas"]
+    model_name = (meta[0] or {}).get("embed_model") if meta else None
+    model = get_model(model_name) if model_name else get_model()
+    return np.asarray(model.encode(load_qs(), normalize_embeddings=True), dtype=np.float32)
+
+
+def main(argv: List[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(
+        description="Recall@k vs latency of the collection's HNSW index across search ef values."
+    )
+    ap.add_argument("--persist-dir", type=Path, default=VSTORE_DIR)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--target-recall", type=float, default=0.95)
+    ap.add_argument("--ef", default=",".join(map(str, EF_GRID)), help="comma-separated grid")
+    ap.add_argument("--queries", type=int, default=200, help="sampled queries (ignored with --qa)")
+    ap.add_argument("--qa", action="store_true", help="use qa.yml questions as queries")
+    ap.add_argument("--apply", action="store_true", help="persist the recommended search ef")
+    ap.add_argument("--out", type=Path, default=None)
+    args = ap.parse_args(argv)
+
+    report = calibrate(
+        persist_dir=args.persist_dir,
+        k=args.k,
+        target=args.target_recall,
+        ef_grid=tuple(int(x) for x in args.ef.split(",") if x.strip()),
+        n_queries=args.queries,
+        queries=_qa_queries(args.persist_dir) if args.qa else None,
+        apply=args.apply,
+    )
+    best = report["recommended"]
+    verdict = "meets" if best["meets_target"] else "does NOT meet"
+    print(
+        f"[calibrate] recommend ef_search={best['ef_search']} "
+        f"(recall@{args.k}={best['recall']:.3f}, {verdict} target {args.target_recall}, "
+        f"p50={best['p50_ms']:.2f}ms){'; applied' if args.apply else ''}"
+    )
+
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = args.out or REPORTS_DIR / f"hnsw_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"[calibrate] wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
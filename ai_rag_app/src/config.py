@@ -12,11 +12,52 @@ if _ENV_VSTORE:
 else:
     VSTORE_DIR = Path.home() / ".cache" / "ai_rag_app" / "vectorstore"
 
+# de_pipeline warehouse (source for `python -m ai_rag_app.src.index_warehouse`)
+_ENV_WAREHOUSE = os.environ.get("AI_RAG_WAREHOUSE_DB")
+WAREHOUSE_DB = (
+    Path(_ENV_WAREHOUSE).expanduser()
+    if _ENV_WAREHOUSE
+    else BASE_DIR.parent / "de_pipeline" / "duckdb" / "warehouse.duckdb"
+)
+
 # chroma
 COLLECTION_NAME = "ai_docs"
+# multi-tenant serving: each tenant is its own store under VSTORE_DIR/tenants/<name>;
+# open stores are kept in an LRU bounded by count, estimated resident size and idle time
+TENANT_CACHE_MAX = int(os.environ.get("AI_RAG_TENANT_CACHE_MAX", "16"))
+TENANT_CACHE_MB = int(os.environ.get("AI_RAG_TENANT_CACHE_MB", "1024"))
+TENANT_IDLE_S = float(os.environ.get("AI_RAG_TENANT_IDLE_S", "900"))
+# HNSW graph: space, M and construction ef are fixed when a collection is created;
+# search ef can be changed later (see `python -m ai_rag_app.src.calibrate`)
+HNSW_SPACE = os.environ.get("AI_RAG_HNSW_SPACE", "l2")  # l2 | cosine | ip
+HNSW_M = int(os.environ.get("AI_RAG_HNSW_M", "16"))
+HNSW_CONSTRUCTION_EF = int(os.environ.get("AI_RAG_HNSW_CONSTRUCTION_EF", "100"))
+HNSW_SEARCH_EF = int(os.environ.get("AI_RAG_HNSW_SEARCH_EF", "100"))
 
 # embeddings and chunking
 DEFAULT_EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"  # small, fast
+# torch | onnx (exported graph on onnxruntime, needs the [onnx] extra) | int8 (dynamic quantization)
+EMBED_BACKEND = os.environ.get("AI_RAG_EMBED_BACKEND", "torch")
+# onnx only: a specific graph from the model repo, e.g. "onnx/model_qint8_avx2.onnx"
+EMBED_ONNX_FILE = os.environ.get("AI_RAG_EMBED_ONNX_FILE") or None
 CHUNK_SIZE = 900
 CHUNK_OVERLAP = 150
 BATCH_SIZE = 128
+
+# deferred eval (POST /ask with eval_async=true)
+EVAL_WORKERS = int(os.environ.get("AI_RAG_EVAL_WORKERS", "2"))
+EVAL_QUEUE_MAX = int(os.environ.get("AI_RAG_EVAL_QUEUE_MAX", "256"))  # pending jobs
+EVAL_RETENTION = int(os.environ.get("AI_RAG_EVAL_RETENTION", "1000"))  # finished results kept
+EVAL_RETENTION_S = float(os.environ.get("AI_RAG_EVAL_RETENTION_S", "3600"))
+# optional JSONL file that every finished eval is appended to
+_ENV_EVAL_LOG = os.environ.get("AI_RAG_EVAL_LOG")
+EVAL_RESULTS_LOG = Path(_ENV_EVAL_LOG).expanduser() if _ENV_EVAL_LOG else None
+
+# columnar eval history (one Parquet part per eval batch / sweep run)
+_ENV_HISTORY = os.environ.get("AI_RAG_EVAL_HISTORY_DIR")
+EVAL_HISTORY_DIR = (
+    Path(_ENV_HISTORY).expanduser() if _ENV_HISTORY else BASE_DIR / "reports" / "history"
+)
+
+# extractive step: embed at most this many BM25-preselected sentences (0 = all)
+LEXICAL_CANDIDATES = int(os.environ.get("AI_RAG_LEXICAL_CANDIDATES", "48"))
@@ -0,0 +1,130 @@
+from __future__ import annotations
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse
+import sys
+import time
+import warnings
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from .config import DEFAULT_EMBED_MODEL, EMBED_BACKEND, EMBED_ONNX_FILE, DOCS_DIR
+
+BACKENDS = ("torch", "onnx", "int8")
+
+
+def get_model(
+    name: str = DEFAULT_EMBED_MODEL, backend: Optional[str] = None
+) -> SentenceTransformer:
+    # loads once per (model, backend) and reuses process-wide (and across forked workers)
+    return _load(name, backend or EMBED_BACKEND)
+
+
+@lru_cache(maxsize=4)
+def _load(name: str, backend: str) -> SentenceTransformer:
+    if backend == "torch":
+        return SentenceTransformer(name)
+    if backend == "onnx":
+        # exported graph run by onnxruntime; needs `pip install -e .[onnx]`
+        try:
+            import optimum.onnxruntime  # noqa: F401
+        except ImportError as exc:
+            raise ImportError(
+                "AI_RAG_EMBED_BACKEND=onnx needs optimum[onnxruntime] (pip install -e .[onnx])"
+            ) from exc
+        kwargs = {"file_name": EMBED_ONNX_FILE} if EMBED_ONNX_FILE else None
+        return SentenceTransformer(name, backend="onnx", model_kwargs=kwargs)
+    if backend == "int8":
+        # dynamic int8 quantization of the Linear layers: weights stored int8,
+        # activations quantized per batch; pooling/normalization are unchanged
+        import torch
+        from torch.ao.quantization import quantize_dynamic
+
+        model = SentenceTransformer(name, device="cpu")
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    raise ValueError(f"unknown embed backend {backend!r}; expected one of {BACKENDS}")
+
+
+# ---------- parity / throughput ----------
+
+
+def _doc_chunks(docs_dir: Path, limit: int) -> List[str]:
+    from .config import CHUNK_OVERLAP, CHUNK_SIZE
+    from .index_docs import _chunk_paragraphs, _iter_docs, _normalize_ws, _read_doc
+
+    chunks: List[str] = []
+    for path in _iter_docs(docs_dir):
+        chunks.extend(_chunk_paragraphs(_normalize_ws(_read_doc(path)), CHUNK_SIZE, CHUNK_OVERLAP))
+        if len(chunks) >= limit:
+            break
+    return chunks[:limit]
+
+
+def _throughput(model: SentenceTransformer, texts: List[str], batch_size: int) -> Dict:
+    model.encode(texts[:batch_size], batch_size=batch_size, normalize_embeddings=True)  # warm up
+    t0 = time.perf_counter()
+    vecs = model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+    elapsed = time.perf_counter() - t0
+    return {"vecs": np.asarray(vecs, dtype=np.float32), "texts_per_s": len(texts) / elapsed}
+
+
+def parity(
+    backend: str,
+    name: str = DEFAULT_EMBED_MODEL,
+    docs_dir: Path = DOCS_DIR,
+    limit: int = 512,
+    batch_size: int = 64,
+) -> Dict[str, float]:
+    """Cosine agreement of `backend` with the torch backend on doc chunks, plus throughput."""
+    texts = _doc_chunks(docs_dir, limit)
+    if not texts:
+        raise SystemExit(f"[embed] no docs under {docs_dir}")
+    ref = _throughput(_load(name, "torch"), texts, batch_size)
+    cand = _throughput(_load(name, backend), texts, batch_size)
+    if ref["vecs"].shape != cand["vecs"].shape:
+        raise SystemExit(f"[embed] shape mismatch {ref['vecs'].shape} vs {cand['vecs'].shape}")
+    # both sides are L2-normalized, so the row-wise dot product is the cosine
+    cos = (ref["vecs"] * cand["vecs"]).sum(axis=1)
+    return {
+        "texts": len(texts),
+        "dim": int(ref["vecs"].shape[1]),
+        "cos_mean": float(cos.mean()),
+        "cos_min": float(cos.min()),
+        "torch_texts_per_s": ref["texts_per_s"],
+        f"{backend}_texts_per_s": cand["texts_per_s"],
+        "speedup": cand["texts_per_s"] / ref["texts_per_s"],
+    }
+
+
+def main(argv: List[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Embedding backends.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("parity", help="compare a backend with torch on the docs")
+    p.add_argument("--backend", choices=[b for b in BACKENDS if b != "torch"], default="int8")
+    p.add_argument("--model", default=DEFAULT_EMBED_MODEL)
+    p.add_argument("--docs-dir", type=Path, default=DOCS_DIR)
+    p.add_argument("--limit", type=int, default=512, help="max chunks to encode")
+    p.add_argument("--batch-size", type=int, default=64)
+    p.add_argument("--min-cos", type=float, default=0.99, help="fail below this mean cosine")
+    args = ap.parse_args(argv)
+
+    r = parity(args.backend, args.model, args.docs_dir, args.limit, args.batch_size)
+    print(
+        f"[embed] {args.backend} vs torch on {r['texts']} chunks (dim={r['dim']}): "
+        f"cos mean={r['cos_mean']:.4f} min={r['cos_min']:.4f}"
+    )
+    print(
+        f"[embed] throughput torch={r['torch_texts_per_s']:.1f}/s "
+        f"{args.backend}={r[f'{args.backend}_texts_per_s']:.1f}/s speedup={r['speedup']:.2f}x"
+    )
+    if r["cos_mean"] < args.min_cos:
+        print(f"[embed] mean cosine below {args.min_cos}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ import numpy as np
 from sentence_transformers import SentenceTransformer
 
 from .config import DEFAULT_EMBED_MODEL
+from .embeddings import get_model as _get_model
 
 _SENT_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
 
@@ -21,13 +22,7 @@ def split_sentences(text: str) -> List[str]:
 
 def get_model() -> SentenceTransformer:
     # loads once and reuses process-wide
-    from functools import lru_cache
-
-    @lru_cache
-    def _load() -> SentenceTransformer:
-        return SentenceTransformer(DEFAULT_EMBED_MODEL)
-
-    return _load()
+    return _get_model(DEFAULT_EMBED_MODEL)
 
 
 def cosine(a: np.ndarray, b: np.ndarray) -> float:
@@ -73,3 +68,16 @@ def score_support(answer: str, contexts: List[str], threshold: float = 0.6) -> D
 
     rate = supported / len(ans_sents)
     return {"support_rate": round(rate, 3)}
+
+
+def evaluate_answer(question: str, answer: str, contexts: List[str]) -> Dict[str, Dict]:
+    """Relevance + support scores and the simple flags derived from them."""
+    rel = score_relevance(question, contexts)  # {"q_ctx_cosine": ...}
+    sup = score_support(answer, contexts, threshold=0.6)  # {"support_rate": ...}
+    return {
+        "eval": {**rel, **sup},
+        "flags": {
+            "low_support": sup["support_rate"] < 0.5,
+            "low_relevance": rel["q_ctx_cosine"] < 0.4,
+        },
+    }
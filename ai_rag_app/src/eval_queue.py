@@ -0,0 +1,128 @@
+from __future__ import annotations
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import json
+import threading
+import time
+import uuid
+
+from .config import (
+    EVAL_WORKERS,
+    EVAL_QUEUE_MAX,
+    EVAL_RETENTION,
+    EVAL_RETENTION_S,
+    EVAL_RESULTS_LOG,
+)
+from .eval import evaluate_answer
+
+EvalFn = Callable[[str, str, List[str]], Dict[str, Any]]
+
+
+class EvalQueue:
+    """
+    Bounded background pool for answer scoring.
+    submit() returns an eval_id right away (or None when the queue is full);
+    get() returns {"status": "pending" | "done" | "error", ...} until the
+    record is evicted by count (max_results) or age (retention_s).
+    """
+
+    def __init__(
+        self,
+        workers: int = EVAL_WORKERS,
+        max_pending: int = EVAL_QUEUE_MAX,
+        max_results: int = EVAL_RETENTION,
+        retention_s: float = EVAL_RETENTION_S,
+        results_log: Optional[Path] = EVAL_RESULTS_LOG,
+        evaluate_fn: EvalFn = evaluate_answer,
+    ) -> None:
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="eval")
+        self._max_pending = max(1, max_pending)
+        self._max_results = max(1, max_results)
+        self._retention_s = retention_s
+        self._results_log = results_log
+        self._evaluate = evaluate_fn
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self._pending = 0
+        self._records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def submit(self, question: str, answer: str, contexts: List[str]) -> Optional[str]:
+        with self._lock:
+            if self._pending >= self._max_pending:
+                return None
+            self._pending += 1
+            eval_id = uuid.uuid4().hex
+            self._records[eval_id] = {
+                "eval_id": eval_id,
+                "status": "pending",
+                "question": question,
+                "submitted_at": time.time(),
+            }
+        self._pool.submit(self._run, eval_id, question, answer, list(contexts))
+        return eval_id
+
+    def get(self, eval_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._evict()
+            rec = self._records.get(eval_id)
+            return dict(rec) if rec else None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"pending": self._pending, "records": len(self._records)}
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    def _run(self, eval_id: str, question: str, answer: str, contexts: List[str]) -> None:
+        t0 = time.perf_counter()
+        try:
+            update: Dict[str, Any] = {
+                "status": "done",
+                **self._evaluate(question, answer, contexts),
+            }
+        except Exception as exc:  # keep the worker alive, surface the error via get()
+            update = {"status": "error", "error": f"{type(exc).__name__}: {exc}"}
+        update.update({"finished_at": time.time(), "eval_s": round(time.perf_counter() - t0, 4)})
+
+        line = None
+        with self._lock:
+            self._pending -= 1
+            rec = self._records.get(eval_id)
+            if rec is not None:
+                rec.update(update)
+                self._records.move_to_end(eval_id)
+                self._evict()
+                line = json.dumps(rec) + "\n"
+        # disk I/O outside self._lock so submit()/get() never wait on it; the log
+        # has its own lock so lines from concurrent workers don't interleave
+        if self._results_log is not None and line is not None:
+            with self._log_lock:
+                self._results_log.parent.mkdir(parents=True, exist_ok=True)
+                with self._results_log.open("a", encoding="utf-8") as f:
+                    f.write(line)
+
+    def _evict(self) -> None:
+        # caller holds the lock; only finished records are evicted
+        cutoff = time.time() - self._retention_s
+        finished = [
+            eid
+            for eid, rec in self._records.items()
+            if rec["status"] != "pending" and rec.get("finished_at", 0.0) < cutoff
+        ]
+        for eid in finished:
+            del self._records[eid]
+        done = len(self._records) - self._pending
+        if done > self._max_results:
+            drop = done - self._max_results
+            for eid in [e for e, r in self._records.items() if r["status"] != "pending"][:drop]:
+                del self._records[eid]
+
+
+@lru_cache
+def get_eval_queue() -> EvalQueue:
+    # one pool per process, created on first deferred eval
+    return EvalQueue()
@@ -1,7 +1,11 @@
 from __future__ import annotations
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Tuple
+import argparse
 import csv
+import time
 import yaml
 import mlflow
 
@@ -12,9 +16,15 @@ from ai_rag_app.src.config import (
     CHUNK_SIZE,
     CHUNK_OVERLAP,
 )
+from ai_rag_app.src.history import append_rows, config_key
 from ai_rag_app.src.index_docs import build_index
 from ai_rag_app.src.rag_chain import answer
-from ai_rag_app.src.mlflow_utils import init_mlflow, log_eval_params, log_eval_metrics
+from ai_rag_app.src.mlflow_utils import (
+    BackgroundLogger,
+    eval_metrics,
+    init_mlflow,
+    log_eval_params,
+)
 
 QA_FILE = Path(__file__).resolve().parents[1] / "data" / "qa" / "qa.yml"
 REPORTS_DIR = Path(__file__).resolve().parents[1] / "reports"
@@ -35,7 +45,49 @@ def load_qs() -> list[str]:
     return out
 
 
-def main() -> None:
+CSV_FIELDS = [
+    "question",
+    "answer",
+    "retrieved",
+    "context_chars",
+    "support_rate",
+    "q_ctx_cosine",
+    "retrieve_ms",
+    "extract_ms",
+    "eval_ms",
+    "total_ms",
+]
+
+
+def _eval_one(i: int, q: str, k: int) -> Tuple[int, str, Dict[str, Any], float]:
+    t0 = time.perf_counter()
+    res = answer(q, k=k, mode="extractive", with_eval=True)
+    return i, q, res, (time.perf_counter() - t0) * 1000
+
+
+def _row(q: str, res: Dict[str, Any], total_ms: float) -> Dict[str, Any]:
+    timings = res.get("timings_ms") or {}
+    return {
+        "question": q,
+        "answer": res.get("answer", ""),
+        "retrieved": res.get("retrieved", 0),
+        "context_chars": res.get("context_chars", 0),
+        "support_rate": (res.get("eval") or {}).get("support_rate"),
+        "q_ctx_cosine": (res.get("eval") or {}).get("q_ctx_cosine"),
+        "retrieve_ms": timings.get("retrieve"),
+        "extract_ms": timings.get("extract"),
+        "eval_ms": timings.get("eval"),
+        "total_ms": round(total_ms, 2),
+    }
+
+
+def main(argv: List[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Batch eval over data/qa/qa.yml.")
+    ap.add_argument("--workers", type=int, default=4, help="questions answered in parallel")
+    ap.add_argument("--batch-size", type=int, default=16, help="questions per submitted batch")
+    ap.add_argument("--k", type=int, default=5)
+    args = ap.parse_args(argv)
+
     # ensure index
     build_index(DOCS_DIR, VSTORE_DIR)
 
@@ -44,52 +96,58 @@ def main() -> None:
     print(f"[eval] MLflow tracking at {uri}")
 
     questions = load_qs()
-    rows = []
+    out = REPORTS_DIR / f"eval_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
 
     run_name = f"batch_eval_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    with mlflow.start_run(run_name=run_name):
+    t0 = time.perf_counter()
+    with mlflow.start_run(run_name=run_name) as parent:
         # shared params
         log_eval_params(
             embed_model=DEFAULT_EMBED_MODEL,
             chunk_size=CHUNK_SIZE,
             chunk_overlap=CHUNK_OVERLAP,
-            k=5,
+            k=args.k,
             docs_dir=str(DOCS_DIR),
             vstore_dir=str(VSTORE_DIR),
         )
 
-        for i, q in enumerate(questions):
-            with mlflow.start_run(run_name=f"q{i+1}", nested=True):
-                res = answer(q, k=5, mode="extractive", with_eval=True)
-
-                rows.append(
-                    {
-                        "question": q,
-                        "answer": res.get("answer", ""),
-                        "retrieved": res.get("retrieved", 0),
-                        "context_chars": res.get("context_chars", 0),
-                        "support_rate": (res.get("eval") or {}).get("support_rate"),
-                        "q_ctx_cosine": (res.get("eval") or {}).get("q_ctx_cosine"),
-                    }
-                )
-
-                log_eval_metrics(
-                    retrieved=res.get("retrieved", 0),
-                    context_chars=res.get("context_chars", 0),
-                    support_rate=(res.get("eval") or {}).get("support_rate"),
-                    q_ctx_cosine=(res.get("eval") or {}).get("q_ctx_cosine"),
-                    answer_tokens_est=res.get("answer_tokens_est", 0),
-                    question_tokens_est=res.get("question_tokens_est", 0),
-                )
-                mlflow.log_param("question", q)
-                mlflow.log_metric("answer_len_chars", len(res.get("answer", "")))
+        # threads share the loaded model; torch releases the GIL while encoding.
+        # rows are written as they finish so a crash keeps everything done so far.
+        with (
+            out.open("w", newline="", encoding="utf-8") as f,
+            BackgroundLogger(parent.info.run_id, parent.info.experiment_id) as logger,
+            ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool,
+        ):
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            f.flush()
+            cfg_key = config_key(DEFAULT_EMBED_MODEL, CHUNK_SIZE, CHUNK_OVERLAP, args.k)
+            for start in range(0, len(questions), args.batch_size):
+                batch = questions[start : start + args.batch_size]
+                done_rows = []
+                futs = [pool.submit(_eval_one, start + j, q, args.k) for j, q in enumerate(batch)]
+                for fut in as_completed(futs):
+                    i, q, res, total_ms = fut.result()
+                    row = _row(q, res, total_ms)
+                    writer.writerow(row)
+                    done_rows.append({**row, "config_key": cfg_key, "k": args.k})
+                    metrics = eval_metrics(
+                        retrieved=res.get("retrieved", 0),
+                        context_chars=res.get("context_chars", 0),
+                        support_rate=row["support_rate"],
+                        q_ctx_cosine=row["q_ctx_cosine"],
+                        answer_tokens_est=res.get("answer_tokens_est", 0),
+                        question_tokens_est=res.get("question_tokens_est", 0),
+                    )
+                    metrics["answer_len_chars"] = len(row["answer"])
+                    metrics["total_ms"] = row["total_ms"]
+                    logger.log_child_run(f"q{i+1}", {"question": q}, metrics)
+                f.flush()
+                append_rows(done_rows, parent.info.run_id, "eval")
+                print(f"[eval] {min(start + args.batch_size, len(questions))}/{len(questions)}")
 
+        mlflow.log_metric("eval_wall_s", time.perf_counter() - t0)
         # write and log report
-        out = REPORTS_DIR / f"eval_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        with out.open("w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
-            writer.writeheader()
-            writer.writerows(rows)
         print(f"[eval] wrote {out}")
         mlflow.log_artifact(str(out))
 
@@ -0,0 +1,187 @@
+from __future__ import annotations
+import argparse
+import sys
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import duckdb
+import polars as pl
+
+from ai_rag_app.src.config import EVAL_HISTORY_DIR
+
+
+def config_key(embed_model: str, chunk_size: int, chunk_overlap: int, k: int) -> str:
+    return f"m={embed_model.split('/')[-1]}_cs={chunk_size}_co={chunk_overlap}_k={k}"
+
+
+# ---------- write ----------
+
+
+def append_rows(
+    rows: List[Dict[str, Any]],
+    run_id: str,
+    source: str,
+    history_dir: Path = EVAL_HISTORY_DIR,
+) -> Optional[Path]:
+    """
+    Append eval rows as one Parquet part under source=<source>/run_id=<run_id>/.
+    Each row is one (run, config, question) observation; rows need `config_key`
+    and `question`, any other scalar columns are kept.
+    """
+    if not rows:
+        return None
+    part_dir = history_dir / f"source={source}" / f"run_id={run_id}"
+    part_dir.mkdir(parents=True, exist_ok=True)
+    created_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    df = pl.DataFrame(rows, infer_schema_length=None).with_columns(
+        pl.lit(created_at).alias("created_at")
+    )
+    # run_id/source come from the partition path, not the file
+    df = df.drop([c for c in ("run_id", "source") if c in df.columns])
+    out = part_dir / f"part-{uuid.uuid4().hex[:12]}.parquet"
+    df.write_parquet(out, compression="zstd", statistics=True)
+    return out
+
+
+# ---------- read ----------
+
+
+def _connect(history_dir: Path = EVAL_HISTORY_DIR) -> duckdb.DuckDBPyConnection:
+    con = duckdb.connect()
+    glob = str(history_dir / "**" / "*.parquet")
+    if not any(history_dir.glob("source=*/run_id=*/*.parquet")):
+        raise FileNotFoundError(f"No eval history under {history_dir}")
+    con.execute(
+        f"""
+        CREATE VIEW evals AS
+        SELECT * FROM read_parquet(
+            '{glob}', hive_partitioning = true, hive_types_autocast = false, union_by_name = true
+        )
+        """
+    )
+    return con
+
+
+def list_runs(history_dir: Path = EVAL_HISTORY_DIR) -> pl.DataFrame:
+    con = _connect(history_dir)
+    return pl.from_arrow(
+        con.execute(
+            """
+            SELECT run_id, source, MIN(created_at) AS created_at,
+                   COUNT(DISTINCT config_key) AS configs, COUNT(*) AS rows,
+                   AVG(support_rate) AS avg_support_rate
+            FROM evals GROUP BY run_id, source ORDER BY created_at
+            """
+        ).arrow()
+    )
+
+
+def latest_runs(n: int = 2, history_dir: Path = EVAL_HISTORY_DIR) -> List[str]:
+    runs = list_runs(history_dir)
+    return runs.get_column("run_id").to_list()[-n:]
+
+
+def compare_runs(run_a: str, run_b: str, history_dir: Path = EVAL_HISTORY_DIR) -> pl.DataFrame:
+    """Per (config, question) metrics side by side for two runs; b - a deltas."""
+    con = _connect(history_dir)
+    sql = """
+        WITH a AS (
+            SELECT config_key, question, AVG(support_rate) AS sr, AVG(total_ms) AS ms
+            FROM evals WHERE run_id = $a GROUP BY ALL
+        ), b AS (
+            SELECT config_key, question, AVG(support_rate) AS sr, AVG(total_ms) AS ms
+            FROM evals WHERE run_id = $b GROUP BY ALL
+        )
+        SELECT config_key, question,
+               a.sr AS support_rate_a, b.sr AS support_rate_b, b.sr - a.sr AS support_rate_delta,
+               a.ms AS total_ms_a, b.ms AS total_ms_b,
+               CASE WHEN a.ms > 0 THEN b.ms / a.ms - 1 END AS total_ms_change
+        FROM a JOIN b USING (config_key, question)
+        ORDER BY support_rate_delta, total_ms_change DESC
+    """
+    return pl.from_arrow(con.execute(sql, {"a": run_a, "b": run_b}).arrow())
+
+
+def question_trend(
+    question: Optional[str] = None,
+    metric: str = "support_rate",
+    history_dir: Path = EVAL_HISTORY_DIR,
+) -> pl.DataFrame:
+    """Metric per question over runs, oldest first."""
+    if metric not in ("support_rate", "q_ctx_cosine", "total_ms", "retrieved", "context_chars"):
+        raise ValueError(f"unknown metric {metric!r}")
+    con = _connect(history_dir)
+    where = "WHERE question = $q" if question else ""
+    params = {"q": question} if question else {}
+    sql = f"""
+        SELECT question, run_id, source, MIN(created_at) AS created_at, AVG({metric}) AS {metric}
+        FROM evals {where}
+        GROUP BY question, run_id, source
+        ORDER BY question, created_at
+    """
+    return pl.from_arrow(con.execute(sql, params).arrow())
+
+
+def regressions(
+    run_a: str,
+    run_b: str,
+    support_drop: float = 0.1,
+    latency_growth: float = 0.25,
+    history_dir: Path = EVAL_HISTORY_DIR,
+) -> pl.DataFrame:
+    """Rows of compare_runs whose support_rate fell or latency grew past the thresholds."""
+    df = compare_runs(run_a, run_b, history_dir)
+    return df.filter(
+        (pl.col("support_rate_delta") <= -support_drop)
+        | (pl.col("total_ms_change").fill_null(0.0) >= latency_growth)
+    )
+
+
+# ---------- cli ----------
+
+
+def main(argv: List[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Query the eval history dataset.")
+    ap.add_argument("--dir", type=Path, default=EVAL_HISTORY_DIR)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("runs", help="list runs")
+    c = sub.add_parser("compare", help="compare two runs (default: last two)")
+    c.add_argument("run_a", nargs="?")
+    c.add_argument("run_b", nargs="?")
+    t = sub.add_parser("trend", help="metric per question across runs")
+    t.add_argument("--question", default=None)
+    t.add_argument("--metric", default="support_rate")
+    r = sub.add_parser("regressions", help="flag regressed questions (default: last two runs)")
+    r.add_argument("run_a", nargs="?")
+    r.add_argument("run_b", nargs="?")
+    r.add_argument("--support-drop", type=float, default=0.1)
+    r.add_argument("--latency-growth", type=float, default=0.25)
+    args = ap.parse_args(argv)
+
+    pl.Config.set_tbl_rows(50)
+    pl.Config.set_fmt_str_lengths(60)
+    if args.cmd == "runs":
+        print(list_runs(args.dir))
+        return
+    if args.cmd == "trend":
+        print(question_trend(args.question, args.metric, args.dir))
+        return
+
+    run_a, run_b = args.run_a, args.run_b
+    if not (run_a and run_b):
+        run_a, run_b = latest_runs(2, args.dir)
+    if args.cmd == "compare":
+        print(compare_runs(run_a, run_b, args.dir))
+        return
+
+    bad = regressions(run_a, run_b, args.support_drop, args.latency_growth, args.dir)
+    print(f"[history] {run_a} -> {run_b}: {bad.height} regressed (config, question) pairs")
+    if bad.height:
+        print(bad)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
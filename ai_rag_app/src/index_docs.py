@@ -1,9 +1,10 @@
 from typing import Iterable, List, Optional
+import argparse
 from pathlib import Path
 import re
+import time
 import hashlib
 import chromadb
-from sentence_transformers import SentenceTransformer
 from .config import (
     DOCS_DIR,
     VSTORE_DIR,
@@ -13,6 +14,11 @@ from .config import (
     CHUNK_OVERLAP,
     BATCH_SIZE,
 )
+from .embeddings import get_model
+from .lexical import source_stats, update_stats
+from .retriever import hnsw_configuration
+from .tenants import get_collection_cache, tenant_dir
+from .metadata_index import update_manifest, where_for_sources
 from filelock import FileLock
 
 
@@ -96,6 +102,22 @@ def _iter_docs(root: Path) -> Iterable[Path]:
         yield from root.rglob(ext)
 
 
+# ---------- hnsw ----------
+
+
+def _sync_hnsw(col, want: dict, explicit_search_ef: bool) -> None:
+    """Existing collections keep space/M/construction ef; only search ef can be updated."""
+    have = (col.configuration or {}).get("hnsw") or {}
+    fixed = [k for k in ("space", "max_neighbors", "ef_construction") if have.get(k) != want[k]]
+    if fixed:
+        print(
+            f"[index] collection keeps its HNSW {', '.join(f'{k}={have.get(k)}' for k in fixed)}; "
+            "index into a fresh store to change them"
+        )
+    if explicit_search_ef and have.get("ef_search") != want["ef_search"]:
+        col.modify(configuration={"hnsw": {"ef_search": want["ef_search"]}})
+
+
 # ⬇️ NEW: parameterized builder
 def build_index_with_params(
     docs_dir: str | Path = DOCS_DIR,
@@ -104,18 +126,24 @@ def build_index_with_params(
     chunk_size: Optional[int] = None,
     chunk_overlap: Optional[int] = None,
     batch_size: Optional[int] = None,
+    hnsw_space: Optional[str] = None,
+    hnsw_m: Optional[int] = None,
+    hnsw_construction_ef: Optional[int] = None,
+    hnsw_search_ef: Optional[int] = None,
+    tenant: Optional[str] = None,
 ) -> None:
-    docs_dir, persist_dir = Path(docs_dir), Path(persist_dir)
+    # a tenant name selects that tenant's store instead of persist_dir
+    docs_dir = Path(docs_dir)
+    persist_dir = tenant_dir(tenant) if tenant else Path(persist_dir)
     persist_dir.mkdir(parents=True, exist_ok=True)
     docs_dir.mkdir(parents=True, exist_ok=True)
 
-    client = chromadb.PersistentClient(path=str(persist_dir))
-    col = client.get_or_create_collection(COLLECTION_NAME)
-
+    hnsw = hnsw_configuration(hnsw_space, hnsw_m, hnsw_construction_ef, hnsw_search_ef)
     lock = FileLock(str(Path(persist_dir) / ".chroma.lock"))
     with lock:
         client = chromadb.PersistentClient(path=str(persist_dir))
-        col = client.get_or_create_collection(COLLECTION_NAME)
+        col = client.get_or_create_collection(COLLECTION_NAME, configuration=hnsw)
+        _sync_hnsw(col, hnsw["hnsw"], explicit_search_ef=hnsw_search_ef is not None)
         # ... rest of indexing & upserts ...
 
     # use overrides or defaults
@@ -124,59 +152,99 @@ def build_index_with_params(
     _chunk_overlap = chunk_overlap or CHUNK_OVERLAP
     _batch = batch_size or BATCH_SIZE
 
-    model = SentenceTransformer(_embed_model)
+    model = get_model(_embed_model)
 
     total_docs = 0
     total_chunks = 0
     total_chars = 0
-
-    for path in _iter_docs(docs_dir):
-        raw = _read_doc(path)
-        if not raw.strip():
-            continue
-        text = _normalize_ws(raw)
-        chunks = _chunk_paragraphs(text, _chunk_size, _chunk_overlap)
-        if not chunks:
-            continue
-
-        ids = _chunk_ids(path, len(chunks))
-        metadatas = []
-        for i, c in enumerate(chunks):
-            metadatas.append(
-                {
-                    "source": str(path),
-                    "chunk_index": i,
-                    "chars": len(c),
-                    "tokens_est": _est_tokens(len(c)),
-                    "content_sha256": _sha256(c),
-                    "embed_model": _embed_model,
-                    "chunk_size": _chunk_size,
-                    "chunk_overlap": _chunk_overlap,
-                }
-            )
-
-        embeddings = model.encode(chunks, normalize_embeddings=True).tolist()
-
-        for i in range(0, len(chunks), _batch):
-            col.upsert(
-                ids=ids[i : i + _batch],
-                documents=chunks[i : i + _batch],
-                embeddings=embeddings[i : i + _batch],
-                metadatas=metadatas[i : i + _batch],
-            )
-
-        total_docs += 1
-        total_chunks += len(chunks)
-        total_chars += sum(len(c) for c in chunks)
-
+    indexed_at = int(time.time())
+    manifest = {}
+    sentence_stats = {}
+
+    try:
+        for path in _iter_docs(docs_dir):
+            raw = _read_doc(path)
+            if not raw.strip():
+                continue
+            text = _normalize_ws(raw)
+            chunks = _chunk_paragraphs(text, _chunk_size, _chunk_overlap)
+            if not chunks:
+                continue
+
+            ids = _chunk_ids(path, len(chunks))
+            file_type = path.suffix.lower().lstrip(".")
+            metadatas = []
+            for i, c in enumerate(chunks):
+                metadatas.append(
+                    {
+                        "source": str(path),
+                        "chunk_index": i,
+                        "chars": len(c),
+                        "tokens_est": _est_tokens(len(c)),
+                        "content_sha256": _sha256(c),
+                        "embed_model": _embed_model,
+                        "chunk_size": _chunk_size,
+                        "chunk_overlap": _chunk_overlap,
+                        "file_type": file_type,
+                        "indexed_at": indexed_at,
+                    }
+                )
+
+            embeddings = model.encode(chunks, normalize_embeddings=True).tolist()
+
+            for i in range(0, len(chunks), _batch):
+                col.upsert(
+                    ids=ids[i : i + _batch],
+                    documents=chunks[i : i + _batch],
+                    embeddings=embeddings[i : i + _batch],
+                    metadatas=metadatas[i : i + _batch],
+                )
+
+            manifest[str(path)] = {
+                "rel": str(path.relative_to(docs_dir)),
+                "file_type": file_type,
+                "indexed_at": indexed_at,
+                "chunks": len(chunks),
+            }
+            sentence_stats[str(path)] = source_stats(chunks)
+            total_docs += 1
+            total_chunks += len(chunks)
+            total_chars += sum(len(c) for c in chunks)
+
+        # sources indexed from docs_dir before but not found now were deleted or renamed
+        dropped = update_manifest(persist_dir, manifest, prune_under=docs_dir)
+        if dropped:
+            col.delete(where=where_for_sources(dropped))
+    finally:
+        # release this writer's handle; the store stays open only where it's cached
+        client.close()
+
+    update_stats(persist_dir, sentence_stats, removed=dropped)
+    get_collection_cache().refresh(persist_dir)
     avg_tokens = _est_tokens(total_chars / total_chunks) if total_chunks else 0
     print(
-        f"[index] docs={total_docs} chunks={total_chunks} "
+        f"[index] docs={total_docs} chunks={total_chunks} dropped_sources={len(dropped)} "
         f"avg_tokens_per_chunk≈{avg_tokens} store={persist_dir} "
         f"model={_embed_model} size={_chunk_size} overlap={_chunk_overlap}"
     )
 
 
 # keep the original name as a thin wrapper
-def build_index(docs_dir: str | Path = DOCS_DIR, persist_dir: str | Path = VSTORE_DIR) -> None:
-    build_index_with_params(docs_dir, persist_dir)
+def build_index(
+    docs_dir: str | Path = DOCS_DIR,
+    persist_dir: str | Path = VSTORE_DIR,
+    tenant: Optional[str] = None,
+) -> None:
+    build_index_with_params(docs_dir, persist_dir, tenant=tenant)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Index docs into the vector store.")
+    ap.add_argument("--docs-dir", type=Path, default=DOCS_DIR)
+    ap.add_argument("--tenant", default=None, help="index into this tenant's store")
+    args = ap.parse_args(argv)
+    build_index(args.docs_dir, tenant=args.tenant)
+
+
+if __name__ == "__main__":
+    main()
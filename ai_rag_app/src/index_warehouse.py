@@ -0,0 +1,247 @@
+from __future__ import annotations
+import argparse
+import hashlib
+import string
+import time
+from collections import Counter
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import chromadb
+import duckdb
+
+from .config import (
+    COLLECTION_NAME,
+    DEFAULT_EMBED_MODEL,
+    VSTORE_DIR,
+    WAREHOUSE_DB,
+)
+from .embeddings import get_model
+from .lexical import source_stats, update_stats
+from .metadata_index import update_manifest
+from .retriever import hnsw_configuration
+from .tenants import get_collection_cache, tenant_dir
+
+# one posting per chunk; missing / NULL fields render as "n/a"
+JOB_TEMPLATE = (
+    "{job_title} ({experience_level}, {employment_type}) at {company_name}, "
+    "a {company_size} {industry} company in {location}. Posted {posted_date}. "
+    "Salary range (USD): {salary_range_usd}. Skills: {skills_required}. "
+    "Tools: {tools_preferred}."
+)
+ROWS_PER_BATCH = 4096
+EMBED_BATCH = 256
+
+
+class _RowFields(dict):
+    def __missing__(self, key: str) -> str:
+        return "n/a"
+
+
+def render(template: str, row: Dict[str, Any]) -> str:
+    fields = _RowFields({k: v for k, v in row.items() if v is not None and v != ""})
+    return string.Formatter().vformat(template, (), fields)
+
+
+def _meta_value(v: Any) -> Any:
+    # chroma metadata takes str/int/float/bool only
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    if isinstance(v, (str, int, float, bool)):
+        return v
+    return str(v)
+
+
+def iter_batches(
+    db_path: Path, table: str, rows_per_batch: int = ROWS_PER_BATCH
+) -> Iterator[List[Dict[str, Any]]]:
+    """Stream the table as Arrow record batches; only one batch is in Python at a time."""
+    con = duckdb.connect(str(db_path), read_only=True)
+    try:
+        reader = con.execute(f'SELECT * FROM "{table}"').to_arrow_reader(rows_per_batch)
+        for batch in reader:
+            yield batch.to_pylist()
+    finally:
+        con.close()
+
+
+def _delete_missing_rows(
+    col, db_path: Path, table: str, key: str, source: str, page: int, delete_batch: int
+) -> int:
+    """
+    Delete the table's chunks whose row is gone. The collection's ids are paged and each
+    page is anti-joined against the table in DuckDB, so neither side is held in full.
+    """
+    prefix = f"{table}:"
+    deleted = offset = 0
+    con = duckdb.connect(str(db_path), read_only=True)
+    try:
+        while True:
+            ids = col.get(where={"source": source}, include=[], limit=page, offset=offset)["ids"]
+            if not ids:
+                return deleted
+            missing = con.execute(
+                f"""
+                SELECT p.k FROM (SELECT unnest(?::VARCHAR[]) AS k) p
+                ANTI JOIN "{table}" t ON CAST(t."{key}" AS VARCHAR) = p.k
+                """,
+                [[i[len(prefix) :] for i in ids]],
+            ).fetchall()
+            stale = [prefix + k for (k,) in missing]
+            for s in range(0, len(stale), delete_batch):
+                col.delete(ids=stale[s : s + delete_batch])
+            deleted += len(stale)
+            # deleted ids no longer take up offsets, the kept ones do
+            offset += len(ids) - len(stale)
+    finally:
+        con.close()
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def index_table(
+    db_path: Path = WAREHOUSE_DB,
+    table: str = "fact_job_postings",
+    key: str = "job_id",
+    template: str = JOB_TEMPLATE,
+    persist_dir: Optional[Path] = None,
+    tenant: Optional[str] = None,
+    embed_model: Optional[str] = None,
+    rows_per_batch: int = ROWS_PER_BATCH,
+    embed_batch: int = EMBED_BATCH,
+) -> Dict[str, int]:
+    """
+    Render each row of `table` with `template` and upsert it as one chunk with id
+    "<table>:<key>". Rows whose rendered text (and embed model) hash is unchanged
+    since the last run are skipped, so only new or edited rows are embedded; chunks of
+    rows no longer in the table are deleted.
+    """
+    db_path = Path(db_path)
+    if not db_path.exists():
+        raise FileNotFoundError(f"warehouse not found at {db_path}; run the de_pipeline flow")
+    store = Path(persist_dir) if persist_dir else tenant_dir(tenant)
+    store.mkdir(parents=True, exist_ok=True)
+    model_name = embed_model or DEFAULT_EMBED_MODEL
+    model = get_model(model_name)
+    client = chromadb.PersistentClient(path=str(store))
+    col = client.get_or_create_collection(COLLECTION_NAME, configuration=hnsw_configuration())
+    upsert_batch = client.get_max_batch_size()
+
+    source = f"duckdb://{db_path.name}/{table}"
+    indexed_at = int(time.time())
+    df: Counter = Counter()
+    n_sents = n_toks = 0
+    rows = embedded = deleted = 0
+    t0 = time.perf_counter()
+
+    try:
+        for batch in iter_batches(db_path, table, rows_per_batch):
+            ids, texts, metas = [], [], []
+            for row in batch:
+                text = render(template, row)
+                ids.append(f"{table}:{row[key]}")
+                texts.append(text)
+                meta = {k: _meta_value(v) for k, v in row.items() if v is not None}
+                meta.update(
+                    {
+                        "source": source,
+                        "row_key": str(row[key]),
+                        "chunk_index": 0,
+                        "chars": len(text),
+                        "tokens_est": max(1, round(len(text) / 4)),
+                        "content_sha256": _sha256(f"{model_name}\n{text}"),
+                        "embed_model": model_name,
+                        "file_type": "duckdb",
+                        "indexed_at": indexed_at,
+                    }
+                )
+                metas.append(meta)
+
+            stats = source_stats(texts)
+            n_sents, n_toks = n_sents + stats["n"], n_toks + stats["len"]
+            df.update(stats["df"])
+
+            # only rows that are new or whose content hash moved get embedded
+            existing = col.get(ids=ids, include=["metadatas"])
+            known = {
+                i: (m or {}).get("content_sha256")
+                for i, m in zip(existing["ids"], existing["metadatas"])
+            }
+            changed = [j for j, i in enumerate(ids) if known.get(i) != metas[j]["content_sha256"]]
+            rows += len(ids)
+            if changed:
+                vecs = model.encode(
+                    [texts[j] for j in changed], batch_size=embed_batch, normalize_embeddings=True
+                )
+                for s in range(0, len(changed), upsert_batch):
+                    part = changed[s : s + upsert_batch]
+                    col.upsert(
+                        ids=[ids[j] for j in part],
+                        documents=[texts[j] for j in part],
+                        embeddings=vecs[s : s + len(part)],
+                        metadatas=[metas[j] for j in part],
+                    )
+                embedded += len(changed)
+            print(f"[index-wh] rows={rows} embedded={embedded} ({time.perf_counter() - t0:.1f}s)")
+
+        # upserts never remove anything: drop chunks of rows deleted from the table
+        deleted = _delete_missing_rows(
+            col, db_path, table, key, source, rows_per_batch, upsert_batch
+        )
+    finally:
+        client.close()
+
+    update_manifest(
+        store,
+        {source: {"rel": table, "file_type": "duckdb", "indexed_at": indexed_at, "chunks": rows}},
+    )
+    update_stats(store, {source: {"n": n_sents, "len": n_toks, "df": dict(df)}})
+    get_collection_cache().refresh(store)
+    print(
+        f"[index-wh] {source}: rows={rows} embedded={embedded} skipped={rows - embedded} "
+        f"deleted={deleted} "
+        f"store={store} model={model_name} elapsed={time.perf_counter() - t0:.1f}s"
+    )
+    return {"rows": rows, "embedded": embedded, "skipped": rows - embedded, "deleted": deleted}
+
+
+def main(argv: List[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Index warehouse rows into the vector store.")
+    ap.add_argument("--db", type=Path, default=WAREHOUSE_DB)
+    ap.add_argument("--table", default="fact_job_postings")
+    ap.add_argument("--key", default="job_id", help="column used as the chunk id")
+    ap.add_argument(
+        "--template", default=None, help="str.format template over the row, or @path to a file"
+    )
+    ap.add_argument("--persist-dir", type=Path, default=None)
+    ap.add_argument("--tenant", default=None)
+    ap.add_argument("--embed-model", default=None)
+    ap.add_argument("--rows-per-batch", type=int, default=ROWS_PER_BATCH)
+    ap.add_argument("--embed-batch", type=int, default=EMBED_BATCH)
+    args = ap.parse_args(argv)
+
+    template = JOB_TEMPLATE
+    if args.template:
+        template = (
+            Path(args.template[1:]).read_text(encoding="utf-8")
+            if args.template.startswith("@")
+            else args.template
+        )
+    index_table(
+        db_path=args.db,
+        table=args.table,
+        key=args.key,
+        template=template,
+        persist_dir=args.persist_dir or (None if args.tenant else VSTORE_DIR),
+        tenant=args.tenant,
+        embed_model=args.embed_model,
+        rows_per_batch=args.rows_per_batch,
+        embed_batch=args.embed_batch,
+    )
+
+
+if __name__ == "__main__":
+    main()
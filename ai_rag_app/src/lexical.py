@@ -0,0 +1,194 @@
+from __future__ import annotations
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import argparse
+import json
+import math
+import re
+import sys
+import time
+
+from filelock import FileLock
+
+from .eval import split_sentences
+
+# per-store sidecar with sentence-level term statistics, keyed by source so a
+# re-indexed document replaces its own contribution
+STATS_NAME = "sentence_stats.json"
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by do does for from how in is it of on or that the this to was "
+    "what when where which who why with these those about into can their there they".split()
+)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+# ---------- index time ----------
+
+
+def source_stats(chunks: Sequence[str]) -> Dict:
+    """Sentence count, total length and document frequency over one source's chunks."""
+    df: Counter = Counter()
+    n = total = 0
+    for chunk in chunks:
+        for sent in split_sentences(chunk):
+            toks = tokenize(sent)
+            n += 1
+            total += len(toks)
+            df.update(set(toks))
+    return {"n": n, "len": total, "df": dict(df)}
+
+
+def update_stats(
+    persist_dir: Path, by_source: Dict[str, Dict], removed: Sequence[str] = ()
+) -> None:
+    path = Path(persist_dir) / STATS_NAME
+    with FileLock(str(path) + ".lock"):
+        data = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+        for src in removed:
+            data.pop(src, None)
+        data.update(by_source)
+        path.write_text(json.dumps(data), encoding="utf-8")
+
+
+# ---------- query time ----------
+
+
+@lru_cache(maxsize=8)
+def _load_stats(path: str, mtime_ns: int) -> Dict:
+    by_source = json.loads(Path(path).read_text(encoding="utf-8"))
+    df: Counter = Counter()
+    n = total = 0
+    for s in by_source.values():
+        n += s["n"]
+        total += s["len"]
+        df.update(s["df"])
+    return {"n": n, "avgdl": total / n if n else 0.0, "df": df}
+
+
+def load_stats(persist_dir: Path) -> Optional[Dict]:
+    """Corpus-wide sentence stats for the store, cached until the sidecar changes."""
+    path = Path(persist_dir) / STATS_NAME
+    if not path.exists():
+        return None
+    return _load_stats(str(path), path.stat().st_mtime_ns)
+
+
+def bm25_scores(query: str, sentences: Sequence[str], stats: Optional[Dict] = None) -> List[float]:
+    """
+    BM25 of each sentence against the query. idf comes from the index-time stats;
+    without them every query term gets idf 1 and avgdl is taken from `sentences`.
+    """
+    q_terms = set(tokenize(query))
+    toks = [tokenize(s) for s in sentences]
+    if not q_terms or not toks:
+        return [0.0] * len(sentences)
+
+    if stats and stats["n"]:
+        n, avgdl = stats["n"], stats["avgdl"] or 1.0
+        idf = {}
+        for t in q_terms:
+            df = stats["df"].get(t, 0)
+            idf[t] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+    else:
+        avgdl = (sum(len(t) for t in toks) / len(toks)) or 1.0
+        idf = {t: 1.0 for t in q_terms}
+
+    scores = []
+    for sent_toks in toks:
+        tf = Counter(t for t in sent_toks if t in q_terms)
+        dl = len(sent_toks)
+        score = 0.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * dl / avgdl)
+        for term, f in tf.items():
+            score += idf[term] * f * (BM25_K1 + 1) / (f + norm)
+        scores.append(score)
+    return scores
+
+
+def select_candidates(
+    query: str, sentences: Sequence[str], cap: int, stats: Optional[Dict] = None
+) -> List[int]:
+    """
+    Indices of at most `cap` sentences worth embedding: the top BM25 hits, or the
+    first `cap` in retrieval order (vector-only fallback) when nothing overlaps.
+    """
+    if cap <= 0 or len(sentences) <= cap:
+        return list(range(len(sentences)))
+    scores = bm25_scores(query, sentences, stats)
+    if not any(scores):
+        return list(range(cap))
+    ranked = sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True)
+    return sorted(ranked[:cap])
+
+
+# ---------- quality check ----------
+
+
+def check(cap: int, tolerance: float = 0.0, k: int = 5) -> bool:
+    """
+    Answer every qa.yml question with and without pruning and compare support_rate.
+    Returns False when the pruned mean drops more than `tolerance` below the full one.
+    """
+    from .config import VSTORE_DIR
+    from .eval import score_support
+    from .eval_runner import load_qs
+    from .rag_chain import _extractive_answer
+    from .retriever import retrieve
+
+    stats = load_stats(VSTORE_DIR)
+    full_sr, pruned_sr, full_s, pruned_s = [], [], 0.0, 0.0
+    for q in load_qs():
+        contexts = [doc for (doc, _meta) in retrieve(q, k=k)]
+        if not contexts:
+            continue
+        t0 = time.perf_counter()
+        full = _extractive_answer(q, contexts, max_candidates=0)
+        t1 = time.perf_counter()
+        pruned = _extractive_answer(q, contexts, max_candidates=cap, lexical_stats=stats)
+        t2 = time.perf_counter()
+        full_s += t1 - t0
+        pruned_s += t2 - t1
+        full_sr.append(score_support(full, contexts)["support_rate"])
+        pruned_sr.append(score_support(pruned, contexts)["support_rate"])
+
+    if not full_sr:
+        print("[lexical] no questions answered; is the index built?")
+        return False
+    full_mean = sum(full_sr) / len(full_sr)
+    pruned_mean = sum(pruned_sr) / len(pruned_sr)
+    print(
+        f"[lexical] questions={len(full_sr)} cap={cap} "
+        f"support_rate full={full_mean:.3f} pruned={pruned_mean:.3f} "
+        f"extract_s full={full_s:.2f} pruned={pruned_s:.2f}"
+    )
+    return pruned_mean >= full_mean - tolerance
+
+
+def main(argv: List[str] | None = None) -> None:
+    from .config import LEXICAL_CANDIDATES
+
+    ap = argparse.ArgumentParser(description="BM25 candidate pruning for the extractive step.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("check", help="compare support_rate on qa.yml with and without pruning")
+    c.add_argument("--cap", type=int, default=LEXICAL_CANDIDATES or 48)
+    c.add_argument("--tolerance", type=float, default=0.0)
+    c.add_argument("--k", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    if not check(args.cap, args.tolerance, args.k):
+        print("[lexical] pruning lost answer quality")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
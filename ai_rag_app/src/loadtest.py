@@ -0,0 +1,315 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import httpx
+except ImportError as exc:
+    raise ImportError("the load generator needs httpx (pip install -e .[loadtest])") from exc
+
+from ai_rag_app.src.config import DOCS_DIR
+
+REPORTS_DIR = Path(__file__).resolve().parents[1] / "reports"
+
+SCENARIOS = ("ask", "ask_eval", "stats")
+
+_SYNTH_TOPICS = ["vector stores", "retrieval", "chunking", "embeddings", "citations", "RAG"]
+_SYNTH_TEMPLATES = [
+    "What do these docs say about {t}?",
+    "How does {t} work?",
+    "Summarize the key ideas about {t}.",
+    "Why does {t} matter for grounded answers?",
+]
+
+
+# ---------- questions ----------
+
+
+def load_questions(synthetic: int = 0, seed: int = 0) -> List[str]:
+    if synthetic > 0:
+        rng = random.Random(seed)
+        return [
+            rng.choice(_SYNTH_TEMPLATES).format(t=rng.choice(_SYNTH_TOPICS))
+            for _ in range(synthetic)
+        ]
+    # local import: eval_runner pulls in mlflow and the RAG chain
+    from ai_rag_app.src.eval_runner import load_qs
+
+    return load_qs() or ["What do these docs say about vector stores?"]
+
+
+# ---------- stats ----------
+
+
+def percentile(sorted_vals: List[float], p: float) -> float:
+    """Nearest-rank percentile over an already sorted list."""
+    if not sorted_vals:
+        return 0.0
+    rank = max(1, min(len(sorted_vals), math.ceil(p / 100 * len(sorted_vals))))
+    return sorted_vals[rank - 1]
+
+
+def summarize(latencies_s: List[float], errors: int, wall_s: float) -> Dict[str, Any]:
+    lat = sorted(x * 1000 for x in latencies_s)
+    n = len(lat) + errors
+    return {
+        "requests": n,
+        "errors": errors,
+        "rps": round(len(lat) / wall_s, 2) if wall_s > 0 else 0.0,
+        "p50_ms": round(percentile(lat, 50), 2),
+        "p95_ms": round(percentile(lat, 95), 2),
+        "p99_ms": round(percentile(lat, 99), 2),
+        "max_ms": round(lat[-1], 2) if lat else 0.0,
+        "wall_s": round(wall_s, 3),
+    }
+
+
+# ---------- load generation ----------
+
+
+def _request_for(scenario: str, question: str, k: int) -> Dict[str, Any]:
+    if scenario == "stats":
+        return {"method": "GET", "url": "/stats"}
+    body = {"question": question, "k": k, "eval": scenario == "ask_eval"}
+    return {"method": "POST", "url": "/ask", "json": body}
+
+
+async def _run_scenario(
+    base_url: str,
+    scenario: str,
+    questions: List[str],
+    requests: int,
+    concurrency: int,
+    rate: Optional[float],
+    k: int,
+    timeout_s: float,
+) -> Dict[str, Any]:
+    sem = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout_s, limits=limits) as client:
+        start = time.perf_counter()
+
+        async def one(i: int) -> None:
+            nonlocal errors
+            # open loop when a rate is set: latency is measured from the scheduled send
+            # time so a slow server can't hide queueing delay (coordinated omission)
+            scheduled = start + i / rate if rate else None
+            if scheduled is not None:
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            async with sem:
+                t0 = scheduled if scheduled is not None else time.perf_counter()
+                req = _request_for(scenario, questions[i % len(questions)], k)
+                try:
+                    r = await client.request(**req)
+                    ok = r.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - t0)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        wall = time.perf_counter() - start
+
+    return summarize(latencies, errors, wall)
+
+
+# ---------- local server ----------
+
+
+def _build_fixture_index(persist_dir: Path) -> None:
+    from ai_rag_app.src.index_docs import build_index
+
+    build_index(DOCS_DIR, persist_dir)
+
+
+def _start_server(vstore_dir: Path, port: int, workers: int) -> subprocess.Popen:
+    env = {**os.environ, "AI_RAG_VSTORE_DIR": str(vstore_dir)}
+    if workers > 1:
+        cmd = [sys.executable, "-m", "ai_rag_app.src.serve", "--workers", str(workers)]
+        cmd += ["--port", str(port), "--report-every", "0"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "ai_rag_app.src.service:app", "--port", str(port)]
+        cmd += ["--log-level", "warning"]
+    return subprocess.Popen(cmd, env=env)
+
+
+def _wait_healthy(base_url: str, proc: Optional[subprocess.Popen], timeout_s: float = 120) -> None:
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"server exited early with code {proc.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"server at {base_url} not healthy after {timeout_s}s")
+
+
+def run(
+    url: Optional[str] = None,
+    vstore_dir: Optional[Path] = None,
+    port: int = 8765,
+    workers: int = 1,
+    scenarios: tuple[str, ...] = SCENARIOS,
+    requests: int = 200,
+    concurrency: int = 8,
+    rate: Optional[float] = None,
+    k: int = 5,
+    synthetic: int = 0,
+    warmup: int = 5,
+    timeout_s: float = 60.0,
+    out: Optional[Path] = None,
+) -> Path:
+    """Run each scenario against `url` (or a locally started server) and write a JSON report."""
+    questions = load_questions(synthetic)
+    proc = None
+    if url is None:
+        if vstore_dir is None:
+            vstore_dir = Path(tempfile.mkdtemp(prefix="rag_load_")) / "vectorstore"
+            _build_fixture_index(vstore_dir)
+        url = f"http://127.0.0.1:{port}"
+        proc = _start_server(vstore_dir, port, workers)
+
+    try:
+        _wait_healthy(url, proc)
+        results: Dict[str, Any] = {}
+        for sc in scenarios:
+            if warmup:
+                asyncio.run(_run_scenario(url, sc, questions, warmup, 1, None, k, timeout_s))
+            results[sc] = asyncio.run(
+                _run_scenario(url, sc, questions, requests, concurrency, rate, k, timeout_s)
+            )
+            r = results[sc]
+            print(
+                f"[load] {sc:9s} rps={r['rps']:8.2f} p50={r['p50_ms']:8.1f}ms "
+                f"p95={r['p95_ms']:8.1f}ms p99={r['p99_ms']:8.1f}ms errors={r['errors']}"
+            )
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "url": url,
+            "workers": workers,
+            "requests": requests,
+            "concurrency": concurrency,
+            "rate": rate,
+            "k": k,
+            "questions": len(questions),
+            "synthetic": synthetic,
+        },
+        "results": results,
+    }
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = out or REPORTS_DIR / f"load_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"[load] wrote {out}")
+    return out
+
+
+# ---------- compare ----------
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], threshold: float = 0.10) -> List[Dict]:
+    """
+    Per scenario/metric deltas between two reports. A row is a regression when
+    latency grows, or rps / success drops, by more than `threshold` (relative).
+    """
+    rows = []
+    for sc in sorted(set(base["results"]) & set(new["results"])):
+        b, n = base["results"][sc], new["results"][sc]
+        for metric in ("rps", "p50_ms", "p95_ms", "p99_ms", "errors"):
+            bv, nv = float(b.get(metric, 0)), float(n.get(metric, 0))
+            change = (nv - bv) / bv if bv else (0.0 if nv == bv else float("inf"))
+            worse = -change if metric == "rps" else change
+            rows.append(
+                {
+                    "scenario": sc,
+                    "metric": metric,
+                    "base": bv,
+                    "new": nv,
+                    "change": round(change, 4),
+                    "regression": worse > threshold,
+                }
+            )
+    return rows
+
+
+def _cli_compare(base_path: Path, new_path: Path, threshold: float) -> int:
+    base = json.loads(base_path.read_text(encoding="utf-8"))
+    new = json.loads(new_path.read_text(encoding="utf-8"))
+    rows = compare(base, new, threshold)
+    for r in rows:
+        flag = "  REGRESSION" if r["regression"] else ""
+        print(
+            f"{r['scenario']:9s} {r['metric']:7s} {r['base']:10.2f} -> {r['new']:10.2f} "
+            f"({r['change']:+.1%}){flag}"
+        )
+    return 1 if any(r["regression"] for r in rows) else 0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Load test the RAG service.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("run", help="generate load and write a JSON report")
+    r.add_argument("--url", default=None, help="target a running server instead of starting one")
+    r.add_argument("--vstore", type=Path, default=None, help="existing store (default: fixture)")
+    r.add_argument("--port", type=int, default=8765)
+    r.add_argument("--workers", type=int, default=1, help=">1 starts the pre-fork server")
+    r.add_argument("--scenarios", default=",".join(SCENARIOS))
+    r.add_argument("--requests", type=int, default=200, help="per scenario")
+    r.add_argument("--concurrency", type=int, default=8)
+    r.add_argument("--rate", type=float, default=None, help="target req/s (open loop)")
+    r.add_argument("--k", type=int, default=5)
+    r.add_argument("--synthetic", type=int, default=0, help="use N synthetic questions")
+    r.add_argument("--warmup", type=int, default=5)
+    r.add_argument("--out", type=Path, default=None)
+
+    c = sub.add_parser("compare", help="diff two reports and flag regressions")
+    c.add_argument("base", type=Path)
+    c.add_argument("new", type=Path)
+    c.add_argument("--threshold", type=float, default=0.10)
+
+    args = ap.parse_args()
+    if args.cmd == "compare":
+        sys.exit(_cli_compare(args.base, args.new, args.threshold))
+    run(
+        url=args.url,
+        vstore_dir=args.vstore,
+        port=args.port,
+        workers=args.workers,
+        scenarios=tuple(s for s in args.scenarios.split(",") if s in SCENARIOS),
+        requests=args.requests,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        k=args.k,
+        synthetic=args.synthetic,
+        warmup=args.warmup,
+        out=args.out,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+MEMORY_TTL_S = 5.0  # /stats may be polled; smaps_rollup walks every mapping
+
+_cache: Dict[int, Tuple[float, Dict[str, Optional[float]]]] = {}
+_lock = threading.Lock()
+
+
+def process_memory(pid: int) -> Dict[str, Optional[float]]:
+    """RSS / PSS / shared MB for one process (Linux smaps_rollup, `ps` RSS elsewhere)."""
+    rollup = Path(f"/proc/{pid}/smaps_rollup")
+    if rollup.exists():
+        kb: Dict[str, int] = {}
+        for line in rollup.read_text().splitlines()[1:]:
+            key, _, rest = line.partition(":")
+            parts = rest.split()
+            if parts and parts[0].isdigit():
+                kb[key] = int(parts[0])
+        shared = kb.get("Shared_Clean", 0) + kb.get("Shared_Dirty", 0)
+        return {
+            "rss_mb": round(kb.get("Rss", 0) / 1024, 1),
+            "pss_mb": round(kb.get("Pss", 0) / 1024, 1),
+            "shared_mb": round(shared / 1024, 1),
+        }
+    try:
+        out = subprocess.run(
+            ["ps", "-o", "rss=", "-p", str(pid)], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        rss_mb: Optional[float] = round(int(out) / 1024, 1)
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        rss_mb = None
+    return {"rss_mb": rss_mb, "pss_mb": None, "shared_mb": None}
+
+
+def cached_process_memory(pid: int, ttl: float = MEMORY_TTL_S) -> Dict[str, Optional[float]]:
+    """process_memory(pid), re-read at most once every `ttl` seconds."""
+    now = time.monotonic()
+    with _lock:
+        hit = _cache.get(pid)
+        if hit and now - hit[0] < ttl:
+            return dict(hit[1])
+    mem = process_memory(pid)
+    with _lock:
+        _cache[pid] = (now, mem)
+    return dict(mem)
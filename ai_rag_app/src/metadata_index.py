@@ -0,0 +1,122 @@
+from __future__ import annotations
+from datetime import datetime
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import json
+
+from filelock import FileLock
+
+# per-store sidecar: source -> {rel, file_type, indexed_at, chunks}
+MANIFEST_NAME = "sources.json"
+
+
+def _manifest_path(persist_dir: Path) -> Path:
+    return Path(persist_dir) / MANIFEST_NAME
+
+
+def load_manifest(persist_dir: Path) -> Dict[str, Dict[str, Any]]:
+    path = _manifest_path(persist_dir)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def update_manifest(
+    persist_dir: Path, entries: Dict[str, Dict[str, Any]], prune_under: Optional[Path] = None
+) -> List[str]:
+    """
+    Merge `entries` into the manifest. With `prune_under` (a full rebuild of that docs dir),
+    sources below it that are not in `entries` were deleted or renamed and are dropped.
+    Returns the dropped sources so the caller can delete their chunks.
+    """
+    path = _manifest_path(persist_dir)
+    with FileLock(str(path) + ".lock"):
+        manifest = load_manifest(persist_dir)
+        dropped = []
+        if prune_under is not None:
+            root = Path(prune_under)
+            dropped = sorted(
+                src for src in manifest if src not in entries and Path(src).is_relative_to(root)
+            )
+        for src in dropped:
+            del manifest[src]
+        manifest.update(entries)
+        path.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+    return dropped
+
+
+def manifest_from_collection(col) -> Dict[str, Dict[str, Any]]:
+    """Rebuild the manifest from chunk metadata (stores indexed before it existed)."""
+    manifest: Dict[str, Dict[str, Any]] = {}
+    for meta in col.get(include=["metadatas"]).get("metadatas") or []:
+        src = (meta or {}).get("source")
+        if not src:
+            continue
+        entry = manifest.setdefault(
+            src,
+            {
+                "rel": src,
+                "file_type": meta.get("file_type") or Path(src).suffix.lower().lstrip("."),
+                "indexed_at": meta.get("indexed_at", 0),
+                "chunks": 0,
+            },
+        )
+        entry["chunks"] += 1
+    return manifest
+
+
+def _to_ts(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+def has_filters(filters: Optional[Dict[str, Any]]) -> bool:
+    return bool(filters) and any(v not in (None, "", []) for v in filters.values())
+
+
+def match_sources(
+    manifest: Dict[str, Dict[str, Any]], filters: Dict[str, Any]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Sources in `manifest` that satisfy every filter:
+    source (glob if it has *?[ else prefix, against the full or docs-relative path),
+    file_types (e.g. ["md", "pdf"]), indexed_after / indexed_before (datetime, ISO or epoch).
+    """
+    pattern = filters.get("source") or None
+    is_glob = pattern is not None and any(ch in pattern for ch in "*?[")
+    file_types = {t.lower().lstrip(".") for t in filters.get("file_types") or []}
+    after = _to_ts(filters.get("indexed_after"))
+    before = _to_ts(filters.get("indexed_before"))
+
+    out = {}
+    for src, entry in manifest.items():
+        rel = entry.get("rel", src)
+        if pattern is not None:
+            if is_glob:
+                if not (fnmatch(src, pattern) or fnmatch(rel, pattern)):
+                    continue
+            elif not (src.startswith(pattern) or rel.startswith(pattern)):
+                continue
+        if file_types and entry.get("file_type") not in file_types:
+            continue
+        ts = float(entry.get("indexed_at") or 0)
+        if after is not None and ts < after:
+            continue
+        if before is not None and ts > before:
+            continue
+        out[src] = entry
+    return out
+
+
+def where_for_sources(sources: List[str]) -> Dict[str, Any]:
+    # chroma resolves this against its metadata index before the vector search,
+    # so only chunks of the matching sources are scanned
+    if len(sources) == 1:
+        return {"source": sources[0]}
+    return {"source": {"$in": sources}}
@@ -1,7 +1,15 @@
 from __future__ import annotations
+import atexit
 import os
+import queue
+import threading
+import time
 from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
 import mlflow
+from mlflow.entities import Metric, Param
+from mlflow.tracking import MlflowClient
+from mlflow.utils.mlflow_tags import MLFLOW_PARENT_RUN_ID, MLFLOW_RUN_NAME
 
 
 def init_mlflow(experiment: str = "rag_eval") -> str:
@@ -27,7 +35,7 @@ def log_eval_params(
     )
 
 
-def log_eval_metrics(
+def eval_metrics(
     *,
     retrieved: int,
     context_chars: int,
@@ -35,8 +43,8 @@ def log_eval_metrics(
     q_ctx_cosine: float | None,
     answer_tokens_est: int,
     question_tokens_est: int,
-) -> None:
-    metrics = {
+) -> Dict[str, float]:
+    metrics: Dict[str, float] = {
         "retrieved": retrieved,
         "context_chars": context_chars,
         "answer_tokens_est": answer_tokens_est,
@@ -46,4 +54,68 @@ def log_eval_metrics(
         metrics["support_rate"] = float(support_rate)
     if q_ctx_cosine is not None:
         metrics["q_ctx_cosine"] = float(q_ctx_cosine)
-    mlflow.log_metrics(metrics)
+    return metrics
+
+
+def log_eval_metrics(**kwargs: Any) -> None:
+    mlflow.log_metrics(eval_metrics(**kwargs))
+
+
+class BackgroundLogger:
+    """
+    Sends nested child runs from one background thread so MLflow file-store I/O
+    stays off the caller's path. Each child run is one create_run + one log_batch
+    + set_terminated. close() (also registered atexit) drains the queue.
+    """
+
+    def __init__(self, parent_run_id: str, experiment_id: str, max_queue: int = 10_000) -> None:
+        self._client = MlflowClient()
+        self._parent = parent_run_id
+        self._experiment = experiment_id
+        self._q: "queue.Queue[Optional[Tuple[str, Dict, Dict]]]" = queue.Queue(max_queue)
+        self._thread = threading.Thread(target=self._loop, name="mlflow-logger", daemon=True)
+        self._closed = False
+        self.errors = 0
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log_child_run(self, name: str, params: Dict[str, Any], metrics: Dict[str, float]) -> None:
+        self._q.put((name, params, metrics))
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._q.put(None)
+        self._thread.join()
+
+    def __enter__(self) -> "BackgroundLogger":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _loop(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            try:
+                self._send(*item)
+            except Exception as exc:  # never let logging kill the eval
+                self.errors += 1
+                print(f"[mlflow] dropped child run {item[0]!r}: {exc}")
+
+    def _send(self, name: str, params: Dict[str, Any], metrics: Dict[str, float]) -> None:
+        ts = int(time.time() * 1000)
+        run = self._client.create_run(
+            self._experiment,
+            tags={MLFLOW_PARENT_RUN_ID: self._parent, MLFLOW_RUN_NAME: name},
+        )
+        run_id = run.info.run_id
+        self._client.log_batch(
+            run_id,
+            metrics=[Metric(k, float(v), ts, 0) for k, v in metrics.items()],
+            params=[Param(k, str(v)[:500]) for k, v in params.items()],
+        )
+        self._client.set_terminated(run_id)
@@ -1,30 +1,38 @@
 from __future__ import annotations
 from typing import List, Dict, Any, Tuple
-import re
+import time
+from pathlib import Path
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
 from .retriever import retrieve
-from .config import DEFAULT_EMBED_MODEL
-from .eval import estimate_tokens, score_relevance, score_support
+from .config import LEXICAL_CANDIDATES
+from .embeddings import get_model
+from .eval import estimate_tokens, evaluate_answer, split_sentences
+from .eval_queue import get_eval_queue
+from .lexical import load_stats, select_candidates
+from .tenants import tenant_dir
 
-_SENT_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
 
-
-def _split_sentences(text: str) -> List[str]:
-    sents = [s.strip() for s in _SENT_SPLIT.split(text) if s and len(s.strip()) > 2]
-    return [s for s in sents if len(s) >= 20]
-
-
-def _extractive_answer(question: str, contexts: List[str], top_sentences: int = 6) -> str:
-    model = SentenceTransformer(DEFAULT_EMBED_MODEL)
+def _extractive_answer(
+    question: str,
+    contexts: List[str],
+    top_sentences: int = 6,
+    max_candidates: int | None = None,
+    lexical_stats: Dict[str, Any] | None = None,
+) -> str:
+    model = get_model()
     indexed: List[Tuple[int, int, str]] = []
     for ci, ctx in enumerate(contexts):
-        for si, s in enumerate(_split_sentences(ctx)):
+        for si, s in enumerate(split_sentences(ctx)):
             indexed.append((ci, si, s))
     if not indexed:
         return "I couldn't find enough grounded context to answer."
 
+    # bound the encoding work: only BM25-preselected sentences get embedded
+    cap = LEXICAL_CANDIDATES if max_candidates is None else max_candidates
+    keep = select_candidates(question, [s for (_, _, s) in indexed], cap, lexical_stats)
+    indexed = [indexed[i] for i in keep]
+
     q_vec = model.encode([question], normalize_embeddings=True)[0]
     s_vecs = model.encode([s for (_, _, s) in indexed], normalize_embeddings=True)
     scores = [float(q_vec @ s_vec) for s_vec in s_vecs]
@@ -44,9 +52,20 @@ def _extractive_answer(question: str, contexts: List[str], top_sentences: int =
 
 
 def answer(
-    question: str, k: int = 5, mode: str = "extractive", with_eval: bool = False
+    question: str,
+    k: int = 5,
+    mode: str = "extractive",
+    with_eval: bool = False,
+    defer_eval: bool = False,
+    persist_dir: str | Path | None = None,
+    embed_model: str | None = None,
+    filters: Dict[str, Any] | None = None,
+    tenant: str | None = None,
 ) -> Dict[str, Any]:
-    hits = retrieve(question, k=k)
+    t0 = time.perf_counter()
+    store = Path(persist_dir) if persist_dir else tenant_dir(tenant)
+    hits = retrieve(question, k=k, persist_dir=store, embed_model=embed_model, filters=filters)
+    t_retrieve = time.perf_counter()
     if not hits:
         return {
             "answer": "Index is empty or nothing relevant was found. Try adding docs and re-indexing.",
@@ -56,9 +75,12 @@ def answer(
         }
 
     contexts = [doc for (doc, _meta) in hits]
-    ans = (
-        _extractive_answer(question, contexts) if mode == "extractive" else "Mode not implemented."
-    )
+    if mode == "extractive":
+        stats = load_stats(store)
+        ans = _extractive_answer(question, contexts, lexical_stats=stats)
+    else:
+        ans = "Mode not implemented."
+    t_extract = time.perf_counter()
 
     sources = []
     for _doc, meta in hits:
@@ -80,16 +102,20 @@ def answer(
         "context_chars": sum(len(c) for c in contexts),
         "answer_tokens_est": estimate_tokens(ans),
         "question_tokens_est": estimate_tokens(question),
+        "timings_ms": {
+            "retrieve": round((t_retrieve - t0) * 1000, 2),
+            "extract": round((t_extract - t_retrieve) * 1000, 2),
+        },
     }
 
-    if with_eval:
-        rel = score_relevance(question, contexts)  # {"q_ctx_cosine": ...}
-        sup = score_support(ans, contexts, threshold=0.6)  # {"support_rate": ...}
-        payload["eval"] = {**rel, **sup}
-        # simple flags
-        payload["flags"] = {
-            "low_support": sup["support_rate"] < 0.5,
-            "low_relevance": rel["q_ctx_cosine"] < 0.4,
-        }
+    if with_eval and defer_eval:
+        # score off the request path; result is fetched later via GET /eval/{id}
+        eval_id = get_eval_queue().submit(question, ans, contexts)
+        payload["eval_id"] = eval_id
+        payload["eval_status"] = "pending" if eval_id else "queue_full"
+    elif with_eval:
+        t_eval = time.perf_counter()
+        payload.update(evaluate_answer(question, ans, contexts))
+        payload["timings_ms"]["eval"] = round((time.perf_counter() - t_eval) * 1000, 2)
 
     return payload
@@ -1,33 +1,94 @@
 from __future__ import annotations
-from typing import List, Tuple, Dict, Any
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Tuple, Dict, Any, Iterator
 
-import chromadb
-from sentence_transformers import SentenceTransformer
+from .config import (
+    VSTORE_DIR,
+    HNSW_SPACE,
+    HNSW_M,
+    HNSW_CONSTRUCTION_EF,
+    HNSW_SEARCH_EF,
+)
+from .embeddings import get_model
+from .metadata_index import (
+    has_filters,
+    load_manifest,
+    manifest_from_collection,
+    match_sources,
+    where_for_sources,
+)
+from .tenants import get_collection_cache, tenant_dir
 
-from .config import VSTORE_DIR, COLLECTION_NAME, DEFAULT_EMBED_MODEL
 
+def hnsw_configuration(
+    space: str | None = None,
+    m: int | None = None,
+    construction_ef: int | None = None,
+    search_ef: int | None = None,
+) -> Dict[str, Any]:
+    """Chroma collection configuration; unset values fall back to config.py."""
+    return {
+        "hnsw": {
+            "space": space or HNSW_SPACE,
+            "max_neighbors": m or HNSW_M,
+            "ef_construction": construction_ef or HNSW_CONSTRUCTION_EF,
+            "ef_search": search_ef or HNSW_SEARCH_EF,
+        }
+    }
 
-def get_collection():
-    client = chromadb.PersistentClient(path=str(VSTORE_DIR))
-    return client.get_or_create_collection(COLLECTION_NAME)
 
+@contextmanager
+def get_collection(persist_dir: str | Path | None = None) -> Iterator[Any]:
+    """The store's collection, leased from the shared cache so its client gets closed."""
+    # the configuration only applies on creation; an existing collection keeps its own
+    with get_collection_cache().lease(Path(persist_dir or VSTORE_DIR), create=True) as col:
+        yield col
 
-def retrieve(query: str, k: int = 5) -> List[Tuple[str, Dict[str, Any]]]:
+
+def retrieve(
+    query: str,
+    k: int = 5,
+    persist_dir: str | Path | None = None,
+    embed_model: str | None = None,
+    filters: Dict[str, Any] | None = None,
+    tenant: str | None = None,
+) -> List[Tuple[str, Dict[str, Any]]]:
     """
     Embed the query locally and search by vector. Returns [(doc_text, meta), ...]
     meta contains: source, chunk_index, id, distance, tokens_est (if present), etc.
+    filters (source glob/prefix, file_types, indexed_after/before) are resolved
+    against the store's source manifest first, so only matching chunks are searched.
+    The store is `persist_dir`, else the tenant's store (default: VSTORE_DIR).
     """
-    col = get_collection()
+    store = Path(persist_dir) if persist_dir else tenant_dir(tenant)
+    with get_collection_cache().lease(store, create=True) as col:
+        return _search(col, store, query, k, embed_model, filters)
+
+
+def _search(col, store: Path, query, k, embed_model, filters) -> List[Tuple[str, Dict[str, Any]]]:
     if col.count() == 0:
         return []
 
-    model = SentenceTransformer(DEFAULT_EMBED_MODEL)
+    where = None
+    n_results = k
+    if has_filters(filters):
+        manifest = load_manifest(store) or manifest_from_collection(col)
+        matched = match_sources(manifest, filters)
+        if not matched:
+            return []
+        where = where_for_sources(sorted(matched))
+        n_results = min(k, sum(int(e.get("chunks", 0)) for e in matched.values()) or k)
+
+    # the query must be embedded with the model the collection was built with
+    model = get_model(embed_model) if embed_model else get_model()
     q_emb = model.encode([query], normalize_embeddings=True).tolist()
 
     res = col.query(
         query_embeddings=q_emb,
-        n_results=k,
-        include=["documents", "metadatas", "distances", "ids"],
+        n_results=n_results,
+        where=where,
+        include=["documents", "metadatas", "distances"],
     )
     docs = res.get("documents", [[]])[0]
     metas = res.get("metadatas", [[]])[0]
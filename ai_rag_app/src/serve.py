@@ -0,0 +1,197 @@
+from __future__ import annotations
+import argparse
+import gc
+import os
+import signal
+import socket
+import time
+from typing import Dict, Optional, Tuple
+
+import uvicorn
+
+from .config import DEFAULT_EMBED_MODEL, EMBED_BACKEND
+from .embeddings import get_model
+from .memstats import process_memory
+
+# a worker that dies sooner than this after spawning counts as a crash loop
+MIN_UPTIME_S = 10.0
+MAX_RESTARTS = 5  # consecutive quick crashes of one worker slot before the server gives up
+MAX_BACKOFF_S = 30.0
+
+# ---------- memory reporting ----------
+
+
+def _report(workers: Dict[int, int]) -> None:
+    for idx, pid in sorted(workers.items()):
+        m = process_memory(pid)
+        print(
+            f"[serve] worker={idx} pid={pid} rss_mb={m['rss_mb']} "
+            f"shared_mb={m['shared_mb']} pss_mb={m['pss_mb']}",
+            flush=True,
+        )
+
+
+# ---------- pre-fork ----------
+
+
+def _preload():
+    from .service import app
+
+    # weights are loaded once here and shared copy-on-write by every worker; same
+    # get_model() call (default model, EMBED_BACKEND) as the request path, so it hits
+    # the same cache entry. no encode() warm-up: that would start torch's thread pool,
+    # which is not fork-safe.
+    get_model().eval()
+    # move everything allocated so far out of the GC's generations so collections in
+    # the workers don't touch (and un-share) those pages
+    gc.freeze()
+    return app
+
+
+def _run_worker(config: uvicorn.Config, sock: socket.socket, threads: int) -> None:
+    import torch
+
+    torch.set_num_threads(threads)
+    # chroma's sqlite handle must not cross the fork; each worker opens its own
+    # and the OS page cache shares the index files between them
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def worker_plan(
+    workers: Optional[int], threads_per_worker: Optional[int], cpus: Optional[int] = None
+) -> Tuple[int, int]:
+    """(workers, torch threads per worker); by default the CPUs are split evenly."""
+    cpus = cpus or os.cpu_count() or 1
+    n_workers = max(1, workers or cpus)
+    return n_workers, max(1, threads_per_worker or cpus // n_workers)
+
+
+def respawn_delay(crashes: int) -> float:
+    """Exponential backoff before restarting a worker after `crashes` quick deaths."""
+    return 0.0 if crashes <= 0 else min(MAX_BACKOFF_S, 0.5 * 2 ** (crashes - 1))
+
+
+def _spawn(config: uvicorn.Config, sock: socket.socket, threads: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        try:
+            _run_worker(config, sock, threads)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    workers: Optional[int] = None,
+    threads_per_worker: Optional[int] = None,
+    report_every: float = 60.0,
+) -> None:
+    """Load the model once, fork `workers` uvicorn servers on a shared socket, supervise."""
+    n_workers, threads = worker_plan(workers, threads_per_worker)
+
+    t0 = time.perf_counter()
+    app = _preload()
+    print(
+        f"[serve] preloaded {DEFAULT_EMBED_MODEL} ({EMBED_BACKEND}) "
+        f"in {time.perf_counter() - t0:.2f}s",
+        flush=True,
+    )
+
+    config = uvicorn.Config(app, host=host, port=port, workers=1)
+    sock = config.bind_socket()
+
+    stopping = False
+
+    def _stop(signum, _frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children.values()):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    children: Dict[int, int] = {}
+    started: Dict[int, float] = {}  # slot -> monotonic spawn time
+    crashes: Dict[int, int] = {}  # slot -> consecutive deaths within MIN_UPTIME_S
+    pending: Dict[int, float] = {}  # slot -> monotonic time it may be respawned
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+    for i in range(n_workers):
+        children[i] = _spawn(config, sock, threads)
+        started[i] = time.monotonic()
+    print(
+        f"[serve] http://{host}:{port} workers={n_workers} threads_per_worker={threads}",
+        flush=True,
+    )
+
+    next_report = time.monotonic() + report_every
+    gave_up = False
+    while children or (pending and not stopping):
+        now = time.monotonic()
+        for idx in [i for i, at in pending.items() if now >= at and not stopping]:
+            del pending[idx]
+            children[idx] = _spawn(config, sock, threads)
+            started[idx] = now
+        try:
+            pid, _status = os.waitpid(-1, os.WNOHANG) if children else (0, 0)
+        except ChildProcessError:
+            break
+        if pid:
+            idx = next((i for i, p in children.items() if p == pid), None)
+            if idx is None:  # not one of our workers
+                continue
+            del children[idx]
+            if stopping:
+                continue
+            quick = time.monotonic() - started[idx] < MIN_UPTIME_S
+            crashes[idx] = crashes.get(idx, 0) + 1 if quick else 0
+            if crashes[idx] > MAX_RESTARTS:
+                print(
+                    f"[serve] worker={idx} pid={pid} crashed {crashes[idx]} times in a row, "
+                    "shutting down",
+                    flush=True,
+                )
+                gave_up = True
+                _stop(signal.SIGTERM, None)
+                continue
+            delay = respawn_delay(crashes[idx])
+            print(f"[serve] worker={idx} pid={pid} exited, respawning in {delay:.1f}s", flush=True)
+            pending[idx] = time.monotonic() + delay
+            continue
+        if report_every > 0 and time.monotonic() >= next_report and not stopping:
+            _report(children)
+            next_report = time.monotonic() + report_every
+        time.sleep(0.2)
+
+    sock.close()
+    print("[serve] stopped", flush=True)
+    if gave_up:
+        raise SystemExit(1)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Pre-fork multi-worker server for the RAG API.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--workers", type=int, default=None, help="default: CPU count")
+    ap.add_argument(
+        "--threads-per-worker", type=int, default=None, help="torch intra-op threads per worker"
+    )
+    ap.add_argument("--report-every", type=float, default=60.0, help="seconds; 0 disables")
+    args = ap.parse_args()
+    serve(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        report_every=args.report_every,
+    )
+
+
+if __name__ == "__main__":
+    main()
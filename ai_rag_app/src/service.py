@@ -1,14 +1,25 @@
 from __future__ import annotations
 
-from functools import lru_cache
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field, field_validator
-import chromadb
 
 from .config import VSTORE_DIR, COLLECTION_NAME
 from .rag_chain import answer as rag_answer
-from .retriever import get_collection
+from .tenants import (
+    DEFAULT_TENANT,
+    UnknownTenant,
+    get_collection_cache,
+    list_tenants,
+    tenant_dir,
+)
+from .eval_queue import get_eval_queue
+from .memstats import cached_process_memory
 
 MAX_QUESTION_CHARS = 1500
 MAX_K = 10
@@ -23,15 +34,22 @@ app.add_middleware(
 )
 
 
-@lru_cache
-def _client() -> chromadb.PersistentClient:
-    VSTORE_DIR.mkdir(parents=True, exist_ok=True)
-    return chromadb.PersistentClient(path=str(VSTORE_DIR))
+def _tenant_store(tenant: Optional[str]) -> Path:
+    try:
+        return tenant_dir(tenant)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
 
 
-@lru_cache
-def _collection():
-    return _client().get_or_create_collection(COLLECTION_NAME)
+@contextmanager
+def _tenant_collection(tenant: Optional[str]):
+    # only the default store is created on demand; other tenants must be indexed first
+    store = _tenant_store(tenant)
+    try:
+        with get_collection_cache().lease(store, create=store == VSTORE_DIR) as col:
+            yield col
+    except UnknownTenant:
+        raise HTTPException(status_code=404, detail=f"Unknown tenant {tenant!r}.")
 
 
 @app.get("/health")
@@ -40,12 +58,27 @@ def health() -> dict:
 
 
 @app.get("/stats")
-def stats() -> dict:
-    try:
-        count = _collection().count()
-    except Exception:
-        count = 0
-    return {"collection": COLLECTION_NAME, "documents": count, "path": str(VSTORE_DIR)}
+def stats(tenant: Optional[str] = None) -> dict:
+    with _tenant_collection(tenant) as col:
+        try:
+            count = col.count()
+        except Exception:
+            count = 0
+    cache = get_collection_cache().stats()
+    cache.pop("stores")
+    return {
+        "tenant": tenant or DEFAULT_TENANT,
+        "collection": COLLECTION_NAME,
+        "documents": count,
+        "path": str(_tenant_store(tenant)),
+        "cache": cache,
+        "worker": {"pid": os.getpid(), **cached_process_memory(os.getpid())},
+    }
+
+
+@app.get("/tenants")
+def tenants() -> dict:
+    return {"tenants": list_tenants(), "cache": get_collection_cache().stats()}
 
 
 class AskRequest(BaseModel):
@@ -53,6 +86,13 @@ class AskRequest(BaseModel):
     k: int = 5
     mode: str = "extractive"
     eval: bool = False
+    eval_async: bool = False  # with eval: return an eval_id now, score in the background
+    # scope retrieval to a subset of the store (resolved before the vector search)
+    source: Optional[str] = None  # glob ("*/product_a/*.md") or path prefix
+    file_types: Optional[List[str]] = None  # e.g. ["md", "pdf"]
+    indexed_after: Optional[datetime] = None
+    indexed_before: Optional[datetime] = None
+    tenant: Optional[str] = None  # which tenant's store to answer from (default: the main one)
 
     @field_validator("question")
     @classmethod
@@ -70,9 +110,32 @@ class AskRequest(BaseModel):
 
 @app.post("/ask")
 def ask(req: AskRequest) -> dict:
-    if get_collection().count() == 0:
-        raise HTTPException(
-            status_code=503, detail="Vector store is empty. Add docs and run the indexer."
-        )
-    result = rag_answer(req.question, k=req.k, mode=req.mode, with_eval=req.eval)
+    with _tenant_collection(req.tenant) as col:
+        if col.count() == 0:
+            raise HTTPException(
+                status_code=503, detail="Vector store is empty. Add docs and run the indexer."
+            )
+    filters = {
+        "source": req.source,
+        "file_types": req.file_types,
+        "indexed_after": req.indexed_after,
+        "indexed_before": req.indexed_before,
+    }
+    result = rag_answer(
+        req.question,
+        k=req.k,
+        mode=req.mode,
+        with_eval=req.eval,
+        defer_eval=req.eval_async,
+        filters=filters,
+        tenant=req.tenant,
+    )
     return result
+
+
+@app.get("/eval/{eval_id}")
+def eval_result(eval_id: str) -> dict:
+    rec = get_eval_queue().get(eval_id)
+    if rec is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired eval_id.")
+    return rec
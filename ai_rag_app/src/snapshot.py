@@ -0,0 +1,230 @@
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import mmap
+import struct
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import chromadb
+import numpy as np
+import pyarrow as pa
+
+from .config import COLLECTION_NAME, VSTORE_DIR
+from .lexical import STATS_NAME, update_stats
+from .metadata_index import MANIFEST_NAME, update_manifest
+
+# file layout: MAGIC | u64 header length | JSON header | Arrow IPC stream | float32 matrix
+# the header records offset, length and sha256 of both sections
+MAGIC = b"RAGSNAP1"
+_U64 = struct.Struct("<Q")
+_SIDECARS = (MANIFEST_NAME, STATS_NAME)
+_ALIGN = 64
+
+
+def _aligned(n: int) -> int:
+    return -(-n // _ALIGN) * _ALIGN
+
+
+def _sha256(buf) -> str:
+    return hashlib.sha256(buf).hexdigest()
+
+
+# ---------- export ----------
+
+
+def _read_collection(col, page: int) -> Tuple[List[str], List[str], List[Dict], np.ndarray]:
+    ids, docs, metas, vecs = [], [], [], []
+    for offset in range(0, col.count(), page):
+        res = col.get(include=["documents", "metadatas", "embeddings"], limit=page, offset=offset)
+        ids.extend(res["ids"])
+        docs.extend(res["documents"])
+        metas.extend(m or {} for m in res["metadatas"])
+        vecs.append(np.asarray(res["embeddings"], dtype=np.float32))
+    matrix = np.vstack(vecs) if vecs else np.zeros((0, 0), dtype=np.float32)
+    return ids, docs, metas, matrix
+
+
+def export_snapshot(out: Path, persist_dir: Path = VSTORE_DIR, page: int = 5000) -> Dict[str, Any]:
+    """Write ids, documents, metadata and embeddings of the collection to one file."""
+    with chromadb.PersistentClient(path=str(persist_dir)) as client:
+        col = client.get_collection(COLLECTION_NAME)
+        ids, docs, metas, matrix = _read_collection(col, page)
+        hnsw = dict((col.configuration or {}).get("hnsw") or {})
+
+    table = pa.table(
+        {
+            "id": pa.array(ids, pa.string()),
+            "document": pa.array(docs, pa.large_string()),
+            "metadata": pa.array([json.dumps(m, sort_keys=True) for m in metas], pa.string()),
+        }
+    )
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression="zstd")
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    arrow_buf = sink.getvalue()
+    vec_bytes = np.ascontiguousarray(matrix, dtype="<f4").tobytes()
+
+    sidecars = {}
+    for name in _SIDECARS:
+        path = Path(persist_dir) / name
+        if path.exists():
+            sidecars[name] = json.loads(path.read_text(encoding="utf-8"))
+
+    header: Dict[str, Any] = {
+        "collection": COLLECTION_NAME,
+        "created_at": int(time.time()),
+        "count": len(ids),
+        "dim": int(matrix.shape[1]) if matrix.size else 0,
+        "dtype": "float32",
+        "embed_model": metas[0].get("embed_model") if metas else None,
+        "hnsw": {
+            k: hnsw[k]
+            for k in ("space", "max_neighbors", "ef_construction", "ef_search")
+            if k in hnsw
+        },
+        "sidecars": sidecars,
+        "arrow": {"length": arrow_buf.size, "sha256": _sha256(arrow_buf)},
+        "vectors": {"length": len(vec_bytes), "sha256": _sha256(vec_bytes)},
+    }
+    # section offsets are relative to the payload, which starts 64-byte aligned after the header
+    arrow_off = 0
+    vec_off = _aligned(arrow_buf.size)
+    header["arrow"]["offset"], header["vectors"]["offset"] = arrow_off, vec_off
+    raw_header = json.dumps(header).encode("utf-8")
+    payload = _aligned(len(MAGIC) + _U64.size + len(raw_header))
+
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with out.open("wb") as f:
+        f.write(MAGIC + _U64.pack(len(raw_header)) + raw_header)
+        f.write(b"\0" * (payload + arrow_off - f.tell()))
+        f.write(arrow_buf)
+        f.write(b"\0" * (payload + vec_off - f.tell()))
+        f.write(vec_bytes)
+    print(
+        f"[snapshot] exported {len(ids)} chunks dim={header['dim']} -> {out} "
+        f"({out.stat().st_size / 1e6:.1f} MB)"
+    )
+    return header
+
+
+# ---------- read ----------
+
+
+def _read_header(path: Path) -> Tuple[Dict[str, Any], int]:
+    with Path(path).open("rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an index snapshot")
+        (n,) = _U64.unpack(f.read(_U64.size))
+        return json.loads(f.read(n)), _aligned(len(MAGIC) + _U64.size + n)
+
+
+def read_header(path: Path) -> Dict[str, Any]:
+    return _read_header(path)[0]
+
+
+def load_snapshot(path: Path, verify: bool = True) -> Tuple[Dict[str, Any], pa.Table, np.ndarray]:
+    """
+    Memory-map a snapshot: (header, Arrow table of id/document/metadata, (count, dim) float32).
+    The matrix is a read-only view on the file; verify=False skips the checksums.
+    """
+    header, payload = _read_header(path)
+    with Path(path).open("rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    a, v = header["arrow"], header["vectors"]
+    a_off, v_off = payload + a["offset"], payload + v["offset"]
+    arrow_view = memoryview(mm)[a_off : a_off + a["length"]]
+    vec_view = memoryview(mm)[v_off : v_off + v["length"]]
+    if verify:
+        for name, view, meta in (("arrow", arrow_view, a), ("vectors", vec_view, v)):
+            if _sha256(view) != meta["sha256"]:
+                raise ValueError(f"{path}: {name} section checksum mismatch")
+    table = pa.ipc.open_stream(pa.py_buffer(arrow_view)).read_all()
+    matrix = np.frombuffer(vec_view, dtype="<f4").reshape(header["count"], header["dim"])
+    return header, table, matrix
+
+
+# ---------- import ----------
+
+
+def import_snapshot(
+    path: Path,
+    persist_dir: Path = VSTORE_DIR,
+    replace: bool = False,
+    batch_size: int | None = None,
+) -> int:
+    """Bulk-load a snapshot into the store; replace drops the existing collection first."""
+    t0 = time.perf_counter()
+    header, table, matrix = load_snapshot(path)
+    persist_dir = Path(persist_dir)
+    persist_dir.mkdir(parents=True, exist_ok=True)
+    with chromadb.PersistentClient(path=str(persist_dir)) as client:
+        if replace and COLLECTION_NAME in [c.name for c in client.list_collections()]:
+            client.delete_collection(COLLECTION_NAME)
+        col = client.get_or_create_collection(
+            COLLECTION_NAME, configuration={"hnsw": header["hnsw"]} if header["hnsw"] else None
+        )
+
+        ids = table.column("id").to_pylist()
+        docs = table.column("document").to_pylist()
+        metas = [json.loads(m) for m in table.column("metadata").to_pylist()]
+        batch = batch_size or client.get_max_batch_size()
+        for i in range(0, len(ids), batch):
+            col.upsert(
+                ids=ids[i : i + batch],
+                documents=docs[i : i + batch],
+                embeddings=matrix[i : i + batch],
+                metadatas=metas[i : i + batch],
+            )
+
+    # sidecars are keyed by source: a replaced store takes the snapshot's, otherwise merge
+    sidecars = header.get("sidecars", {})
+    if replace:
+        for name in _SIDECARS:
+            (persist_dir / name).unlink(missing_ok=True)
+    if MANIFEST_NAME in sidecars:
+        update_manifest(persist_dir, sidecars[MANIFEST_NAME])
+    if STATS_NAME in sidecars:
+        update_stats(persist_dir, sidecars[STATS_NAME])
+
+    print(
+        f"[snapshot] imported {len(ids)} chunks into {persist_dir} "
+        f"in {time.perf_counter() - t0:.2f}s"
+    )
+    return len(ids)
+
+
+# ---------- cli ----------
+
+
+def main(argv: List[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Export / import the vector index as one snapshot.")
+    ap.add_argument("--persist-dir", type=Path, default=VSTORE_DIR)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    e = sub.add_parser("export", help="write the collection to a snapshot file")
+    e.add_argument("out", type=Path)
+    i = sub.add_parser("import", help="bulk-load a snapshot file into the store")
+    i.add_argument("snapshot", type=Path)
+    i.add_argument("--replace", action="store_true", help="drop the existing collection first")
+    i.add_argument("--batch-size", type=int, default=None)
+    v = sub.add_parser("verify", help="check a snapshot's checksums and print its header")
+    v.add_argument("snapshot", type=Path)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "export":
+        export_snapshot(args.out, args.persist_dir)
+    elif args.cmd == "import":
+        import_snapshot(args.snapshot, args.persist_dir, args.replace, args.batch_size)
+    else:
+        header, _table, _matrix = load_snapshot(args.snapshot)
+        header.pop("sidecars", None)
+        print(json.dumps(header, indent=2))
+        print("[snapshot] checksums ok")
+
+
+if __name__ == "__main__":
+    main()
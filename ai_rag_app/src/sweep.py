@@ -2,16 +2,31 @@ from __future__ import annotations
 from pathlib import Path
 from itertools import product
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Tuple
+import argparse
 import csv
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import time
 import mlflow
+from filelock import FileLock
 
 from ai_rag_app.src.config import DOCS_DIR, VSTORE_DIR
+from ai_rag_app.src.history import append_rows, config_key
 from ai_rag_app.src.index_docs import build_index_with_params
 from ai_rag_app.src.rag_chain import answer
 from ai_rag_app.src.mlflow_utils import init_mlflow, log_eval_params, log_eval_metrics
 
 REPORTS_DIR = Path(__file__).resolve().parents[1] / "reports"
 REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+# one persist dir per (model, chunk_size, overlap); reused across k and across runs
+SWEEP_STORE_DIR = VSTORE_DIR.parent / "sweep"
 
 SPACE = {
     "embed_model": [
@@ -28,6 +43,9 @@ QUESTIONS = [
     "How does retrieval augmented generation work?",
 ]
 
+IndexCfg = Tuple[str, int, int]  # (embed_model, chunk_size, chunk_overlap)
+_PER_Q_EXTRA = ("question", "total_ms")  # per-question fields that aren't MLflow metrics
+
 
 def score_row(support_rate, q_ctx_cosine):
     # composite score (support more important)
@@ -36,91 +54,400 @@ def score_row(support_rate, q_ctx_cosine):
     return 0.7 * sr + 0.3 * max(0.0, min(1.0, qc))
 
 
-def main() -> None:
+# ---------- index reuse ----------
+
+
+def _docs_fingerprint(docs_dir: Path) -> str:
+    # content hash, not mtimes, so a git checkout doesn't invalidate every index
+    h = hashlib.sha256()
+    for path in sorted(p for p in docs_dir.rglob("*") if p.is_file()):
+        h.update(str(path.relative_to(docs_dir)).encode())
+        h.update(hashlib.sha256(path.read_bytes()).digest())
+    return h.hexdigest()
+
+
+def index_dir_for(cfg: IndexCfg, store_root: Path = SWEEP_STORE_DIR) -> Path:
+    embed_model, chunk_size, chunk_overlap = cfg
+    return store_root / f"{embed_model.split('/')[-1]}_cs{chunk_size}_co{chunk_overlap}"
+
+
+def ensure_index(
+    cfg: IndexCfg, docs_dir: Path, store_root: Path = SWEEP_STORE_DIR, rebuild: bool = False
+) -> Tuple[Path, float, bool]:
+    """Build `cfg`'s index unless an up-to-date one exists. Returns (dir, index_s, reused)."""
+    embed_model, chunk_size, chunk_overlap = cfg
+    persist_dir = index_dir_for(cfg, store_root)
+    persist_dir.parent.mkdir(parents=True, exist_ok=True)
+    fingerprint = _docs_fingerprint(docs_dir)
+    marker = persist_dir / ".sweep_index.json"
+
+    with FileLock(str(persist_dir.parent / f".{persist_dir.name}.lock")):
+        if not rebuild and marker.exists():
+            if json.loads(marker.read_text()).get("docs_sha256") == fingerprint:
+                return persist_dir, 0.0, True
+        # stale or missing: start clean so removed docs don't leave chunks behind
+        shutil.rmtree(persist_dir, ignore_errors=True)
+        t0 = time.perf_counter()
+        build_index_with_params(
+            docs_dir,
+            persist_dir,
+            embed_model=embed_model,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
+        index_s = time.perf_counter() - t0
+        marker.write_text(json.dumps({"docs_sha256": fingerprint, "index_s": index_s}))
+    return persist_dir, index_s, False
+
+
+# ---------- evaluation ----------
+
+
+def _aggregate(per_q: List[Dict[str, Any]]) -> Dict[str, float]:
+    n = max(1, len(per_q))
+    return {
+        "retrieved": sum(m["retrieved"] for m in per_q) / n,
+        "context_chars": sum(m["context_chars"] for m in per_q) / n,
+        "support_rate": sum(m["support_rate"] or 0.0 for m in per_q) / n,
+        "q_ctx_cosine": sum(m["q_ctx_cosine"] or 0.0 for m in per_q) / n,
+    }
+
+
+def eval_config(
+    persist_dir: Path, embed_model: str, k: int, questions: List[str]
+) -> Dict[str, Any]:
+    """Average eval metrics over `questions` for one (index, k)."""
+    t0 = time.perf_counter()
+    per_q = []
+    for q in questions:
+        tq = time.perf_counter()
+        res = answer(
+            q,
+            k=k,
+            mode="extractive",
+            with_eval=True,
+            persist_dir=persist_dir,
+            embed_model=embed_model,
+        )
+        per_q.append(
+            {
+                "question": q,
+                "total_ms": (time.perf_counter() - tq) * 1000,
+                "retrieved": res.get("retrieved", 0),
+                "context_chars": res.get("context_chars", 0),
+                "support_rate": (res.get("eval") or {}).get("support_rate"),
+                "q_ctx_cosine": (res.get("eval") or {}).get("q_ctx_cosine"),
+                "answer_tokens_est": res.get("answer_tokens_est", 0),
+                "question_tokens_est": res.get("question_tokens_est", 0),
+            }
+        )
+    return {"agg": _aggregate(per_q), "per_q": per_q, "eval_s": time.perf_counter() - t0}
+
+
+def _init_worker(threads: int) -> None:
+    import torch
+
+    torch.set_num_threads(threads)
+
+
+def run_index_config(
+    cfg: IndexCfg,
+    ks: List[int],
+    questions: List[str],
+    docs_dir: Path = DOCS_DIR,
+    store_root: Path = SWEEP_STORE_DIR,
+    rebuild: bool = False,
+) -> List[Dict[str, Any]]:
+    """Pool task: build (or reuse) one index, then evaluate every k against it."""
+    persist_dir, index_s, reused = ensure_index(cfg, docs_dir, store_root, rebuild)
+    out = []
+    for k in ks:
+        res = eval_config(persist_dir, cfg[0], k, questions)
+        out.append(
+            {
+                "cfg": cfg,
+                "k": k,
+                "persist_dir": str(persist_dir),
+                "index_s": index_s,
+                "index_reused": reused,
+                **res,
+            }
+        )
+    return out
+
+
+# ---------- reporting ----------
+
+
+def _log_result(r: Dict[str, Any]) -> Dict[str, Any]:
+    """One nested MLflow run per (config, k); returns the CSV row."""
+    embed_model, chunk_size, chunk_overlap = r["cfg"]
+    k, agg = r["k"], r["agg"]
+    cfg_name = config_key(embed_model, chunk_size, chunk_overlap, k)
+    comp = score_row(agg["support_rate"], agg["q_ctx_cosine"])
+    with mlflow.start_run(run_name=cfg_name, nested=True):
+        log_eval_params(
+            embed_model=embed_model,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            k=k,
+            docs_dir=str(DOCS_DIR),
+            vstore_dir=r["persist_dir"],
+        )
+        for m in r["per_q"]:
+            log_eval_metrics(**{k2: v for k2, v in m.items() if k2 not in _PER_Q_EXTRA})
+        mlflow.log_metric("avg_support_rate", agg["support_rate"])
+        mlflow.log_metric("avg_q_ctx_cosine", agg["q_ctx_cosine"])
+        mlflow.log_metric("composite_score", comp)
+        mlflow.log_metric("index_s", r["index_s"])
+        mlflow.log_metric("eval_s", r["eval_s"])
+
+    row = {
+        "embed_model": embed_model,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "k": k,
+        "avg_support_rate": round(agg["support_rate"], 3),
+        "avg_q_ctx_cosine": round(agg["q_ctx_cosine"], 3),
+        "composite_score": round(comp, 3),
+        "index_s": round(r["index_s"], 3),
+        "index_reused": r["index_reused"],
+        "eval_s": round(r["eval_s"], 3),
+    }
+    if "rung" in r:
+        row.update(
+            {"rung": r["rung"], "n_questions": len(r["per_q"]), "docs_fraction": r["docs_fraction"]}
+        )
+    return row
+
+
+def _history_rows(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    rows = []
+    for r in results:
+        embed_model, chunk_size, chunk_overlap = r["cfg"]
+        for m in r["per_q"]:
+            rows.append(
+                {
+                    **m,
+                    "config_key": config_key(embed_model, chunk_size, chunk_overlap, r["k"]),
+                    "embed_model": embed_model,
+                    "chunk_size": chunk_size,
+                    "chunk_overlap": chunk_overlap,
+                    "k": r["k"],
+                }
+            )
+    return rows
+
+
+def write_report(rows: List[Dict[str, Any]], sweep_id: str) -> Path:
+    out = REPORTS_DIR / f"sweep_{sweep_id}.csv"
+    with out.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        # survivors of later halving rungs rank ahead of configs dropped earlier
+        writer.writerows(
+            sorted(rows, key=lambda r: (r.get("rung", 0), r["composite_score"]), reverse=True)
+        )
+    return out
+
+
+def _run_tasks(
+    tasks: List[Tuple[IndexCfg, List[int], List[str]]],
+    workers: int = 1,
+    rebuild: bool = False,
+    docs_dir: Path = DOCS_DIR,
+    store_root: Path = SWEEP_STORE_DIR,
+) -> List[Dict[str, Any]]:
+    """Run (index cfg, ks, questions) tasks serially or in a process pool."""
+    results: List[Dict[str, Any]] = []
+    opts = {"docs_dir": docs_dir, "store_root": store_root, "rebuild": rebuild}
+    if workers <= 1:
+        for cfg, ks, questions in tasks:
+            results.extend(run_index_config(cfg, ks, questions, **opts))
+        return results
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),  # torch is not fork-safe
+        initializer=_init_worker,
+        initargs=(threads,),
+    ) as pool:
+        futs = [
+            pool.submit(run_index_config, cfg, ks, questions, **opts)
+            for cfg, ks, questions in tasks
+        ]
+        for fut in as_completed(futs):
+            results.extend(fut.result())
+    return results
+
+
+def _index_configs() -> List[IndexCfg]:
+    return list(product(SPACE["embed_model"], SPACE["chunk_size"], SPACE["chunk_overlap"]))
+
+
+def grid(workers: int = 1, rebuild: bool = False) -> List[Dict[str, Any]]:
+    """Exhaustive search: each index config built once, evaluated for every k."""
+    tasks = [(cfg, SPACE["k"], QUESTIONS) for cfg in _index_configs()]
+    return _run_tasks(tasks, workers, rebuild)
+
+
+def question_pool(seed: int = 0) -> List[str]:
+    """QUESTIONS plus data/qa/qa.yml, de-duplicated, in a fixed shuffled order."""
+    from ai_rag_app.src.eval_runner import load_qs
+
+    pool = list(dict.fromkeys(QUESTIONS + load_qs()))
+    random.Random(seed).shuffle(pool)
+    return pool
+
+
+def docs_sample(docs_dir: Path, fraction: float, out_dir: Path, seed: int = 0) -> Path:
+    """Copy a fixed random `fraction` of the docs (at least one) into `out_dir`."""
+    files = sorted(p for p in docs_dir.rglob("*") if p.is_file())
+    keep = random.Random(seed).sample(files, max(1, math.ceil(len(files) * fraction)))
+    shutil.rmtree(out_dir, ignore_errors=True)
+    for src in keep:
+        dst = out_dir / src.relative_to(docs_dir)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(src, dst)
+    return out_dir
+
+
+def successive_halving(
+    budget: int,
+    eta: int = 2,
+    workers: int = 1,
+    rebuild: bool = False,
+    questions: List[str] | None = None,
+    docs_dir: Path = DOCS_DIR,
+    rung0_docs: float = 0.25,
+    store_root: Path = SWEEP_STORE_DIR,
+) -> List[Dict[str, Any]]:
+    """
+    Budgeted search over every (index cfg, k). `budget` (question evaluations) is a
+    hard cap: each rung spends an equal share of what is left on the survivors, each
+    on a larger question prefix than before; only the top 1/eta by score_row go on.
+
+    Rung 0 ranks every config on indexes of a `rung0_docs` sample of the docs, so full
+    indexes are only built for configs that survive it; the first full rung re-scores
+    its survivors from the start of the question prefix.
+    Returns one merged result per config, tagged with the rung it reached.
+    """
+    pool = questions or question_pool()
+    alive: List[Tuple[IndexCfg, int]] = [(c, k) for c in _index_configs() for k in SPACE["k"]]
+    if budget < len(alive):
+        raise ValueError(f"budget {budget} is below the {len(alive)} configs to try")
+    rungs = max(1, math.ceil(math.log(len(alive), eta)) + 1) if len(alive) > 1 else 1
+    sampled = rungs > 1 and rung0_docs < 1
+    if sampled:
+        rung0_dir = docs_sample(docs_dir, rung0_docs, store_root / "rung0_docs")
+    state: Dict[Tuple[IndexCfg, int], Dict[str, Any]] = {}
+    done = 0  # questions every live config has been scored on
+    spent = 0
+
+    for rung in range(rungs):
+        remaining = budget - spent
+        # the first rung on the full docs starts its survivors over at question 0
+        restart = sampled and rung == 1
+        redo = done if restart else 0
+        add = max(1, (remaining // (rungs - rung)) // len(alive) - redo)
+        add = min(add, remaining // len(alive) - redo)
+        new_qs = pool[done : done + add]
+        if add <= 0 or not new_qs:
+            break
+        qs = pool[: done + len(new_qs)] if restart else new_qs
+
+        by_cfg: Dict[IndexCfg, List[int]] = {}
+        for cfg, k in alive:
+            by_cfg.setdefault(cfg, []).append(k)
+        tasks = [(cfg, ks, qs) for cfg, ks in by_cfg.items()]
+        on_sample = sampled and rung == 0
+        where = (
+            {"docs_dir": rung0_dir, "store_root": store_root / "rung0"}
+            if on_sample
+            else {"docs_dir": docs_dir, "store_root": store_root}
+        )
+        for r in _run_tasks(tasks, workers, rebuild, **where):
+            key = (r["cfg"], r["k"])
+            prev = state.get(key)
+            if prev is not None:
+                if not restart:
+                    r["per_q"] = prev["per_q"] + r["per_q"]
+                r["eval_s"] += prev["eval_s"]
+                r["index_s"] += prev["index_s"]
+                r["index_reused"] = prev["index_reused"] and r["index_reused"]
+            r["agg"] = _aggregate(r["per_q"])
+            r["rung"] = rung
+            r["docs_fraction"] = rung0_docs if on_sample else 1.0
+            state[key] = r
+
+        spent += len(qs) * len(alive)
+        done += len(new_qs)
+        print(f"[sweep] rung={rung} configs={len(alive)} questions={done} spent={spent}/{budget}")
+
+        if len(alive) == 1:
+            break
+        alive.sort(
+            key=lambda key: score_row(
+                state[key]["agg"]["support_rate"], state[key]["agg"]["q_ctx_cosine"]
+            ),
+            reverse=True,
+        )
+        alive = alive[: max(1, math.ceil(len(alive) / eta))]
+
+    return list(state.values())
+
+
+def main(argv: List[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Hyperparameter sweep over SPACE.")
+    ap.add_argument("--workers", type=int, default=1, help="index configs run in parallel")
+    ap.add_argument("--rebuild", action="store_true", help="ignore cached sweep indexes")
+    ap.add_argument("--strategy", choices=("grid", "halving"), default="grid")
+    ap.add_argument("--budget", type=int, default=64, help="halving: total question evaluations")
+    ap.add_argument("--eta", type=int, default=2, help="halving: keep the top 1/eta per rung")
+    ap.add_argument(
+        "--rung0-docs", type=float, default=0.25, help="halving: docs fraction indexed for rung 0"
+    )
+    args = ap.parse_args(argv)
+
     uri = init_mlflow("rag_sweep")
     print(f"[sweep] MLflow at {uri}")
 
-    rows = []
     sweep_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    t0 = time.perf_counter()
     with mlflow.start_run(run_name=f"sweep_{sweep_id}"):
-        for embed_model, chunk_size, chunk_overlap, k in product(
-            SPACE["embed_model"], SPACE["chunk_size"], SPACE["chunk_overlap"], SPACE["k"]
-        ):
-            # re-index with params
-            build_index_with_params(
-                DOCS_DIR,
-                VSTORE_DIR,
-                embed_model=embed_model,
-                chunk_size=chunk_size,
-                chunk_overlap=chunk_overlap,
+        if args.strategy == "halving":
+            mlflow.log_params(
+                {
+                    "strategy": "halving",
+                    "budget": args.budget,
+                    "eta": args.eta,
+                    "rung0_docs": args.rung0_docs,
+                }
+            )
+            results = successive_halving(
+                args.budget,
+                eta=args.eta,
+                workers=args.workers,
+                rebuild=args.rebuild,
+                rung0_docs=args.rung0_docs,
             )
+        else:
+            results = grid(workers=args.workers, rebuild=args.rebuild)
+        rows = [_log_result(r) for r in results]
+        append_rows(_history_rows(results), mlflow.active_run().info.run_id, "sweep")
 
-            # one parent run per config
-            cfg_name = f"m={embed_model.split('/')[-1]}_cs={chunk_size}_co={chunk_overlap}_k={k}"
-            with mlflow.start_run(run_name=cfg_name, nested=True):
-                log_eval_params(
-                    embed_model=embed_model,
-                    chunk_size=chunk_size,
-                    chunk_overlap=chunk_overlap,
-                    k=k,
-                    docs_dir=str(DOCS_DIR),
-                    vstore_dir=str(VSTORE_DIR),
-                )
-
-                # average metrics over questions
-                agg = {"retrieved": 0, "context_chars": 0, "support_rate": 0.0, "q_ctx_cosine": 0.0}
-                per_q = []
-                for q in QUESTIONS:
-                    res = answer(q, k=k, mode="extractive", with_eval=True)
-                    sr = (res.get("eval") or {}).get("support_rate")
-                    qc = (res.get("eval") or {}).get("q_ctx_cosine")
-                    per_q.append((q, sr, qc))
-                    log_eval_metrics(
-                        retrieved=res.get("retrieved", 0),
-                        context_chars=res.get("context_chars", 0),
-                        support_rate=sr,
-                        q_ctx_cosine=qc,
-                        answer_tokens_est=res.get("answer_tokens_est", 0),
-                        question_tokens_est=res.get("question_tokens_est", 0),
-                    )
-
-                    agg["retrieved"] += res.get("retrieved", 0)
-                    agg["context_chars"] += res.get("context_chars", 0)
-                    agg["support_rate"] += sr or 0.0
-                    agg["q_ctx_cosine"] += qc or 0.0
-
-                n = max(1, len(QUESTIONS))
-                agg = {
-                    k2: (
-                        v / n
-                        if k2 in ("support_rate", "q_ctx_cosine", "retrieved", "context_chars")
-                        else v
-                    )
-                    for k2, v in agg.items()
-                }
-                comp = score_row(agg["support_rate"], agg["q_ctx_cosine"])
-                mlflow.log_metric("avg_support_rate", agg["support_rate"])
-                mlflow.log_metric("avg_q_ctx_cosine", agg["q_ctx_cosine"])
-                mlflow.log_metric("composite_score", comp)
-
-                rows.append(
-                    {
-                        "embed_model": embed_model,
-                        "chunk_size": chunk_size,
-                        "chunk_overlap": chunk_overlap,
-                        "k": k,
-                        "avg_support_rate": round(agg["support_rate"], 3),
-                        "avg_q_ctx_cosine": round(agg["q_ctx_cosine"], 3),
-                        "composite_score": round(comp, 3),
-                    }
-                )
+        wall = time.perf_counter() - t0
+        index_total = sum({r["persist_dir"]: r["index_s"] for r in results}.values())
+        eval_total = sum(r["eval_s"] for r in results)
+        mlflow.log_metrics({"wall_s": wall, "index_s": index_total, "eval_s": eval_total})
+        print(
+            f"[sweep] configs={len(rows)} wall={wall:.1f}s "
+            f"index={index_total:.1f}s eval={eval_total:.1f}s (summed over workers)"
+        )
 
         # write CSV summary
-        out = REPORTS_DIR / f"sweep_{sweep_id}.csv"
-        with out.open("w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
-            writer.writeheader()
-            writer.writerows(sorted(rows, key=lambda r: r["composite_score"], reverse=True))
+        out = write_report(rows, sweep_id)
         print(f"[sweep] wrote {out}")
         mlflow.log_artifact(str(out))
 
@@ -0,0 +1,180 @@
+from __future__ import annotations
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import re
+import threading
+import time
+
+import chromadb
+
+from .config import (
+    COLLECTION_NAME,
+    VSTORE_DIR,
+    TENANT_CACHE_MAX,
+    TENANT_CACHE_MB,
+    TENANT_IDLE_S,
+)
+
+DEFAULT_TENANT = "default"
+TENANTS_DIRNAME = "tenants"
+_TENANT_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+
+class UnknownTenant(KeyError):
+    pass
+
+
+def tenant_dir(tenant: Optional[str] = None, root: Path = VSTORE_DIR) -> Path:
+    """Store directory of a tenant; the default tenant is the original single store."""
+    if not tenant or tenant == DEFAULT_TENANT:
+        return Path(root)
+    if not _TENANT_RE.match(tenant):
+        raise ValueError(f"invalid tenant name {tenant!r} (letters, digits, '_' and '-')")
+    return Path(root) / TENANTS_DIRNAME / tenant
+
+
+def list_tenants(root: Path = VSTORE_DIR) -> List[str]:
+    base = Path(root) / TENANTS_DIRNAME
+    named = sorted(p.name for p in base.iterdir() if p.is_dir()) if base.exists() else []
+    return [DEFAULT_TENANT, *named]
+
+
+def _segment_bytes(store: Path) -> int:
+    # HNSW segments live in per-collection subdirectories and are loaded whole on first
+    # query, so their on-disk size is a fair estimate of what an open store keeps resident
+    return sum(f.stat().st_size for d in store.iterdir() if d.is_dir() for f in d.rglob("*"))
+
+
+class CollectionCache:
+    """
+    Bounded LRU of open stores (one Chroma client per store directory).
+    Stores not in use are closed once there are more than `max_open`, their
+    estimated resident size exceeds `max_bytes`, or they sat idle for `idle_s`.
+    """
+
+    def __init__(
+        self,
+        max_open: int = TENANT_CACHE_MAX,
+        max_bytes: int = TENANT_CACHE_MB * 1024 * 1024,
+        idle_s: float = TENANT_IDLE_S,
+    ) -> None:
+        self._max_open = max(1, max_open)
+        self._max_bytes = max_bytes
+        self._idle_s = idle_s
+        self._lock = threading.Lock()
+        self._open: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._loading: Dict[str, threading.Lock] = {}  # per-store guard while it opens
+        self.evictions = 0
+
+    @contextmanager
+    def lease(self, persist_dir: Path, create: bool = False) -> Iterator[Any]:
+        """Yield the store's collection, keeping it open for the duration of the block."""
+        key = str(Path(persist_dir).resolve())
+        entry = None
+        while entry is None:
+            with self._lock:
+                entry = self._open.get(key)
+                if entry is not None:
+                    self._checkout(key, entry)
+                    break
+                guard = self._loading.setdefault(key, threading.Lock())
+            # opening a store reads its sqlite and segments; do it without the global
+            # lock so leases of other stores go on, and only once per store
+            with guard:
+                with self._lock:
+                    if key in self._open:
+                        continue  # another lease opened it while we waited
+                try:
+                    entry = self._load(Path(persist_dir), create)
+                    with self._lock:
+                        self._open[key] = entry
+                        self._checkout(key, entry)
+                finally:
+                    with self._lock:
+                        self._loading.pop(key, None)
+        try:
+            yield entry["collection"]
+        finally:
+            with self._lock:
+                entry["active"] -= 1
+                entry["last_used"] = time.time()
+
+    def refresh(self, persist_dir: Path) -> None:
+        """Re-measure a store after it was (re)indexed."""
+        key = str(Path(persist_dir).resolve())
+        with self._lock:
+            if key in self._open:
+                self._open[key]["bytes"] = _segment_bytes(Path(key))
+                self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "open": len(self._open),
+                "max_open": self._max_open,
+                "bytes": sum(e["bytes"] for e in self._open.values()),
+                "max_bytes": self._max_bytes,
+                "evictions": self.evictions,
+                "stores": [
+                    {"path": k, "bytes": e["bytes"], "active": e["active"]}
+                    for k, e in self._open.items()
+                ],
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            for key in list(self._open):
+                self._close(key)
+
+    def _checkout(self, key: str, entry: Dict[str, Any]) -> None:
+        # caller holds the lock
+        entry["active"] += 1
+        entry["last_used"] = time.time()
+        self._open.move_to_end(key)
+        self._evict()
+
+    def _load(self, persist_dir: Path, create: bool) -> Dict[str, Any]:
+        # caller holds the store's guard, not the lock
+        if not persist_dir.exists():
+            if not create:
+                raise UnknownTenant(str(persist_dir))
+            persist_dir.mkdir(parents=True, exist_ok=True)
+        # local import: retriever imports this module for its own lookups
+        from .retriever import hnsw_configuration
+
+        client = chromadb.PersistentClient(path=str(persist_dir))
+        col = client.get_or_create_collection(COLLECTION_NAME, configuration=hnsw_configuration())
+        return {
+            "client": client,
+            "collection": col,
+            "bytes": _segment_bytes(persist_dir),
+            "active": 0,
+            "last_used": time.time(),
+        }
+
+    def _close(self, key: str) -> None:
+        entry = self._open.pop(key)
+        # releases the store's chroma system once no other client in the process holds it
+        entry["client"].close()
+        self.evictions += 1
+
+    def _evict(self) -> None:
+        # caller holds the lock; least recently used first, never a store in use
+        cutoff = time.time() - self._idle_s
+        for key in [
+            k for k, e in self._open.items() if not e["active"] and e["last_used"] < cutoff
+        ]:
+            self._close(key)
+        for key in [k for k, e in self._open.items() if not e["active"]]:
+            total = sum(e["bytes"] for e in self._open.values())
+            if len(self._open) <= self._max_open and total <= self._max_bytes:
+                break
+            self._close(key)
+
+
+@lru_cache
+def get_collection_cache() -> CollectionCache:
+    return CollectionCache()
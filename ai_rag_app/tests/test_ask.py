@@ -3,24 +3,28 @@ from __future__ import annotations
 # from pathlib import Path
 import shutil
 
+import pytest
+
 from fastapi.testclient import TestClient
 
 from ai_rag_app.src.service import app
-from ai_rag_app.src.config import DOCS_DIR, VSTORE_DIR
+from ai_rag_app.src.config import VSTORE_DIR
 from ai_rag_app.src.index_docs import build_index
 
 
-def setup_module(module=None):
+@pytest.fixture(autouse=True, scope="module")
+def indexed_store(tmp_path_factory):
     # reset store and add a tiny doc
     if VSTORE_DIR.exists():
         shutil.rmtree(VSTORE_DIR)
     VSTORE_DIR.mkdir(parents=True, exist_ok=True)
-    DOCS_DIR.mkdir(parents=True, exist_ok=True)
-    (DOCS_DIR / "sample.md").write_text(
+    # docs live in a temp dir so the real corpus under data/docs is never overwritten
+    docs_dir = tmp_path_factory.mktemp("docs")
+    (docs_dir / "sample.md").write_text(
         "# retrieval\n\nVector databases like Chroma store document chunks and enable similarity search for RAG.",
         encoding="utf-8",
     )
-    build_index(DOCS_DIR, VSTORE_DIR)
+    build_index(docs_dir, VSTORE_DIR)
 
 
 def test_ask_returns_answer_and_sources():
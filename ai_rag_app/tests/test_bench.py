@@ -0,0 +1,20 @@
+from __future__ import annotations
+from pathlib import Path
+
+from ai_rag_app.src.bench import compare, make_corpus, make_text
+
+
+def test_synthetic_corpus_from_sample_docs(tmp_path: Path) -> None:
+    out = make_corpus(tmp_path / "docs", n_docs=3, paras_per_doc=4)
+    files = sorted(out.glob("*.md"))
+    assert len(files) == 3
+    assert files[0].read_text(encoding="utf-8") != files[1].read_text(encoding="utf-8")
+    assert len(make_text(10_000)) >= 10_000
+
+
+def test_compare_reports_speedups_and_regressions() -> None:
+    base = {"results": {"a": {"median_s": 0.010}, "b": {"median_s": 0.010}}}
+    new = {"results": {"a": {"median_s": 0.005}, "b": {"median_s": 0.020}}}
+    rows = {r["bench"]: r for r in compare(base, new)}
+    assert rows["a"]["speedup"] == 2.0 and not rows["a"]["regression"]
+    assert rows["b"]["speedup"] == 0.5 and rows["b"]["regression"]
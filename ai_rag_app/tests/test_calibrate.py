@@ -0,0 +1,50 @@
+from __future__ import annotations
+from pathlib import Path
+
+import chromadb
+import numpy as np
+
+from ai_rag_app.src.calibrate import calibrate, exact_neighbors, recommend
+from ai_rag_app.src.config import COLLECTION_NAME
+from ai_rag_app.src.retriever import hnsw_configuration
+
+
+def _store(path: Path, n: int = 1500, dim: int = 32) -> None:
+    client = chromadb.PersistentClient(path=str(path))
+    col = client.get_or_create_collection(
+        COLLECTION_NAME,
+        configuration=hnsw_configuration(space="l2", m=4, construction_ef=8, search_ef=7),
+    )
+    x = np.random.default_rng(1).standard_normal((n, dim)).astype(np.float32)
+    for i in range(0, n, 500):
+        col.add(ids=[f"c{j}" for j in range(i, i + 500)], embeddings=x[i : i + 500].tolist())
+    client.close()
+
+
+def test_exact_neighbors_matches_sort() -> None:
+    rng = np.random.default_rng(0)
+    v, q = rng.standard_normal((50, 8)), rng.standard_normal((3, 8))
+    want = np.argsort(((q[:, None] - v[None]) ** 2).sum(-1), axis=1)[:, :4]
+    assert (exact_neighbors(v, q, 4, "l2") == want).all()
+
+
+def test_recommend_picks_cheapest_meeting_target() -> None:
+    rows = [
+        {"ef_search": 10, "recall": 0.80, "p50_ms": 1.0},
+        {"ef_search": 40, "recall": 0.96, "p50_ms": 2.0},
+        {"ef_search": 160, "recall": 1.00, "p50_ms": 5.0},
+    ]
+    assert recommend(rows, 0.95)["ef_search"] == 40
+    miss = recommend(rows, 1.01)
+    assert miss["ef_search"] == 160 and not miss["meets_target"]
+
+
+def test_calibrate_recall_grows_with_ef_and_restores_setting(tmp_path: Path) -> None:
+    _store(tmp_path)
+    report = calibrate(tmp_path, k=10, target=0.9, ef_grid=(10, 400), n_queries=40)
+    low, high = report["results"]
+    assert high["recall"] > low["recall"]
+    assert high["recall"] >= 0.9
+    assert report["recommended"]["ef_search"] == 400
+    with chromadb.PersistentClient(path=str(tmp_path)) as client:
+        assert client.get_collection(COLLECTION_NAME).configuration["hnsw"]["ef_search"] == 7
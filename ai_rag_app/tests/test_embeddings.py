@@ -0,0 +1,54 @@
+from __future__ import annotations
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sentence_transformers import SentenceTransformer, models
+from transformers import BertConfig, BertModel, BertTokenizer
+
+from ai_rag_app.src.embeddings import get_model, parity
+
+WORDS = "vector store chunk embedding query index search document answer the a of".split()
+
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory) -> str:
+    """A randomly initialised 2-layer BERT wrapped as a sentence-transformer (offline)."""
+    root = tmp_path_factory.mktemp("tiny")
+    vocab = root / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *WORDS]))
+    hf_dir = root / "hf"
+    config = BertConfig(
+        vocab_size=len(WORDS) + 5,
+        hidden_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=128,
+    )
+    BertModel(config).save_pretrained(hf_dir)
+    BertTokenizer(str(vocab)).save_pretrained(hf_dir)
+    word = models.Transformer(str(hf_dir))
+    pool = models.Pooling(word.get_word_embedding_dimension())
+    out = root / "st"
+    SentenceTransformer(modules=[word, pool]).save(str(out))
+    return str(out)
+
+
+def test_int8_backend_matches_torch(tiny_model: str, tmp_path: Path) -> None:
+    texts = ["the vector store answers a query.", "index of the document chunk embedding."]
+    ref = get_model(tiny_model, "torch").encode(texts, normalize_embeddings=True)
+    q = get_model(tiny_model, "int8").encode(texts, normalize_embeddings=True)
+    assert q.shape == ref.shape
+    assert np.allclose(np.linalg.norm(q, axis=1), 1.0, atol=1e-5)
+    assert (ref * q).sum(axis=1).min() > 0.95
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("The vector store answers a query.\n\nSearch the index.")
+    r = parity("int8", tiny_model, docs, limit=8, batch_size=4)
+    assert r["texts"] == 1 and r["cos_mean"] > 0.95 and r["int8_texts_per_s"] > 0
+
+
+def test_unknown_backend(tiny_model: str) -> None:
+    with pytest.raises(ValueError):
+        get_model(tiny_model, "tensorrt")
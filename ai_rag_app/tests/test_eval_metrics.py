@@ -3,24 +3,28 @@ from __future__ import annotations
 # from pathlib import Path
 import shutil
 
+import pytest
+
 from fastapi.testclient import TestClient
 
 from ai_rag_app.src.service import app, MAX_QUESTION_CHARS
-from ai_rag_app.src.config import DOCS_DIR, VSTORE_DIR
+from ai_rag_app.src.config import VSTORE_DIR
 from ai_rag_app.src.index_docs import build_index
 
 
-def setup_module(module=None):
+@pytest.fixture(autouse=True, scope="module")
+def indexed_store(tmp_path_factory):
     if VSTORE_DIR.exists():
         shutil.rmtree(VSTORE_DIR)
     VSTORE_DIR.mkdir(parents=True, exist_ok=True)
-    DOCS_DIR.mkdir(parents=True, exist_ok=True)
-    (DOCS_DIR / "sample.md").write_text(
+    # docs live in a temp dir so the real corpus under data/docs is never overwritten
+    docs_dir = tmp_path_factory.mktemp("docs")
+    (docs_dir / "sample.md").write_text(
         "# retrieval\n\nRetrieval augmented generation uses top-k document chunks "
         "from a vector store to ground answers and provide citations.",
         encoding="utf-8",
     )
-    build_index(DOCS_DIR, VSTORE_DIR)
+    build_index(docs_dir, VSTORE_DIR)
 
 
 def test_eval_metrics_present() -> None:
@@ -40,3 +44,30 @@ def test_guardrails_question_too_long() -> None:
     long_q = "x" * (MAX_QUESTION_CHARS + 5)
     r = c.post("/ask", json={"question": long_q})
     assert r.status_code in (400, 422)
+
+
+def test_eval_async_returns_id_and_result() -> None:
+    import time
+
+    c = TestClient(app)
+    r = c.post(
+        "/ask",
+        json={
+            "question": "what is retrieval augmented generation",
+            "eval": True,
+            "eval_async": True,
+        },
+    )
+    assert r.status_code == 200
+    body = r.json()
+    assert "eval" not in body and body["eval_status"] == "pending"
+
+    deadline = time.time() + 60
+    rec = c.get(f"/eval/{body['eval_id']}").json()
+    while rec["status"] == "pending" and time.time() < deadline:
+        time.sleep(0.1)
+        rec = c.get(f"/eval/{body['eval_id']}").json()
+    assert rec["status"] == "done"
+    assert 0.0 <= rec["eval"]["support_rate"] <= 1.0
+
+    assert c.get("/eval/does-not-exist").status_code == 404
@@ -0,0 +1,62 @@
+from __future__ import annotations
+import json
+import threading
+from pathlib import Path
+
+from ai_rag_app.src.eval_queue import EvalQueue
+
+
+def _fake_eval(question, answer, contexts):
+    return {"eval": {"support_rate": 1.0, "q_ctx_cosine": 1.0}, "flags": {}}
+
+
+def test_queue_bounded_and_results_logged(tmp_path: Path) -> None:
+    gate = threading.Event()
+
+    def slow_eval(question, answer, contexts):
+        gate.wait(5)
+        return _fake_eval(question, answer, contexts)
+
+    log = tmp_path / "evals.jsonl"
+    q = EvalQueue(workers=1, max_pending=2, results_log=log, evaluate_fn=slow_eval)
+    a = q.submit("q1", "a", ["c"])
+    b = q.submit("q2", "a", ["c"])
+    assert a and b
+    assert q.submit("q3", "a", ["c"]) is None  # full
+    assert q.get(a)["status"] == "pending"
+
+    gate.set()
+    q.shutdown(wait=True)
+    assert q.get(a)["status"] == "done" and q.get(b)["status"] == "done"
+    lines = [json.loads(x) for x in log.read_text().splitlines()]
+    assert {x["eval_id"] for x in lines} == {a, b}
+
+
+def test_old_results_evicted() -> None:
+    q = EvalQueue(workers=1, max_results=2, results_log=None, evaluate_fn=_fake_eval)
+    ids = []
+    for i in range(4):
+        ids.append(q.submit(f"q{i}", "a", ["c"]))
+    q.shutdown(wait=True)
+    assert q.get(ids[0]) is None and q.get(ids[1]) is None
+    assert q.get(ids[3])["status"] == "done"
+    assert q.stats() == {"pending": 0, "records": 2}
+
+
+def test_results_log_write_does_not_block_lookups(tmp_path: Path) -> None:
+    log = tmp_path / "evals.jsonl"
+    q = EvalQueue(workers=1, results_log=log, evaluate_fn=_fake_eval)
+    q._log_lock.acquire()  # stands in for a slow disk
+    try:
+        eid = q.submit("q1", "a", ["c"])
+        for _ in range(200):
+            rec = q.get(eid)  # would hang if the log were written under the queue lock
+            if rec["status"] == "done":
+                break
+            threading.Event().wait(0.01)
+        assert rec["status"] == "done"
+        assert q.submit("q2", "a", ["c"]) is not None
+    finally:
+        q._log_lock.release()
+    q.shutdown(wait=True)
+    assert len(log.read_text().splitlines()) == 2
@@ -0,0 +1,37 @@
+from __future__ import annotations
+from pathlib import Path
+
+from ai_rag_app.src.history import (
+    append_rows,
+    compare_runs,
+    config_key,
+    list_runs,
+    question_trend,
+    regressions,
+)
+
+
+def _rows(sr: float, ms: float) -> list[dict]:
+    key = config_key("sentence-transformers/all-MiniLM-L6-v2", 900, 150, 5)
+    return [
+        {"config_key": key, "question": "q1", "support_rate": sr, "total_ms": ms},
+        {"config_key": key, "question": "q2", "support_rate": 0.8, "total_ms": 100.0},
+    ]
+
+
+def test_append_and_compare_runs(tmp_path: Path) -> None:
+    append_rows(_rows(0.9, 100.0), "run_a", "eval", tmp_path)
+    append_rows(_rows(0.5, 200.0), "run_b", "eval", tmp_path)
+    # a second batch for the same run lands in the same partition
+    append_rows(_rows(0.5, 200.0)[:1], "run_b", "eval", tmp_path)
+
+    runs = list_runs(tmp_path)
+    assert runs.get_column("run_id").to_list() == ["run_a", "run_b"]
+
+    cmp = compare_runs("run_a", "run_b", tmp_path)
+    assert cmp.height == 2
+    bad = regressions("run_a", "run_b", history_dir=tmp_path)
+    assert bad.get_column("question").to_list() == ["q1"]
+
+    trend = question_trend("q1", history_dir=tmp_path)
+    assert trend.get_column("support_rate").to_list() == [0.9, 0.5]
@@ -0,0 +1,105 @@
+from __future__ import annotations
+import hashlib
+from pathlib import Path
+
+import chromadb
+import duckdb
+import numpy as np
+
+from ai_rag_app.src import index_warehouse
+from ai_rag_app.src.config import COLLECTION_NAME
+from ai_rag_app.src.index_warehouse import JOB_TEMPLATE, index_table, render
+from ai_rag_app.src.metadata_index import load_manifest
+
+
+class _FakeModel:
+    """Deterministic stand-in for the sentence-transformer; counts what it embeds."""
+
+    def __init__(self) -> None:
+        self.seen: list[str] = []
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=True):
+        self.seen.extend(texts)
+        out = []
+        for t in texts:
+            seed = int(hashlib.md5(t.encode()).hexdigest()[:8], 16)
+            v = np.random.default_rng(seed).standard_normal(8)
+            out.append(v / np.linalg.norm(v))
+        return np.asarray(out, dtype=np.float32)
+
+
+def _warehouse(path: Path, n: int = 25) -> Path:
+    db = path / "warehouse.duckdb"
+    con = duckdb.connect(str(db))
+    con.execute(
+        """
+        CREATE TABLE fact_job_postings AS
+        SELECT i AS job_id, 'Data Engineer' AS job_title, 'Mid' AS experience_level,
+               'Acme ' || i AS company_name, DATE '2025-01-01' + i::INTEGER AS posted_date,
+               NULL::VARCHAR AS tools_preferred
+        FROM range(1, $n + 1) t(i)
+        """,
+        {"n": n},
+    )
+    con.close()
+    return db
+
+
+def test_render_fills_missing_fields() -> None:
+    text = render(JOB_TEMPLATE, {"job_title": "ML Engineer", "tools_preferred": None})
+    assert text.startswith("ML Engineer (n/a, n/a)")
+    assert "Tools: n/a." in text
+
+
+def test_incremental_warehouse_indexing(tmp_path: Path, monkeypatch) -> None:
+    fake = _FakeModel()
+    monkeypatch.setattr(index_warehouse, "get_model", lambda name: fake)
+    db = _warehouse(tmp_path)
+    store = tmp_path / "store"
+
+    first = index_table(db, persist_dir=store, rows_per_batch=10)
+    assert first == {"rows": 25, "embedded": 25, "skipped": 0, "deleted": 0}
+    col = chromadb.PersistentClient(path=str(store)).get_collection(COLLECTION_NAME)
+    got = col.get(ids=["fact_job_postings:3"], include=["documents", "metadatas"])
+    assert "Acme 3" in got["documents"][0]
+    assert got["metadatas"][0]["posted_date"] == "2025-01-04"
+
+    assert index_table(db, persist_dir=store, rows_per_batch=10)["embedded"] == 0
+
+    con = duckdb.connect(str(db))
+    con.execute("UPDATE fact_job_postings SET job_title = 'Staff DE' WHERE job_id = 7")
+    con.close()
+    fake.seen.clear()
+    again = index_table(db, persist_dir=store, rows_per_batch=10)
+    assert again == {"rows": 25, "embedded": 1, "skipped": 24, "deleted": 0}
+    assert fake.seen[0].startswith("Staff DE")
+    assert load_manifest(store)["duckdb://warehouse.duckdb/fact_job_postings"]["chunks"] == 25
+
+    con = duckdb.connect(str(db))
+    con.execute("DELETE FROM fact_job_postings WHERE job_id IN (3, 4)")
+    con.close()
+    pruned = index_table(db, persist_dir=store, rows_per_batch=10)
+    assert pruned == {"rows": 23, "embedded": 0, "skipped": 23, "deleted": 2}
+    col = chromadb.PersistentClient(path=str(store)).get_collection(COLLECTION_NAME)
+    assert col.count() == 23
+    assert col.get(ids=["fact_job_postings:3", "fact_job_postings:5"])["ids"] == [
+        "fact_job_postings:5"
+    ]
+
+
+def test_deleted_rows_are_pruned_across_pages(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(index_warehouse, "get_model", lambda name: _FakeModel())
+    db = _warehouse(tmp_path)
+    store = tmp_path / "store"
+    index_table(db, persist_dir=store, rows_per_batch=4)
+
+    gone = (2, 9, 17, 23)  # spread over several 4-id pages
+    con = duckdb.connect(str(db))
+    con.execute(f"DELETE FROM fact_job_postings WHERE job_id IN {gone}")
+    con.close()
+    summary = index_table(db, persist_dir=store, rows_per_batch=4)
+    assert summary == {"rows": 21, "embedded": 0, "skipped": 21, "deleted": 4}
+
+    col = chromadb.PersistentClient(path=str(store)).get_collection(COLLECTION_NAME)
+    want = {f"fact_job_postings:{i}" for i in range(1, 26) if i not in gone}
+    assert set(col.get(include=[])["ids"]) == want
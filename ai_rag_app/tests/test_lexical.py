@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from ai_rag_app.src.lexical import (
+    bm25_scores,
+    load_stats,
+    select_candidates,
+    source_stats,
+    update_stats,
+)
+
+SENTENCES = [
+    "Chroma persists collections on local disk between runs.",
+    "The weather report mentions rain over the weekend.",
+    "Vector stores index embeddings for nearest neighbour search.",
+    "Lunch is served in the cafeteria from noon until two.",
+    "A vector store returns the chunks closest to the query embedding.",
+]
+
+
+def test_bm25_ranks_overlapping_sentences_first():
+    scores = bm25_scores("what is a vector store", SENTENCES)
+    assert scores[1] == 0.0 and scores[3] == 0.0
+    assert scores[4] > 0 and scores[2] > 0
+
+
+def test_select_candidates_keeps_retrieval_order_and_cap():
+    keep = select_candidates("vector store embeddings", SENTENCES, cap=2)
+    assert keep == [2, 4]
+    # cap 0 disables pruning, a cap above the pool size is a no-op
+    assert select_candidates("vector store", SENTENCES, cap=0) == list(range(5))
+    assert select_candidates("vector store", SENTENCES, cap=10) == list(range(5))
+
+
+def test_no_overlap_falls_back_to_first_sentences():
+    assert select_candidates("quantum chromodynamics", SENTENCES, cap=3) == [0, 1, 2]
+
+
+def test_stats_sidecar_roundtrip(tmp_path):
+    update_stats(tmp_path, {"a.md": source_stats(SENTENCES[:3])})
+    update_stats(tmp_path, {"b.md": source_stats(SENTENCES[3:])})
+    stats = load_stats(tmp_path)
+    assert stats["n"] == 5
+    assert stats["df"]["vector"] == 2
+    # rare terms get a higher idf than common ones
+    rare = bm25_scores("weather", SENTENCES, stats)[1]
+    common = bm25_scores("vector", SENTENCES, stats)[2]
+    assert rare > common
+
+
+def test_stats_count_the_same_sentences_extractive_answers_rank():
+    from ai_rag_app.src import rag_chain
+
+    chunk = "Too short. " + " ".join(SENTENCES[:2]) + "\nok."
+    assert source_stats([chunk])["n"] == len(rag_chain.split_sentences(chunk)) == 2
@@ -0,0 +1,32 @@
+from __future__ import annotations
+from pathlib import Path
+
+from ai_rag_app.src import eval_runner
+from ai_rag_app.src.loadtest import compare, load_questions, percentile, summarize
+
+
+def test_percentile_nearest_rank() -> None:
+    vals = [float(x) for x in range(1, 101)]
+    assert percentile(vals, 50) == 50.0
+    assert percentile(vals, 99) == 99.0
+    assert percentile([], 95) == 0.0
+
+
+def test_summarize_and_compare_flags_regressions() -> None:
+    base = {"results": {"ask": summarize([0.010] * 100, errors=0, wall_s=1.0)}}
+    new = {"results": {"ask": summarize([0.020] * 100, errors=0, wall_s=2.0)}}
+    assert base["results"]["ask"]["p95_ms"] == 10.0 and base["results"]["ask"]["rps"] == 100.0
+
+    rows = {r["metric"]: r for r in compare(base, new, threshold=0.1)}
+    assert rows["p95_ms"]["regression"] and rows["rps"]["regression"]
+    assert not rows["errors"]["regression"]
+    assert not any(r["regression"] for r in compare(base, base))
+
+
+def test_questions_from_qa_file_or_synthetic(monkeypatch, tmp_path: Path) -> None:
+    assert len(load_questions()) >= 1
+    assert len(load_questions(synthetic=25)) == 25
+    qa = tmp_path / "qa.yml"
+    qa.write_text("- plain question?\n- q: keyed question?\n", encoding="utf-8")
+    monkeypatch.setattr(eval_runner, "QA_FILE", qa)
+    assert load_questions() == ["plain question?", "keyed question?"]
@@ -0,0 +1,64 @@
+from __future__ import annotations
+from datetime import datetime
+from pathlib import Path
+
+from ai_rag_app.src.metadata_index import (
+    load_manifest,
+    match_sources,
+    update_manifest,
+    where_for_sources,
+)
+
+MANIFEST = {
+    "/docs/product_a/guide.md": {
+        "rel": "product_a/guide.md",
+        "file_type": "md",
+        "indexed_at": 1_700_000_000,
+        "chunks": 4,
+    },
+    "/docs/product_a/invoice.pdf": {
+        "rel": "product_a/invoice.pdf",
+        "file_type": "pdf",
+        "indexed_at": 1_800_000_000,
+        "chunks": 9,
+    },
+    "/docs/product_b/notes.md": {
+        "rel": "product_b/notes.md",
+        "file_type": "md",
+        "indexed_at": 1_800_000_000,
+        "chunks": 2,
+    },
+}
+
+
+def test_prefix_glob_type_and_date_filters() -> None:
+    assert set(match_sources(MANIFEST, {"source": "product_a/"})) == {
+        "/docs/product_a/guide.md",
+        "/docs/product_a/invoice.pdf",
+    }
+    assert set(match_sources(MANIFEST, {"source": "*/notes.md"})) == {"/docs/product_b/notes.md"}
+    assert set(match_sources(MANIFEST, {"source": "product_a/", "file_types": [".PDF"]})) == {
+        "/docs/product_a/invoice.pdf"
+    }
+    after = datetime.fromtimestamp(1_750_000_000)
+    assert set(match_sources(MANIFEST, {"file_types": ["md"], "indexed_after": after})) == {
+        "/docs/product_b/notes.md"
+    }
+    assert match_sources(MANIFEST, {"source": "nope/"}) == {}
+
+
+def test_where_clause_and_manifest_roundtrip(tmp_path: Path) -> None:
+    assert where_for_sources(["a"]) == {"source": "a"}
+    assert where_for_sources(["a", "b"]) == {"source": {"$in": ["a", "b"]}}
+    update_manifest(tmp_path, dict(list(MANIFEST.items())[:1]))
+    update_manifest(tmp_path, dict(list(MANIFEST.items())[1:]))
+    assert load_manifest(tmp_path) == MANIFEST
+
+
+def test_rebuild_drops_sources_no_longer_in_the_docs_dir(tmp_path: Path) -> None:
+    update_manifest(tmp_path, {**MANIFEST, "duckdb://wh/jobs": {"rel": "jobs", "chunks": 1}})
+    kept = {k: v for k, v in MANIFEST.items() if k != "/docs/product_a/invoice.pdf"}
+    dropped = update_manifest(tmp_path, kept, prune_under=Path("/docs/product_a"))
+    assert dropped == ["/docs/product_a/invoice.pdf"]
+    assert set(load_manifest(tmp_path)) == set(kept) | {"duckdb://wh/jobs"}
+    assert update_manifest(tmp_path, {}) == []
@@ -0,0 +1,55 @@
+from __future__ import annotations
+import os
+
+import torch
+
+from ai_rag_app.src import memstats, serve
+
+
+def test_worker_plan_splits_cpus_evenly() -> None:
+    assert serve.worker_plan(None, None, cpus=8) == (8, 1)
+    assert serve.worker_plan(2, None, cpus=8) == (2, 4)
+    assert serve.worker_plan(3, None, cpus=8) == (3, 2)
+    assert serve.worker_plan(16, None, cpus=8) == (16, 1)
+    assert serve.worker_plan(2, 3, cpus=8) == (2, 3)
+
+
+def test_respawn_backoff_is_capped() -> None:
+    assert serve.respawn_delay(0) == 0.0
+    assert serve.respawn_delay(1) < serve.respawn_delay(2) < serve.respawn_delay(3)
+    assert serve.respawn_delay(50) == serve.MAX_BACKOFF_S
+
+
+def test_worker_sets_torch_threads(monkeypatch) -> None:
+    ran = []
+
+    class _Server:
+        def __init__(self, config) -> None:
+            self.config = config
+
+        def run(self, sockets) -> None:
+            ran.append((self.config, sockets, torch.get_num_threads()))
+
+    before = torch.get_num_threads()
+    monkeypatch.setattr(serve.uvicorn, "Server", _Server)
+    try:
+        serve._run_worker("cfg", "sock", threads=1)
+    finally:
+        torch.set_num_threads(before)
+    assert ran == [("cfg", ["sock"], 1)]
+
+
+def test_process_memory_is_cached(monkeypatch) -> None:
+    calls = []
+
+    def _fake(pid: int) -> dict:
+        calls.append(pid)
+        return {"rss_mb": float(len(calls)), "pss_mb": None, "shared_mb": None}
+
+    monkeypatch.setattr(memstats, "process_memory", _fake)
+    monkeypatch.setattr(memstats, "_cache", {})
+    pid = os.getpid()
+    assert memstats.cached_process_memory(pid)["rss_mb"] == 1.0
+    assert memstats.cached_process_memory(pid)["rss_mb"] == 1.0
+    assert memstats.cached_process_memory(pid, ttl=0)["rss_mb"] == 2.0
+    assert calls == [pid, pid]
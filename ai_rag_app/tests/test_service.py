@@ -16,3 +16,5 @@ def test_stats() -> None:
     assert r.status_code == 200
     body = r.json()
     assert "collection" in body and "documents" in body
+    assert body["worker"]["pid"] > 0
+    assert {"rss_mb", "pss_mb", "shared_mb"} <= set(body["worker"])
@@ -0,0 +1,59 @@
+from __future__ import annotations
+from pathlib import Path
+
+import chromadb
+import numpy as np
+import pytest
+
+from ai_rag_app.src.config import COLLECTION_NAME
+from ai_rag_app.src.metadata_index import load_manifest, update_manifest
+from ai_rag_app.src.retriever import hnsw_configuration
+from ai_rag_app.src.snapshot import export_snapshot, import_snapshot, load_snapshot
+
+N, DIM = 300, 24
+
+
+def _store(path: Path) -> np.ndarray:
+    col = chromadb.PersistentClient(path=str(path)).get_or_create_collection(
+        COLLECTION_NAME, configuration=hnsw_configuration(space="cosine", search_ef=33)
+    )
+    x = np.random.default_rng(0).standard_normal((N, DIM)).astype(np.float32)
+    col.add(
+        ids=[f"doc:{i}" for i in range(N)],
+        embeddings=x,
+        documents=[f"chunk number {i}" for i in range(N)],
+        metadatas=[{"source": f"/docs/{i % 3}.md", "chunk_index": i} for i in range(N)],
+    )
+    update_manifest(path, {f"/docs/{j}.md": {"rel": f"{j}.md", "chunks": 100} for j in range(3)})
+    return x
+
+
+def test_export_import_roundtrip(tmp_path: Path) -> None:
+    x = _store(tmp_path / "src")
+    snap = tmp_path / "index.snap"
+    header = export_snapshot(snap, tmp_path / "src", page=128)
+    assert header["count"] == N and header["dim"] == DIM
+
+    _h, table, matrix = load_snapshot(snap)
+    assert table.num_rows == N and matrix.shape == (N, DIM)
+
+    assert import_snapshot(snap, tmp_path / "dst", batch_size=100) == N
+    col = chromadb.PersistentClient(path=str(tmp_path / "dst")).get_collection(COLLECTION_NAME)
+    assert col.count() == N
+    assert col.configuration["hnsw"]["space"] == "cosine"
+    got = col.get(ids=["doc:7"], include=["embeddings", "documents", "metadatas"])
+    assert np.allclose(got["embeddings"][0], x[7])
+    assert got["documents"][0] == "chunk number 7"
+    assert got["metadatas"][0] == {"source": "/docs/1.md", "chunk_index": 7}
+    assert set(load_manifest(tmp_path / "dst")) == {f"/docs/{j}.md" for j in range(3)}
+
+
+def test_corrupt_snapshot_is_rejected(tmp_path: Path) -> None:
+    _store(tmp_path / "src")
+    snap = tmp_path / "index.snap"
+    export_snapshot(snap, tmp_path / "src")
+    data = bytearray(snap.read_bytes())
+    data[-5] ^= 0xFF
+    snap.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="checksum"):
+        load_snapshot(snap)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+from pathlib import Path
+import pytest
+
+from ai_rag_app.src.config import DEFAULT_EMBED_MODEL
+from ai_rag_app.src.sweep import ensure_index, index_dir_for
+
+
+def test_index_built_once_then_reused(tmp_path: Path) -> None:
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("# a\n\nVector stores keep chunks for similarity search.")
+    cfg = (DEFAULT_EMBED_MODEL, 600, 100)
+    root = tmp_path / "sweep"
+
+    d1, _t1, reused1 = ensure_index(cfg, docs, root)
+    d2, t2, reused2 = ensure_index(cfg, docs, root)
+    assert d1 == d2 == index_dir_for(cfg, root)
+    assert not reused1 and reused2 and t2 == 0.0
+
+    # other configs get their own directory
+    assert index_dir_for((DEFAULT_EMBED_MODEL, 900, 100), root) != d1
+
+    # content change invalidates the cached index
+    (docs / "a.md").write_text("# a\n\nSomething else entirely about retrieval.")
+    _d3, _t3, reused3 = ensure_index(cfg, docs, root)
+    assert not reused3
+
+
+def test_successive_halving_prunes_within_budget(monkeypatch, tmp_path) -> None:
+    from ai_rag_app.src import sweep
+
+    calls = []
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for i in range(8):
+        (docs / f"d{i}.md").write_text(f"doc {i}")
+
+    def fake_run_tasks(tasks, workers=1, rebuild=False, docs_dir=None, store_root=None):
+        out = []
+        for cfg, ks, questions in tasks:
+            for k in ks:
+                calls.append((len(questions), len(list(docs_dir.iterdir()))))
+                # bigger chunks + larger k score higher, deterministically
+                sr = cfg[1] / 1000 + k / 100
+                per_q = [
+                    {
+                        "retrieved": k,
+                        "context_chars": 1,
+                        "support_rate": sr,
+                        "q_ctx_cosine": 0.5,
+                        "answer_tokens_est": 1,
+                        "question_tokens_est": 1,
+                    }
+                    for _ in questions
+                ]
+                out.append(
+                    {
+                        "cfg": cfg,
+                        "k": k,
+                        "persist_dir": "x",
+                        "index_s": 0.0,
+                        "index_reused": True,
+                        "per_q": per_q,
+                        "eval_s": 0.0,
+                    }
+                )
+        return out
+
+    monkeypatch.setattr(sweep, "_run_tasks", fake_run_tasks)
+    pool = [f"q{i}" for i in range(20)]
+    opts = {"eta": 2, "questions": pool, "docs_dir": docs, "store_root": tmp_path / "store"}
+    results = sweep.successive_halving(budget=40, **opts)
+
+    n_configs = len(sweep._index_configs()) * len(sweep.SPACE["k"])
+    assert len(results) == n_configs
+    assert sum(n for n, _ in calls) <= 40
+    # rung 0 ranks all configs on a quarter of the docs; survivors get the full set
+    assert [d for _, d in calls[:n_configs]] == [2] * n_configs
+    assert all(d == 8 for _, d in calls[n_configs:])
+    top = max(results, key=lambda r: (r["rung"], len(r["per_q"])))
+    assert top["cfg"][1] == max(sweep.SPACE["chunk_size"]) and top["k"] == max(sweep.SPACE["k"])
+    assert top["rung"] > 0 and len(top["per_q"]) > 1
+
+    calls.clear()
+    sweep.successive_halving(budget=n_configs + 3, **opts)
+    assert sum(n for n, _ in calls) <= n_configs + 3
+    with pytest.raises(ValueError):
+        sweep.successive_halving(budget=n_configs - 1, **opts)
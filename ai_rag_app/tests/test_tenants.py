@@ -0,0 +1,105 @@
+from __future__ import annotations
+from pathlib import Path
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ai_rag_app.src.retriever import get_collection
+from ai_rag_app.src.service import app
+from ai_rag_app.src.tenants import (
+    CollectionCache,
+    get_collection_cache,
+    list_tenants,
+    tenant_dir,
+)
+
+
+def test_tenant_dir_layout_and_validation(tmp_path: Path) -> None:
+    assert tenant_dir(None, tmp_path) == tmp_path
+    assert tenant_dir("default", tmp_path) == tmp_path
+    assert tenant_dir("team-a", tmp_path) == tmp_path / "tenants" / "team-a"
+    with pytest.raises(ValueError):
+        tenant_dir("../etc", tmp_path)
+    tenant_dir("team-b", tmp_path).mkdir(parents=True)
+    assert list_tenants(tmp_path) == ["default", "team-b"]
+
+
+def test_cache_evicts_least_recently_used_idle_store(tmp_path: Path) -> None:
+    cache = CollectionCache(max_open=2, max_bytes=1 << 40, idle_s=3600)
+    a, b, c = (tenant_dir(t, tmp_path) for t in ("a", "b", "c"))
+    with cache.lease(a, create=True) as col_a:
+        col_a.add(ids=["x"], embeddings=[[0.1, 0.2]], documents=["doc"])
+        with cache.lease(b, create=True):
+            pass
+        with cache.lease(c, create=True):
+            pass
+        # a is in use, so b (idle, least recent) goes
+        open_paths = {s["path"] for s in cache.stats()["stores"]}
+        assert open_paths == {str(a.resolve()), str(c.resolve())}
+        assert cache.stats()["evictions"] == 1
+
+    # a closed store reopens with its data intact
+    cache.close()
+    with cache.lease(a) as col_a:
+        assert col_a.count() == 1
+
+
+def test_unknown_tenant_is_not_created(tmp_path: Path) -> None:
+    cache = CollectionCache()
+    with pytest.raises(KeyError):
+        with cache.lease(tmp_path / "missing"):
+            pass
+    assert not (tmp_path / "missing").exists()
+
+
+def test_store_opens_once_without_blocking_other_leases(tmp_path: Path) -> None:
+    cache = CollectionCache(max_open=4, max_bytes=1 << 40, idle_s=3600)
+    a, b = (tenant_dir(t, tmp_path) for t in ("a", "b"))
+    with cache.lease(b, create=True):
+        pass
+    loads = []
+    release = threading.Event()
+    real_load = cache._load
+
+    def slow_load(persist_dir, create):
+        loads.append(persist_dir)
+        release.wait(5)
+        return real_load(persist_dir, create)
+
+    cache._load = slow_load
+
+    def use_a() -> None:
+        with cache.lease(a, create=True):
+            pass
+
+    threads = [threading.Thread(target=use_a) for _ in range(3)]
+    for t in threads:
+        t.start()
+    # a is still opening; the already-open b is leased without waiting for it
+    with cache.lease(b) as col_b:
+        assert col_b.count() == 0
+    release.set()
+    for t in threads:
+        t.join()
+    assert loads == [a]
+
+
+def test_get_collection_is_leased_from_the_shared_cache(tmp_path: Path) -> None:
+    store = tmp_path / "store"
+    with get_collection(store) as col:
+        assert col.count() == 0
+        leased = {s["path"]: s["active"] for s in get_collection_cache().stats()["stores"]}
+        assert leased[str(store.resolve())] == 1
+    leased = {s["path"]: s["active"] for s in get_collection_cache().stats()["stores"]}
+    assert leased[str(store.resolve())] == 0
+
+
+def test_service_tenant_routes() -> None:
+    c = TestClient(app)
+    assert c.get("/stats", params={"tenant": "nobody"}).status_code == 404
+    assert c.get("/stats", params={"tenant": "../x"}).status_code == 422
+    r = c.post("/ask", json={"question": "what is this?", "tenant": "nobody"})
+    assert r.status_code == 404
+    body = c.get("/tenants").json()
+    assert body["tenants"][0] == "default"
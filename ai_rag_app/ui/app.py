@@ -43,8 +43,9 @@ with cols[1]:
     with_eval = st.checkbox("Compute eval", value=True)
 
 if st.button("Ask"):
-    col = get_collection()
-    if col.count() == 0:
+    with get_collection() as col:
+        empty = col.count() == 0
+    if empty:
         st.error("Vector store is empty. Add docs and re-index first.")
     else:
         with st.spinner("Retrieving and answering..."):
@@ -1,32 +1,106 @@
 from __future__ import annotations
 
 import pathlib
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 import duckdb
 import polars as pl
+import pyarrow as pa
 import streamlit as st
 
+from de_pipeline.src.query_cache import QueryCache, query_key
+from de_pipeline.src.transform import read_build_id
+
 
 BASE_DIR = pathlib.Path(__file__).resolve().parent
 WAREHOUSE_PATH = BASE_DIR / "duckdb" / "warehouse.duckdb"
+# day × location × company × job_title posting counts maintained by transform.build_models
+ROLLUP_TABLE = "rollup_job_postings"
 
 
-@st.cache_resource(show_spinner=False)
-def get_connection() -> duckdb.DuckDBPyConnection:
+def _execute(sql: str, params: Dict[str, Any] | None = None) -> pa.Table:
     if not WAREHOUSE_PATH.exists():
         raise FileNotFoundError(
             f"warehouse.duckdb not found at {WAREHOUSE_PATH}. "
             "Run the Day 4 flow to build the warehouse first."
         )
-    return duckdb.connect(str(WAREHOUSE_PATH))
+    # opened per cache miss and read-only: a connection held open would lock the
+    # file against the next build_models run
+    with duckdb.connect(str(WAREHOUSE_PATH), read_only=True) as con:
+        cur = con.execute(sql, params) if params else con.execute(sql)
+        return cur.to_arrow_table()
+
+
+@st.cache_resource(show_spinner=False)
+def get_query_cache() -> QueryCache:
+    # one per server process, shared by every session
+    return QueryCache()
+
+
+def warehouse_version() -> str | None:
+    build_id = read_build_id(WAREHOUSE_PATH)
+    if build_id is None and WAREHOUSE_PATH.exists():
+        # built before build ids existed: any rewrite of the file still invalidates
+        build_id = f"mtime:{WAREHOUSE_PATH.stat().st_mtime_ns}"
+    return build_id
 
 
 def run_query(sql: str, params: Dict[str, Any] | None = None) -> pl.DataFrame:
-    con = get_connection()
-    if params:
-        return pl.from_arrow(con.execute(sql, params).arrow())
-    return pl.from_arrow(con.execute(sql).arrow())
+    cache = get_query_cache()
+    cache.sync(warehouse_version())
+    table = cache.get_or_compute(query_key(sql, params), lambda: _execute(sql, params))
+    return pl.from_arrow(table)
+
+
+def render_cache_panel() -> None:
+    cache = get_query_cache()
+    s = cache.stats()
+    with st.sidebar.expander("Query cache (debug)"):
+        st.metric("Hit rate", f"{s['hit_rate']:.0%}", f"{s['hits']} hits / {s['misses']} misses")
+        st.metric("Time saved", f"{s['saved_s'] * 1000:.0f} ms")
+        st.caption(
+            f"{s['entries']} results, {s['bytes'] / 2**20:.1f} / {s['max_bytes'] / 2**20:.0f} MB; "
+            f"{s['evictions']} evicted, {s['invalidations']} invalidations; "
+            f"build {s['build_id'] or 'n/a'}"
+        )
+        if st.button("Clear query cache"):
+            cache.clear()
+
+
+def table_columns(table: str) -> List[str]:
+    return (
+        run_query(
+            "SELECT column_name FROM duckdb_columns() WHERE table_name = $t ORDER BY column_index",
+            {"t": table},
+        )
+        .get_column("column_name")
+        .to_list()
+    )
+
+
+def filter_options(dim_table: str, id_col: str, column: str, fact_column: str) -> List[str]:
+    """
+    Sidebar choices from the (small) dimension table, or DISTINCT over facts without one.
+    Dimensions are append-only, so members are semi-joined to the facts on the surrogate
+    key to drop those no posting refers to any more.
+    """
+    if column in table_columns(dim_table) and id_col in table_columns("fact_job_postings"):
+        source = f"{dim_table} d SEMI JOIN fact_job_postings f ON f.{id_col} = d.{id_col}"
+        col = f"d.{column}"
+    else:
+        source, col = "fact_job_postings", fact_column
+    return (
+        run_query(
+            f"""
+            SELECT DISTINCT {col} AS value
+            FROM {source}
+            WHERE {col} IS NOT NULL AND {col} <> ''
+            ORDER BY value
+            """
+        )
+        .get_column("value")
+        .to_list()
+    )
 
 
 def main() -> None:
@@ -63,13 +137,20 @@ def main() -> None:
     has_company = company_col is not None
     has_job_title = "job_title" in fact_preview.columns
 
+    # panels read the rollup when it has every column they group or filter on
+    rollup_cols = set(table_columns(ROLLUP_TABLE))
+    needed = {c for c in (company_col, "location", "job_title") if c in fact_preview.columns}
+    use_rollup = "posted_date" in rollup_cols and needed <= rollup_cols
+    source = ROLLUP_TABLE if use_rollup else "fact_job_postings"
+    postings = "CAST(SUM(postings) AS BIGINT)" if use_rollup else "COUNT(*)"
+
     # sidebar filters
     st.sidebar.header("Filters")
 
     date_filter = None
     if has_posted_date:
         date_min, date_max = run_query(
-            "SELECT MIN(posted_date), MAX(posted_date) FROM fact_job_postings"
+            f"SELECT MIN(posted_date), MAX(posted_date) FROM {source}"
         ).row(0)
         if date_min is not None and date_max is not None:
             start, end = st.sidebar.date_input(
@@ -87,35 +168,13 @@ def main() -> None:
 
     location_filter = None
     if has_location:
-        locations = (
-            run_query(
-                """
-                SELECT DISTINCT location
-                FROM fact_job_postings
-                WHERE location IS NOT NULL AND location <> ''
-                ORDER BY location
-                """
-            )
-            .get_column("location")
-            .to_list()
-        )
+        locations = filter_options("dim_location", "location_id", "location", "location")
         if locations:
             location_filter = st.sidebar.multiselect("Location", locations, default=[])
 
     company_filter = None
     if has_company:
-        companies = (
-            run_query(
-                f"""
-                SELECT DISTINCT {company_col} AS company
-                FROM fact_job_postings
-                WHERE {company_col} IS NOT NULL AND {company_col} <> ''
-                ORDER BY {company_col}
-                """
-            )
-            .get_column("company")
-            .to_list()
-        )
+        companies = filter_options("dim_company", "company_id", "company_name", company_col)
         if companies:
             company_filter = st.sidebar.multiselect("Company", companies, default=[])
 
@@ -143,11 +202,11 @@ def main() -> None:
     metrics_df = run_query(
         f"""
         SELECT
-            COUNT(*) AS total_postings,
+            {postings} AS total_postings,
             {f"COUNT(DISTINCT {company_col}) AS companies," if has_company else "0 AS companies,"}
             { "COUNT(DISTINCT location) AS locations," if has_location else "0 AS locations,"}
             { "COUNT(DISTINCT job_title) AS job_titles" if has_job_title else "0 AS job_titles"}
-        FROM fact_job_postings
+        FROM {source}
         {where_sql}
         """,
         params,
@@ -167,8 +226,8 @@ def main() -> None:
             f"""
             SELECT
                 posted_date,
-                COUNT(*) AS postings
-            FROM fact_job_postings
+                {postings} AS postings
+            FROM {source}
             {where_sql}
             GROUP BY posted_date
             ORDER BY posted_date
@@ -188,8 +247,8 @@ def main() -> None:
             f"""
             SELECT
                 location,
-                COUNT(*) AS postings
-            FROM fact_job_postings
+                {postings} AS postings
+            FROM {source}
             {where_sql}
             GROUP BY location
             ORDER BY postings DESC
@@ -206,8 +265,8 @@ def main() -> None:
             f"""
             SELECT
                 job_title,
-                COUNT(*) AS postings
-            FROM fact_job_postings
+                {postings} AS postings
+            FROM {source}
             {where_sql}
             GROUP BY job_title
             ORDER BY postings DESC
@@ -217,9 +276,13 @@ def main() -> None:
         )
         st.dataframe(jt_df)
 
+    st.caption(f"Panels served from `{source}`.")
+
     with st.expander("Preview fact_job_postings"):
         st.dataframe(fact_preview)
 
+    render_cache_panel()
+
 
 if __name__ == "__main__":
     main()
@@ -5,11 +5,22 @@ import time
 from datetime import datetime, timezone
 from pathlib import Path
 
-from prefect import flow, task
+import argparse
+from typing import Any, Dict, List
+
+from prefect import flow, task, unmapped
+from prefect.task_runners import ThreadPoolTaskRunner
 import mlflow
 import contextlib
 
-from de_pipeline.src.ingest import ingest_raw_to_stage
+from de_pipeline.src.ingest import (
+    INGEST_WORKERS,
+    ingest_file,
+    list_raw_files,
+    load_manifest,
+    manifest_key,
+    record_results,
+)
 from de_pipeline.src.transform import build_models
 from de_pipeline.src.metrics import write_metric
 from de_pipeline.src.mlflow_logger import maybe_init, log_params, log_metrics
@@ -22,29 +33,55 @@ LOGS_DIR = BASE_DIR / "logs"
 LOGS_DIR.mkdir(exist_ok=True)
 
 
-@task(name="ingest_raw", log_prints=True)
-def t_ingest_raw(raw_dir: Path, staged_dir: Path) -> None:
-    ingest_raw_to_stage(raw_dir, staged_dir)
+@task(name="ingest_file", log_prints=True, task_run_name="ingest_{file.name}")
+def t_ingest_file(
+    file: Path, staged_dir: Path, entry: Dict[str, Any] | None, raw_dir: Path
+) -> Dict[str, Any]:
+    return ingest_file(file, staged_dir, entry, raw_dir)
+
+
+@task(name="record_ingest", log_prints=True)
+def t_record_ingest(staged_dir: Path, results: List[Dict[str, Any]]) -> None:
+    failed = record_results(staged_dir, results, load_manifest(staged_dir))
+    if failed:
+        raise RuntimeError("ingest failed for: " + ", ".join(Path(r["src"]).name for r in failed))
+
+
+def _ingest_raw(raw_dir: Path, staged_dir: Path) -> None:
+    # one mapped task run per raw file; the flow's task runner bounds the fan-out
+    staged_dir.mkdir(parents=True, exist_ok=True)
+    files = list_raw_files(raw_dir)
+    manifest = load_manifest(staged_dir)
+    entries = [manifest.get(manifest_key(f, raw_dir)) for f in files]
+    futures = t_ingest_file.map(
+        files, staged_dir=unmapped(staged_dir), entry=entries, raw_dir=unmapped(raw_dir)
+    )
+    t_record_ingest(staged_dir, [f.result() for f in futures])
 
 
 @task(name="build_models", log_prints=True)
-def t_build_models(warehouse_dir: Path) -> None:
-    build_models(warehouse_dir)
+def t_build_models(warehouse_dir: Path, staged_dir: Path, incremental: bool) -> None:
+    build_models(warehouse_dir, staged_dir, incremental=incremental)
 
 
-@flow(name="de_pipeline_local_flow", log_prints=True)
+@flow(
+    name="de_pipeline_local_flow",
+    log_prints=True,
+    task_runner=ThreadPoolTaskRunner(max_workers=INGEST_WORKERS),
+)
 def run_flow(
     raw_dir: str | Path = RAW_DIR,
     staged_dir: str | Path = STAGED_DIR,
     warehouse_dir: str | Path = WAREHOUSE_DIR,
+    incremental: bool = True,
 ) -> None:
     print(f"[flow] raw={Path(raw_dir).resolve()}")
     print(f"[flow] staged={Path(staged_dir).resolve()}")
     print(f"[flow] warehouse={Path(warehouse_dir).resolve()}")
 
     t0 = time.perf_counter()
-    t_ingest_raw(Path(raw_dir), Path(staged_dir))
-    t_build_models(Path(warehouse_dir))
+    _ingest_raw(Path(raw_dir), Path(staged_dir))
+    t_build_models(Path(warehouse_dir), Path(staged_dir), incremental)
     elapsed = time.perf_counter() - t0
 
     run_log = {
@@ -65,8 +102,8 @@ def run_flow(
     if uri:
         print(f"[flow] MLflow tracking at {uri}")
     with mlflow.start_run(run_name="local_flow", nested=False) if uri else contextlib.nullcontext():
-        t_ingest_raw(Path(raw_dir), Path(staged_dir))
-        t_build_models(Path(warehouse_dir))
+        _ingest_raw(Path(raw_dir), Path(staged_dir))
+        t_build_models(Path(warehouse_dir), Path(staged_dir), incremental)
         elapsed = time.perf_counter() - t0
         log_params(
             {
@@ -81,8 +118,16 @@ def run_flow(
     print("[flow] completed")
 
 
-def main() -> None:
-    run_flow()
+def main(argv: List[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Run the local DE flow.")
+    ap.add_argument("--workers", type=int, default=INGEST_WORKERS, help="raw files in parallel")
+    ap.add_argument(
+        "--full", action="store_true", help="rebuild the fact table instead of merging the delta"
+    )
+    args = ap.parse_args(argv)
+    run_flow.with_options(task_runner=ThreadPoolTaskRunner(max_workers=args.workers))(
+        incremental=not args.full
+    )
 
 
 if __name__ == "__main__":
@@ -1,12 +1,36 @@
 from __future__ import annotations
 
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
 import time
 import pathlib
-from typing import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
 
 import polars as pl
 from de_pipeline.src.metrics import write_metric
 
+# one entry per raw file: size, mtime_ns, sha256, schema fingerprint, staged output
+MANIFEST_NAME = "_ingest_manifest.json"
+# bump when _read_one_csv's cleaning or the staged layout changes so every file is rebuilt once
+INGEST_VERSION = 3
+# low-cardinality text columns, staged dictionary-encoded
+CATEGORICAL_COLUMNS = ("experience_level", "employment_type", "company_size", "industry")
+# staged dataset directory for job-posting CSVs (relative to the staged dir)
+JOBS_DATASET = "stg_ai_job_market"
+# the jobs dataset is Hive-partitioned by posted month: year=YYYY/month=M/part-<src>.parquet
+PARTITION_KEYS = ("year", "month")
+# rows with no parseable posted_date land in Hive's null partition
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+# row-group size for staged Parquet; each group carries min/max stats for filter pushdown
+ROW_GROUP_ROWS = int(os.environ.get("DE_ROW_GROUP_ROWS", "100000"))
+# raw files staged concurrently (CLI --workers / flow parameter override this)
+INGEST_WORKERS = int(os.environ.get("DE_INGEST_WORKERS", str(min(4, os.cpu_count() or 1))))
+
 
 def _read_one_csv(path: pathlib.Path) -> pl.DataFrame:
     # Faster inference with a reasonable sample; collect eager
@@ -32,87 +56,359 @@ def _read_one_csv(path: pathlib.Path) -> pl.DataFrame:
             .str.replace_all(r"^\s+|\s+$", "")
             .str.strptime(pl.Date, strict=False)
         )
-    return df
+    typed = _typed_columns(df.columns)
+    return df.with_columns(typed) if typed else df
+
+
+def _typed_columns(columns: Iterable[str]) -> List[pl.Expr]:
+    """
+    Typed columns derived from the trimmed strings: salary bounds parsed out of
+    "92860-109598" (a single figure gives min == max; unparseable → null) and
+    Categorical for the low-cardinality columns.
+    """
+    columns = set(columns)
+    exprs = [pl.col(c).cast(pl.Categorical) for c in CATEGORICAL_COLUMNS if c in columns]
+    if "salary_range_usd" in columns:
+        rng = pl.col("salary_range_usd").cast(pl.Utf8)
+        for name, pattern in (("salary_min", r"^\D*(\d[\d,]*)"), ("salary_max", r"(\d[\d,]*)\D*$")):
+            exprs.append(
+                rng.str.extract(pattern, 1)
+                .str.replace_all(",", "")
+                .cast(pl.Int64, strict=False)
+                .alias(name)
+            )
+    return exprs
+
+
+def _scan_one_csv(path: pathlib.Path) -> pl.LazyFrame:
+    """Same cleanup as _read_one_csv, as one lazy plan (trim every string column, parse dates)."""
+    lf = pl.scan_csv(path, infer_schema_length=2000)
+    schema = lf.collect_schema()
+    str_cols = [c for c, dt in schema.items() if dt == pl.Utf8]
+    exprs = [pl.col(c).str.replace_all(r"^\s+|\s+$", "") for c in str_cols if c != "posted_date"]
+    if "posted_date" in schema:
+        exprs.append(
+            pl.col("posted_date")
+            .cast(pl.Utf8)
+            .str.replace_all(r"^\s+|\s+$", "")
+            .str.strptime(pl.Date, strict=False)
+        )
+    lf = lf.with_columns(exprs) if exprs else lf
+    typed = _typed_columns(schema.names())
+    return lf.with_columns(typed) if typed else lf
 
 
-def _staged_name_for(df: pl.DataFrame, src: pathlib.Path) -> str:
-    if {"job_id", "job_title"}.issubset(df.columns) and (
-        "company_name" in df.columns or "company" in df.columns
+def _stage_one_csv(path: pathlib.Path, out_path: pathlib.Path) -> tuple[int, int]:
+    """
+    Stream `path` into `out_path` with the streaming sink, so peak memory stays bounded
+    by the engine's batch size rather than the file size. Returns (rows, cols), read back
+    from the Parquet footer.
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(f".{out_path.name}.{path.stem}.tmp")
+    try:
+        _scan_one_csv(path).sink_parquet(
+            tmp, compression="zstd", statistics=True, row_group_size=ROW_GROUP_ROWS
+        )
+    except Exception as exc:
+        tmp.unlink(missing_ok=True)
+        raise RuntimeError(f"Failed to stage CSV '{path}': {exc}") from exc
+    os.replace(tmp, out_path)
+    staged = pl.scan_parquet(out_path)
+    rows = staged.select(pl.len()).collect().item()
+    return int(rows), len(staged.collect_schema())
+
+
+def _stage_partitioned(
+    path: pathlib.Path, dataset_dir: pathlib.Path, part_name: str, old_parts: Iterable[str]
+) -> tuple[int, int, List[str]]:
+    """
+    Stream `path` into the jobs dataset, one file per posted month it has rows for.
+    Only this source's files are replaced: other sources' parts in the same months are
+    untouched, and this source's parts in months it no longer covers are removed.
+    Returns (rows, cols, parts), parts relative to the dataset's parent (the staged dir).
+    """
+    lf = _scan_one_csv(path)
+    tmp = dataset_dir / f".tmp-{pathlib.Path(part_name).stem}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    sunk: List[Any] = []
+    date = pl.col("posted_date")
+    try:
+        lf.sink_parquet(
+            pl.PartitionBy(
+                tmp,
+                key=[date.dt.year().alias("year"), date.dt.month().alias("month")],
+                include_key=False,
+            ),
+            compression="zstd",
+            statistics=True,
+            row_group_size=ROW_GROUP_ROWS,
+            mkdir=True,
+            sinked_paths_callback=lambda args: sunk.extend(args.paths),
+        )
+        by_dir: Dict[pathlib.Path, List[Any]] = {}
+        for sp in sunk:
+            by_dir.setdefault(pathlib.Path(sp.path).parent.relative_to(tmp), []).append(sp)
+        moves = []
+        for rel_dir, files in sorted(by_dir.items()):
+            stem = pathlib.Path(part_name).stem
+            for i, sp in enumerate(sorted(files, key=lambda f: f.path)):
+                name = part_name if len(files) == 1 else f"{stem}-{i:05d}.parquet"
+                moves.append((pathlib.Path(sp.path), dataset_dir / rel_dir / name))
+        for src, dst in moves:
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(src, dst)
+    except Exception as exc:
+        raise RuntimeError(f"Failed to stage CSV '{path}': {exc}") from exc
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    staged_dir = dataset_dir.parent
+    parts = [dst.relative_to(staged_dir).as_posix() for _, dst in moves]
+    for old in set(old_parts) - set(parts):
+        (staged_dir / old).unlink(missing_ok=True)
+    return sum(sp.num_rows for sp in sunk), len(lf.collect_schema()), parts
+
+
+def partition_of(part: str | pathlib.Path) -> Optional[tuple[int, int]]:
+    """(year, month) from a Hive part path; None for the null partition or unpartitioned files."""
+    keys = dict(seg.split("=", 1) for seg in pathlib.PurePath(part).parts if "=" in seg)
+    if any(keys.get(k, NULL_PARTITION) == NULL_PARTITION for k in PARTITION_KEYS):
+        return None
+    return int(keys["year"]), int(keys["month"])
+
+
+def _read_header(path: pathlib.Path) -> List[str]:
+    """Column names from the first line only (no parsing of the body)."""
+    with path.open("r", encoding="utf-8", newline="") as f:
+        row = next(csv.reader(f), [])
+    return [c.strip().lstrip("\ufeff") for c in row]
+
+
+def _staged_name_for(columns: Iterable[str], src: pathlib.Path) -> str:
+    columns = set(columns)
+    if {"job_id", "job_title"}.issubset(columns) and (
+        "company_name" in columns or "company" in columns
     ):
-        return "stg_ai_job_market.parquet"
+        # one part per raw file in the jobs dataset; transform dedups across parts
+        return f"{JOBS_DATASET}/part-{src.stem}.parquet"
     # fallback: source-based
     return f"stg_{src.stem}.parquet"
 
 
-def _should_skip(raw_file: pathlib.Path, staged_file: pathlib.Path) -> bool:
-    """Skip if staged exists and is newer than raw."""
-    return staged_file.exists() and staged_file.stat().st_mtime >= raw_file.stat().st_mtime
+def _file_sha256(path: pathlib.Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _schema_fingerprint(columns: List[str]) -> str:
+    return hashlib.sha256(f"v{INGEST_VERSION}|{'|'.join(columns)}".encode()).hexdigest()[:16]
 
 
-def ingest_raw_to_stage(raw_dir: str | pathlib.Path, staged_dir: str | pathlib.Path) -> None:
+def load_manifest(staged_dir: pathlib.Path) -> Dict[str, Dict[str, Any]]:
+    path = staged_dir / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    # absolute keys predate manifest_key(); those files are re-staged once under the new key
+    return {k: v for k, v in manifest.items() if not os.path.isabs(k)}
+
+
+def _save_manifest(staged_dir: pathlib.Path, manifest: Dict[str, Dict[str, Any]]) -> None:
+    path = staged_dir / MANIFEST_NAME
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _should_skip(
+    raw_file: pathlib.Path, staged_dir: pathlib.Path, entry: Optional[Dict[str, Any]]
+) -> bool:
     """
-    Day 7: performance + reliability
-    - Reads all *.csv in raw_dir with Polars
-    - Light cleanup + date parsing
-    - Writes staged Parquet
-    - Skips files that are already up-to-date
-    - Emits timing metrics to logs/metrics.jsonl
+    Skip if the manifest says this exact input was already staged and the output is intact.
+    Same size + mtime is trusted as-is; a changed mtime with the same size (git checkout,
+    copies) falls back to comparing the content hash, never to a CSV parse.
     """
-    raw_dir = pathlib.Path(raw_dir)
-    staged_dir = pathlib.Path(staged_dir)
-    staged_dir.mkdir(parents=True, exist_ok=True)
+    if not entry:
+        return False
+    staged = [staged_dir / p for p in entry.get("parts") or [entry["staged"]]]
+    if not all(p.exists() for p in staged):
+        return False
+    if sum(p.stat().st_size for p in staged) != entry.get("staged_size"):
+        return False
+    st = raw_file.stat()
+    if st.st_size != entry["size"]:
+        return False
+    if _schema_fingerprint(_read_header(raw_file)) != entry["schema"]:
+        return False
+    if st.st_mtime_ns == entry["mtime_ns"]:
+        return True
+    if _file_sha256(raw_file) == entry["sha256"]:
+        entry["mtime_ns"] = st.st_mtime_ns  # remember the new mtime for the fast path
+        return True
+    return False
+
 
-    csv_files: Iterable[pathlib.Path] = sorted(raw_dir.glob("*.csv"))
-    if not any(f.is_file() for f in csv_files):
+def list_raw_files(raw_dir: str | pathlib.Path) -> List[pathlib.Path]:
+    raw_dir = pathlib.Path(raw_dir)
+    csv_files = [f for f in sorted(raw_dir.glob("*.csv")) if f.is_file()]
+    if not csv_files:
         raise FileNotFoundError(f"No CSV files found in {raw_dir.resolve()}")
+    return csv_files
 
-    for file in csv_files:
-        if not file.is_file():
-            continue
-
-        # Temp read just header to decide staged filename, then full read
-        t0 = time.perf_counter()
-        df = _read_one_csv(file)
-        staged_name = _staged_name_for(df, file)
-        out_path = staged_dir / staged_name
-
-        if _should_skip(file, out_path):
-            print(f"[ingest] Skip (up-to-date) {file.name} → {out_path.name}")
-            write_metric(
-                {
-                    "step": "ingest",
-                    "action": "skip",
-                    "src": str(file),
-                    "dst": str(out_path),
-                    "rows": None,
-                    "cols": None,
-                    "elapsed_s": 0.0,
-                }
-            )
-            continue
 
-        df.write_parquet(out_path)
-        elapsed = time.perf_counter() - t0
-        print(
-            f"[ingest] {file.name} → {out_path.name}  "
-            f"{df.height} rows × {df.width} cols in {elapsed:.2f}s"
-        )
+def manifest_key(file: pathlib.Path, raw_dir: pathlib.Path) -> str:
+    """Manifest key of a raw file: its POSIX path relative to raw_dir, so moving the
+    checkout (or staging from another machine) keeps the skip decisions."""
+    return pathlib.Path(file).resolve().relative_to(pathlib.Path(raw_dir).resolve()).as_posix()
+
+
+def ingest_file(
+    file: pathlib.Path,
+    staged_dir: pathlib.Path,
+    entry: Optional[Dict[str, Any]] = None,
+    raw_dir: Optional[pathlib.Path] = None,
+) -> Dict[str, Any]:
+    """
+    Stage one raw CSV unless its manifest `entry` says it is up to date.
+    Never raises: returns {"src", "action": "skip" | "write" | "error", "entry", ...}
+    so one bad file can be reported without stopping the others.
+    """
+    t0 = time.perf_counter()
+    key = manifest_key(file, raw_dir or file.parent)
+    result: Dict[str, Any] = {"src": str(file), "key": key}
+    try:
+        # decide skip / output name from the manifest and the header line alone
+        if _should_skip(file, staged_dir, entry):
+            out_path = staged_dir / entry["staged"]
+            result.update({"action": "skip", "dst": str(out_path), "rows": None, "cols": None})
+            result["entry"] = entry
+        else:
+            columns = _read_header(file)
+            name = _staged_name_for(columns, file)
+            if name.startswith(f"{JOBS_DATASET}/") and "posted_date" in columns:
+                out_path = staged_dir / JOBS_DATASET
+                # pre-partitioning entries only know their single "staged" file
+                old_parts = entry.get("parts") or [entry["staged"]] if entry else []
+                rows, cols, parts = _stage_partitioned(
+                    file, out_path, pathlib.Path(name).name, old_parts
+                )
+            else:
+                out_path = staged_dir / name
+                rows, cols = _stage_one_csv(file, out_path)
+                parts = [name]
+            st = file.stat()
+            result.update({"action": "write", "dst": str(out_path), "rows": rows, "cols": cols})
+            result["parts"] = len(parts)
+            result["entry"] = {
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "sha256": _file_sha256(file),
+                "schema": _schema_fingerprint(columns),
+                "columns": columns,
+                "staged": out_path.relative_to(staged_dir).as_posix(),
+                "parts": parts,
+                "staged_size": sum((staged_dir / p).stat().st_size for p in parts),
+                "rows": rows,
+                "ingested_at": time.time(),
+            }
+    except Exception as exc:
+        result.update({"action": "error", "error": f"{type(exc).__name__}: {exc}"})
+    result["elapsed_s"] = round(time.perf_counter() - t0, 4)
+    return result
+
+
+def record_results(
+    staged_dir: pathlib.Path, results: List[Dict[str, Any]], manifest: Dict[str, Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Log + write_metric each result, persist the manifest; returns the failed results."""
+    failed = []
+    for r in results:
+        name, dst = pathlib.Path(r["src"]).name, pathlib.Path(r.get("dst") or "-").name
+        if r["action"] == "skip":
+            print(f"[ingest] Skip (up-to-date) {name} → {dst}")
+        elif r["action"] == "write":
+            where = f"{dst} ({r['parts']} partitions)" if r.get("parts", 1) > 1 else dst
+            print(
+                f"[ingest] {name} → {where}  "
+                f"{r['rows']} rows × {r['cols']} cols in {r['elapsed_s']:.2f}s"
+            )
+        else:
+            print(f"[ingest] FAILED {name}: {r['error']}")
+            failed.append(r)
+        if r.get("entry"):
+            manifest[r["key"]] = r["entry"]
         write_metric(
             {
                 "step": "ingest",
-                "action": "write",
-                "src": str(file),
-                "dst": str(out_path),
-                "rows": int(df.height),
-                "cols": int(df.width),
-                "elapsed_s": round(elapsed, 3),
+                "action": r["action"],
+                "src": r["src"],
+                "dst": r.get("dst"),
+                "rows": r.get("rows"),
+                "cols": r.get("cols"),
+                "elapsed_s": r["elapsed_s"],
+                **({"error": r["error"]} if "error" in r else {}),
             }
         )
+    _save_manifest(staged_dir, manifest)
+    return failed
+
+
+def ingest_raw_to_stage(
+    raw_dir: str | pathlib.Path,
+    staged_dir: str | pathlib.Path,
+    workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Day 7: performance + reliability
+    - Scans all *.csv in raw_dir lazily with Polars, `workers` files at a time
+    - Light cleanup + date parsing in one plan
+    - Streams staged Parquet (zstd, row-group stats) with the streaming sink; job postings
+      are Hive-partitioned by posted year/month and only the source's own parts are rewritten
+    - Skips files that are already up-to-date (per the ingest manifest, without parsing)
+    - Emits timing metrics to logs/metrics.jsonl; a failed file is reported and the
+      rest still run, then RuntimeError lists the failures
+    """
+    raw_dir, staged_dir = pathlib.Path(raw_dir), pathlib.Path(staged_dir)
+    staged_dir.mkdir(parents=True, exist_ok=True)
+    csv_files = list_raw_files(raw_dir)
+    manifest = load_manifest(staged_dir)
+    workers = max(1, min(workers or INGEST_WORKERS, len(csv_files)))
+
+    t0 = time.perf_counter()
+    # polars releases the GIL while scanning/sinking, so threads overlap real work
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") as pool:
+        results = list(
+            pool.map(
+                lambda f: ingest_file(
+                    f, staged_dir, manifest.get(manifest_key(f, raw_dir)), raw_dir
+                ),
+                csv_files,
+            )
+        )
+    failed = record_results(staged_dir, results, manifest)
+    print(
+        f"[ingest] files={len(results)} workers={workers} failed={len(failed)} "
+        f"elapsed={time.perf_counter() - t0:.2f}s"
+    )
+    if failed:
+        raise RuntimeError(
+            "ingest failed for: " + ", ".join(pathlib.Path(r["src"]).name for r in failed)
+        )
+    return results
 
 
-def main() -> None:
+def main(argv: List[str] | None = None) -> None:
     here = pathlib.Path(__file__).resolve().parents[1]
-    ingest_raw_to_stage(here / "data" / "raw", here / "data" / "staged")
+    ap = argparse.ArgumentParser(description="Stage raw CSVs as Parquet.")
+    ap.add_argument("--raw-dir", type=pathlib.Path, default=here / "data" / "raw")
+    ap.add_argument("--staged-dir", type=pathlib.Path, default=here / "data" / "staged")
+    ap.add_argument("--workers", type=int, default=None, help=f"default {INGEST_WORKERS}")
+    args = ap.parse_args(argv)
+    ingest_raw_to_stage(args.raw_dir, args.staged_dir, args.workers)
 
 
 if __name__ == "__main__":
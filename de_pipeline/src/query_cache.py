@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import pyarrow as pa
+
+# result bytes kept across dashboard reruns and sessions (per process)
+QUERY_CACHE_MB = int(os.environ.get("DE_QUERY_CACHE_MB", "256"))
+
+
+def query_key(sql: str, params: Optional[Dict[str, Any]] = None) -> Tuple[str, str]:
+    """Cache key for a statement: whitespace-normalized SQL plus its parameters."""
+    return " ".join(sql.split()), json.dumps(params or {}, sort_keys=True, default=str)
+
+
+class QueryCache:
+    """
+    LRU of Arrow query results bounded by total bytes. Entries belong to one warehouse
+    build: `sync(build_id)` drops everything once the build id moves on. Each entry
+    remembers how long it took to compute, so hits can report the time they saved.
+    """
+
+    def __init__(self, max_bytes: int = QUERY_CACHE_MB * 1024 * 1024) -> None:
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[pa.Table, float]]" = OrderedDict()
+        self._bytes = 0
+        self.build_id: Optional[str] = None
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self.saved_s = 0.0
+
+    def sync(self, build_id: Optional[str]) -> None:
+        with self._lock:
+            if build_id != self.build_id:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._bytes = 0
+                self.build_id = build_id
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], pa.Table]) -> pa.Table:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_s += entry[1]
+                return entry[0]
+            self.misses += 1
+        # computed outside the lock; two sessions missing the same key both run it once
+        t0 = time.perf_counter()
+        table = compute()
+        elapsed = time.perf_counter() - t0
+        size = table.nbytes
+        with self._lock:
+            if size <= self._max_bytes and key not in self._entries:
+                self._entries[key] = (table, elapsed)
+                self._bytes += size
+                while self._bytes > self._max_bytes:
+                    _, (old, _) = self._entries.popitem(last=False)
+                    self._bytes -= old.nbytes
+                    self.evictions += 1
+        return table
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "build_id": self.build_id,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_s": self.saved_s,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -1,136 +1,508 @@
 from __future__ import annotations
 
+import argparse
+import datetime as dt
+import os
 import time
+import uuid
 import pathlib
-from typing import Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import duckdb
-import polars as pl
+from de_pipeline.src.ingest import JOBS_DATASET, load_manifest, partition_of
 from de_pipeline.src.metrics import write_metric
 
+# DuckDB resources for the build; peak memory is set by the limit, not by the data size
+DUCKDB_THREADS = int(os.environ.get("DE_DUCKDB_THREADS", str(os.cpu_count() or 1)))
+DUCKDB_MEMORY_LIMIT = os.environ.get("DE_DUCKDB_MEMORY_LIMIT", "2GB")
+# spill directory; empty means <warehouse_dir>/.duckdb_tmp
+DUCKDB_TEMP_DIR = os.environ.get("DE_DUCKDB_TEMP_DIR", "")
 
-def _get_staged_file(staged_dir: pathlib.Path) -> pathlib.Path:
-    preferred = staged_dir / "stg_ai_job_market.parquet"
-    if preferred.exists():
-        return preferred
-    files = list(staged_dir.glob("*.parquet"))
-    if not files:
+
+def _get_staged_parts(staged_dir: pathlib.Path) -> List[pathlib.Path]:
+    """
+    Parts of the staged jobs dataset. The ingest manifest already lists them, so
+    thousands of parts cost no directory walk; without it, glob the dataset dir,
+    then fall back to the old single-file layout.
+    """
+    manifest = load_manifest(staged_dir)
+    parts = sorted(
+        {
+            staged_dir / p
+            for e in manifest.values()
+            for p in e.get("parts") or [e.get("staged", "")]
+            if p.startswith(f"{JOBS_DATASET}/")
+        }
+    )
+    if not parts:
+        dataset = staged_dir / JOBS_DATASET
+        # partitioned layout first (skips in-flight .tmp-* dirs), then flat parts
+        parts = sorted(dataset.glob("year=*/month=*/*.parquet")) or sorted(
+            dataset.glob("*.parquet")
+        )
+    if not parts:
+        preferred = staged_dir / "stg_ai_job_market.parquet"
+        parts = [preferred] if preferred.exists() else sorted(staged_dir.glob("*.parquet"))[:1]
+    if not parts:
         raise FileNotFoundError(f"No staged parquet files in {staged_dir.resolve()}")
-    return files[0]
+    return parts
 
 
-def _load_staged_df(staged_path: pathlib.Path) -> pl.DataFrame:
-    df = pl.read_parquet(staged_path)
-    print(f"[transform] Loaded {staged_path.name} ({df.height} rows, {df.width} cols)")
-    return df
+def _prune_parts(
+    parts: List[pathlib.Path], date_from: Optional[dt.date], date_to: Optional[dt.date]
+) -> List[pathlib.Path]:
+    """
+    Keep the parts whose posted month overlaps [date_from, date_to], decided from the
+    Hive path alone. The null-date partition can't match a bound and is dropped;
+    unpartitioned (legacy) parts are kept and left to the row filter.
+    """
+    if date_from is None and date_to is None:
+        return parts
+    lo = (date_from.year, date_from.month) if date_from else (0, 0)
+    hi = (date_to.year, date_to.month) if date_to else (9999, 12)
+    kept = []
+    for p in parts:
+        month = partition_of(p)
+        if month is None and "=" in p.parent.name:
+            continue  # null partition
+        if month is None or lo <= month <= hi:
+            kept.append(p)
+    return kept
 
 
-def _create_dim_tables(con: duckdb.DuckDBPyConnection, cols: Set[str]) -> None:
-    if "company_name" in cols:
-        con.execute(
-            """
-            CREATE OR REPLACE TABLE dim_company AS
-            SELECT ROW_NUMBER() OVER () AS company_id, company_name
-            FROM (SELECT DISTINCT company_name FROM stg_jobs
-                  WHERE company_name IS NOT NULL AND company_name <> '')
-            """
-        )
-        print("[transform] dim_company")
+def _sql_list(paths: List[pathlib.Path]) -> str:
+    # views can't take prepared parameters, so the file list is inlined as a literal
+    return "[" + ", ".join("'" + str(p).replace("'", "''") + "'" for p in paths) + "]"
 
-    if "location" in cols:
-        con.execute(
-            """
-            CREATE OR REPLACE TABLE dim_location AS
-            SELECT ROW_NUMBER() OVER () AS location_id, location
-            FROM (SELECT DISTINCT location FROM stg_jobs
-                  WHERE location IS NOT NULL AND location <> '')
-            """
-        )
-        print("[transform] dim_location")
 
-    if "job_title" in cols and "experience_level" in cols:
+def _register_staged(
+    con: duckdb.DuckDBPyConnection,
+    parts: List[pathlib.Path],
+    date_from: Optional[dt.date] = None,
+    date_to: Optional[dt.date] = None,
+) -> Tuple[List[str], List[pathlib.Path]]:
+    """
+    Define the `stg_jobs` view straight over the staged Parquet; nothing is loaded into
+    Python. A job_id seen in several parts keeps its latest posted_date (ties: later part).
+    Returns the staged columns and the parts left to scan after date pruning.
+    """
+    total = len(parts)
+    parts = _prune_parts(parts, date_from, date_to)
+    if not parts:
+        raise FileNotFoundError(f"No staged partitions between {date_from} and {date_to}")
+    # partition keys live in the path only, so hive parsing stays off
+    src = (
+        f"read_parquet({_sql_list(parts)}, filename = '_part', file_row_number = true, "
+        "hive_partitioning = false, union_by_name = true)"
+    )
+    cols = [
+        d[0]
+        for d in con.execute(f"SELECT * FROM {src} LIMIT 0").description
+        if d[0] not in ("_part", "file_row_number")
+    ]
+    where = []
+    if "posted_date" in cols and date_from:
+        where.append(f"posted_date >= DATE '{date_from.isoformat()}'")
+    if "posted_date" in cols and date_to:
+        where.append(f"posted_date <= DATE '{date_to.isoformat()}'")
+    # pushed into the scan: row groups outside the range are skipped on their stats
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+    if "job_id" in cols:
+        # pick the winning rows on a narrow projection (job_id, posted_date, row address),
+        # then read the full rows once, semi-joined on that address
+        order = "posted_date DESC NULLS LAST, _part DESC" if "posted_date" in cols else "_part DESC"
         con.execute(
-            """
-            CREATE OR REPLACE TABLE dim_job_title AS
-            SELECT ROW_NUMBER() OVER () AS job_title_id, job_title, experience_level
-            FROM (SELECT DISTINCT job_title, experience_level
-                  FROM stg_jobs WHERE job_title IS NOT NULL AND job_title <> '')
+            f"""
+            CREATE OR REPLACE TEMP TABLE stg_keep AS
+            SELECT _part, file_row_number FROM {src} {where_sql}
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY job_id ORDER BY {order}) = 1
             """
         )
-        print("[transform] dim_job_title (with experience_level)")
-    elif "job_title" in cols:
+        body = f"{src} SEMI JOIN stg_keep USING (_part, file_row_number)"
+    else:
+        body = f"{src} {where_sql}"
+    con.execute(
+        f"""
+        CREATE OR REPLACE TEMP VIEW stg_jobs AS
+        SELECT * EXCLUDE (_part, file_row_number) FROM {body}
+        """
+    )
+    rows = con.execute("SELECT COUNT(*) FROM stg_jobs").fetchone()[0]
+    print(
+        f"[transform] Reading {len(parts)}/{total} staged part(s) ({rows} rows, {len(cols)} cols)"
+    )
+    return cols, parts
+
+
+# (table, surrogate key, natural key columns); the first key column must be present
+DIMENSIONS = [
+    ("dim_company", "company_id", ("company_name",)),
+    ("dim_location", "location_id", ("location",)),
+    ("dim_job_title", "job_title_id", ("job_title", "experience_level")),
+]
+# comma-separated list columns: (staged column, dimension, id, member column, bridge table)
+LIST_DIMENSIONS = [
+    ("skills_required", "dim_skill", "skill_id", "skill", "bridge_job_skill"),
+    ("tools_preferred", "dim_tool", "tool_id", "tool", "bridge_job_tool"),
+]
+# dashboard rollup: one row per day × location × company × job_title with its posting count;
+# the grain columns themselves give exact distinct counts for any filter on them
+ROLLUP_TABLE = "rollup_job_postings"
+ROLLUP_GRAIN = ("posted_date", "location", "company_name", "job_title")
+# build bookkeeping in the warehouse itself, so it commits with the data
+STATE_TABLE = "_build_state"
+# the committed build's id, next to the .duckdb file, so readers can spot a new build
+# without opening (and locking) the database
+BUILD_ID_SUFFIX = ".build_id"
+
+
+def _connect(db_path: pathlib.Path) -> duckdb.DuckDBPyConnection:
+    """
+    Warehouse connection with bounded memory: hash joins, aggregates and sorts that
+    outgrow DUCKDB_MEMORY_LIMIT spill to DUCKDB_TEMP_DIR instead of failing.
+    """
+    temp_dir = pathlib.Path(DUCKDB_TEMP_DIR or db_path.parent / ".duckdb_tmp")
+    con = duckdb.connect(str(db_path))
+    con.execute(f"SET threads = {int(DUCKDB_THREADS)}")
+    con.execute("SET memory_limit = ?", [DUCKDB_MEMORY_LIMIT])
+    con.execute("SET temp_directory = ?", [str(temp_dir)])
+    # no ORDER BY anywhere in the build, so rows needn't be buffered to keep scan order
+    con.execute("SET preserve_insertion_order = false")
+    return con
+
+
+def _table_columns(con: duckdb.DuckDBPyConnection, table: str) -> List[str]:
+    rows = con.execute(
+        "SELECT column_name FROM duckdb_columns() "
+        "WHERE table_name = ? AND database_name = current_database() ORDER BY column_index",
+        [table],
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+def _read_state(con: duckdb.DuckDBPyConnection) -> Dict[str, str]:
+    if not _table_columns(con, STATE_TABLE):
+        return {}
+    return dict(con.execute(f"SELECT key, value FROM {STATE_TABLE}").fetchall())
+
+
+def _write_state(con: duckdb.DuckDBPyConnection, state: Dict[str, Any]) -> None:
+    con.execute(
+        f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} (key VARCHAR PRIMARY KEY, value VARCHAR)"
+    )
+    for k, v in state.items():
+        con.execute(f"INSERT OR REPLACE INTO {STATE_TABLE} VALUES (?, ?)", [k, str(v)])
+
+
+def read_build_id(db_path: pathlib.Path) -> Optional[str]:
+    """Id of the last committed build of `db_path`, or None before the first one."""
+    path = pathlib.Path(db_path).with_suffix(BUILD_ID_SUFFIX)
+    return path.read_text(encoding="utf-8").strip() if path.exists() else None
+
+
+def _write_build_id(db_path: pathlib.Path, build_id: str) -> None:
+    path = db_path.with_suffix(BUILD_ID_SUFFIX)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(build_id, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _dimensions(cols: Set[str]) -> List[Tuple[str, str, List[str]]]:
+    return [
+        (table, id_col, [k for k in keys if k in cols])
+        for table, id_col, keys in DIMENSIONS
+        if keys[0] in cols
+    ]
+
+
+def _exploded(source: str, col: str, member: str) -> str:
+    """(job_id, member) rows of a comma-separated list column, one per non-empty item."""
+    return (
+        f"(SELECT job_id, {member} FROM "
+        f"(SELECT job_id, trim(unnest(string_split({col}, ','))) AS {member} FROM {source}) "
+        f"WHERE {member} <> '')"
+    )
+
+
+def _merge_dim(
+    con: duckdb.DuckDBPyConnection,
+    table: str,
+    id_col: str,
+    keys: List[str],
+    source: str = "stg_jobs",
+) -> int:
+    """
+    Append members of `source` not yet in `table`, numbered after the current max id,
+    so an id once assigned never changes. Returns the number of new members.
+    """
+    key_sql = ", ".join(keys)
+    existing = _table_columns(con, table)
+    if existing and existing != [id_col, *keys]:
+        print(f"[transform] {table}: natural key changed, rebuilding (ids are reassigned)")
+        con.execute(f"DROP TABLE {table}")
+        existing = []
+    if not existing:
         con.execute(
-            """
-            CREATE OR REPLACE TABLE dim_job_title AS
-            SELECT ROW_NUMBER() OVER () AS job_title_id, job_title
-            FROM (SELECT DISTINCT job_title
-                  FROM stg_jobs WHERE job_title IS NOT NULL AND job_title <> '')
-            """
+            f"CREATE TABLE {table} AS SELECT 0::BIGINT AS {id_col}, {key_sql} FROM {source} LIMIT 0"
         )
-        print("[transform] dim_job_title")
+    match = " AND ".join(f"d.{k} IS NOT DISTINCT FROM s.{k}" for k in keys)
+    added = con.execute(
+        f"""
+        INSERT INTO {table}
+        SELECT (SELECT COALESCE(MAX({id_col}), 0) FROM {table})
+               + ROW_NUMBER() OVER (ORDER BY {key_sql}), {key_sql}
+        FROM (SELECT DISTINCT {key_sql} FROM {source}
+              WHERE {keys[0]} IS NOT NULL AND {keys[0]} <> '') s
+        WHERE NOT EXISTS (SELECT 1 FROM {table} d WHERE {match})
+        """
+    ).fetchone()[0]
+    print(f"[transform] {table} (+{added} new, key: {key_sql})")
+    return int(added)
 
 
-def _create_fact_table(con: duckdb.DuckDBPyConnection, cols: Set[str]) -> None:
+def _stage_fact(con: duckdb.DuckDBPyConnection, dims: List[Tuple[str, str, List[str]]]) -> None:
+    """stg_jobs joined to the dimension ids, plus a hash of the staged row for change detection."""
     select_parts = ["j.*"]
     joins = []
+    for i, (table, id_col, keys) in enumerate(dims):
+        on = " AND ".join(f"j.{k} IS NOT DISTINCT FROM d{i}.{k}" for k in keys)
+        select_parts.append(f"d{i}.{id_col}")
+        joins.append(f"LEFT JOIN {table} d{i} ON {on}")
+    select_parts.append("md5(j::VARCHAR) AS row_hash")
+    con.execute(
+        f"""
+        CREATE OR REPLACE TEMP VIEW stg_fact AS
+        SELECT {", ".join(select_parts)} FROM stg_jobs j {' '.join(joins)}
+        """
+    )
+
 
-    if "company_name" in cols:
-        select_parts.append("dc.company_id")
-        joins.append("LEFT JOIN dim_company dc ON j.company_name = dc.company_name")
+def _write_fact(con: duckdb.DuckDBPyConnection, incremental: bool) -> Dict[str, int]:
+    """
+    Replace fact_job_postings with stg_fact, or (incremental) MERGE it in on job_id:
+    new job_ids are inserted, rows whose hash changed are updated unless the stored
+    posting is newer, unchanged rows are not touched.
+    """
+    stg_cols = [d[0] for d in con.execute("SELECT * FROM stg_fact LIMIT 0").description]
+    if not incremental or "job_id" not in stg_cols:
+        con.execute("CREATE OR REPLACE TABLE fact_job_postings AS SELECT * FROM stg_fact")
+        rows = con.execute("SELECT COUNT(*) FROM fact_job_postings").fetchone()[0]
+        return {"inserted": int(rows), "updated": 0}
 
-    if "location" in cols:
-        select_parts.append("dl.location_id")
-        joins.append("LEFT JOIN dim_location dl ON j.location = dl.location")
+    # same job_id seen again: the later posting wins, as in a full build's dedup
+    newer = (
+        " AND coalesce(s.posted_date >= f.posted_date, true)" if "posted_date" in stg_cols else ""
+    )
+    actions = con.execute(
+        f"""
+        MERGE INTO fact_job_postings f USING stg_fact s ON f.job_id = s.job_id
+        WHEN MATCHED AND f.row_hash <> s.row_hash{newer} THEN UPDATE
+        WHEN NOT MATCHED THEN INSERT
+        RETURNING merge_action
+        """
+    ).fetchall()
+    return {
+        "inserted": sum(a == "INSERT" for (a,) in actions),
+        "updated": sum(a == "UPDATE" for (a,) in actions),
+    }
 
-    if "job_title" in cols:
-        select_parts.append("djt.job_title_id")
-        joins.append("LEFT JOIN dim_job_title djt ON j.job_title = djt.job_title")
 
-    sql = f"""
-        CREATE OR REPLACE TABLE fact_job_postings AS
-        SELECT {", ".join(select_parts)} FROM stg_jobs j {' '.join(joins)}
+def _fact_columns(cols: List[str], dims: List[Tuple[str, str, List[str]]]) -> List[str]:
+    return [*cols, *(id_col for _, id_col, _ in dims), "row_hash"]
+
+
+def _write_bridges(con: duckdb.DuckDBPyConnection, cols: List[str], incremental: bool) -> None:
+    """
+    Job ↔ skill / tool bridges from the fact rows, so list filters are integer-key joins.
+    Incremental builds only replace the rows of the job_ids in this build's delta.
+    """
+    if "job_id" not in cols:
+        return
+    for col, dim, id_col, member, bridge in LIST_DIMENSIONS:
+        if col not in cols:
+            continue
+        if incremental and _table_columns(con, bridge):
+            con.execute(f"DELETE FROM {bridge} WHERE job_id IN (SELECT job_id FROM stg_jobs)")
+            src = "(SELECT * FROM fact_job_postings WHERE job_id IN (SELECT job_id FROM stg_jobs))"
+            head = f"INSERT INTO {bridge}"
+        else:
+            src, head = "fact_job_postings", f"CREATE OR REPLACE TABLE {bridge} AS"
+        con.execute(
+            f"""
+            {head}
+            SELECT DISTINCT e.job_id, d.{id_col}
+            FROM {_exploded(src, col, member)} e JOIN {dim} d USING ({member})
+            """
+        )
+        print(f"[transform] {bridge}")
+
+
+def _rollup_days(con: duckdb.DuckDBPyConnection) -> None:
+    """Days an incremental merge can change: the delta's dates and the dates it moves rows off."""
+    con.execute(
+        """
+        CREATE OR REPLACE TEMP TABLE rollup_days AS
+        SELECT posted_date FROM stg_jobs
+        UNION
+        SELECT f.posted_date FROM fact_job_postings f
+        WHERE f.job_id IN (SELECT job_id FROM stg_jobs)
+        """
+    )
+
+
+def _write_rollup(con: duckdb.DuckDBPyConnection, cols: List[str], incremental: bool) -> None:
+    """
+    (Re)build the rollup from the fact table. Incremental builds only recompute the
+    days in `rollup_days`, so the cost follows the delta rather than the history.
     """
-    con.execute(sql)
-    print("[transform] fact_job_postings")
+    grain = [c for c in ROLLUP_GRAIN if c in cols]
+    if "posted_date" not in grain:
+        return
+    grain_sql = ", ".join(grain)
+    select = f"SELECT {grain_sql}, COUNT(*) AS postings FROM fact_job_postings"
+    if incremental and _table_columns(con, ROLLUP_TABLE) == [*grain, "postings"]:
+        days = "posted_date IN (SELECT posted_date FROM rollup_days)"
+        if con.execute("SELECT COUNT(*) FROM rollup_days WHERE posted_date IS NULL").fetchone()[0]:
+            days = f"({days} OR posted_date IS NULL)"
+        con.execute(f"DELETE FROM {ROLLUP_TABLE} WHERE {days}")
+        con.execute(f"INSERT INTO {ROLLUP_TABLE} {select} WHERE {days} GROUP BY {grain_sql}")
+    else:
+        con.execute(f"CREATE OR REPLACE TABLE {ROLLUP_TABLE} AS {select} GROUP BY {grain_sql}")
+    print(f"[transform] {ROLLUP_TABLE} ({grain_sql})")
 
 
-def build_models(warehouse_dir: str | pathlib.Path) -> None:
+def build_models(
+    warehouse_dir: str | pathlib.Path,
+    staged_dir: str | pathlib.Path | None = None,
+    date_from: Optional[dt.date] = None,
+    date_to: Optional[dt.date] = None,
+    incremental: bool = False,
+) -> Dict[str, Any]:
+    """
+    Build the dim/fact warehouse from the staged jobs dataset. With `date_from` /
+    `date_to` (inclusive), only the posted-month partitions overlapping the range are
+    read and the warehouse holds just those postings.
+
+    Dimension ids are stable: existing members keep their id, new ones are appended.
+    With `incremental`, only staged parts written since the last build's high-water
+    mark are read and merged into the fact table. Postings dropped from a re-ingested
+    source are not deleted until the next full build. After a date-bounded build the
+    next incremental one runs as a full build, since the mark covers unread months.
+    """
+    if incremental and (date_from or date_to):
+        raise ValueError("a date-bounded build is always a full build")
     here = pathlib.Path(__file__).resolve().parents[1]
-    staged_dir = here / "data" / "staged"
-    staged_path = _get_staged_file(staged_dir)
-    df = _load_staged_df(staged_path)
-    cols = set(df.columns)
+    staged_dir = pathlib.Path(staged_dir) if staged_dir else here / "data" / "staged"
+    parts = _get_staged_parts(staged_dir)
+    mtimes = {p: p.stat().st_mtime_ns for p in parts}
 
     warehouse_dir = pathlib.Path(warehouse_dir)
     warehouse_dir.mkdir(parents=True, exist_ok=True)
     db_path = warehouse_dir / "warehouse.duckdb"
 
     t0 = time.perf_counter()
-    con = duckdb.connect(str(db_path))
-    con.execute("PRAGMA threads = 4")  # tweak if you want, DuckDB auto-scales too
-    con.register("stg_jobs", df.to_arrow())
+    con = _connect(db_path)
+    try:
+        state = _read_state(con)
+        if incremental and (state.get("date_from") or state.get("date_to")):
+            print("[transform] last build was date-bounded, doing a full build")
+            incremental = False
+        hwm = 0
+        if incremental and _table_columns(con, "fact_job_postings"):
+            hwm = int(state.get("staged_hwm_ns", 0))
+        build_id = state.get("build_id")
+        delta = [p for p in parts if mtimes[p] > hwm]
+        mode = "incremental" if incremental else "full"
+        print(f"[transform] mode={mode} parts={len(delta)}/{len(parts)} changed since last build")
 
-    _create_dim_tables(con, cols)
-    _create_fact_table(con, cols)
+        counts = {"inserted": 0, "updated": 0}
+        scanned: List[pathlib.Path] = []
+        if delta:
+            con.execute("BEGIN TRANSACTION")
+            try:
+                cols, scanned = _register_staged(con, delta, date_from, date_to)
+                dims = _dimensions(set(cols))
+                fact_cols = _table_columns(con, "fact_job_postings")
+                if incremental and (fact_cols != _fact_columns(cols, dims) or "job_id" not in cols):
+                    # first build, the staged schema changed or no key to merge on
+                    if fact_cols:
+                        print("[transform] fact_job_postings schema differs, doing a full build")
+                    incremental, mode = False, "full"
+                    if len(delta) < len(parts):
+                        delta = parts
+                        cols, scanned = _register_staged(con, parts, date_from, date_to)
+                        dims = _dimensions(set(cols))
+                for table, id_col, keys in dims:
+                    _merge_dim(con, table, id_col, keys)
+                for col, dim, id_col, member, _ in LIST_DIMENSIONS:
+                    if col in cols and "job_id" in cols:
+                        _merge_dim(con, dim, id_col, [member], _exploded("stg_jobs", col, member))
+                _stage_fact(con, dims)
+                if incremental and "posted_date" in cols:
+                    _rollup_days(con)
+                counts = _write_fact(con, incremental)
+                _write_bridges(con, cols, incremental)
+                _write_rollup(con, cols, incremental)
+                build_id = uuid.uuid4().hex
+                _write_state(
+                    con,
+                    {
+                        "build_id": build_id,
+                        "staged_hwm_ns": max(mtimes.values()),
+                        "built_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+                        "mode": mode,
+                        # a bounded warehouse holds only this range; see the check above
+                        "date_from": date_from.isoformat() if date_from else "",
+                        "date_to": date_to.isoformat() if date_to else "",
+                    },
+                )
+                con.execute("COMMIT")
+            except BaseException:
+                # leave the previous warehouse and build id as they were
+                con.execute("ROLLBACK")
+                raise
+            print(
+                f"[transform] fact_job_postings "
+                f"(+{counts['inserted']} inserted, ~{counts['updated']} updated)"
+            )
 
-    fact_rows = con.execute("SELECT COUNT(*) FROM fact_job_postings").fetchone()[0]
-    con.close()
+        fact_rows = con.execute("SELECT COUNT(*) FROM fact_job_postings").fetchone()[0]
+    finally:
+        con.close()
+    if build_id:
+        _write_build_id(db_path, build_id)
     elapsed = time.perf_counter() - t0
 
     print(f"[transform] rows={fact_rows} elapsed={elapsed:.2f}s")
+    summary = {
+        "mode": mode,
+        "build_id": build_id,
+        "parts_read": len(scanned),
+        "parts_total": len(parts),
+        **counts,
+        "rows_fact_job_postings": int(fact_rows),
+    }
     write_metric(
-        {
-            "step": "transform",
-            "db": str(db_path),
-            "rows_fact_job_postings": int(fact_rows),
-            "elapsed_s": round(elapsed, 3),
-        }
+        {"step": "transform", "db": str(db_path), **summary, "elapsed_s": round(elapsed, 3)}
     )
+    return summary
 
 
-def main() -> None:
+def main(argv: List[str] | None = None) -> None:
     here = pathlib.Path(__file__).resolve().parents[1]
-    build_models(here / "duckdb")
+    ap = argparse.ArgumentParser(description="Build the DuckDB warehouse from staged Parquet.")
+    ap.add_argument("--warehouse-dir", type=pathlib.Path, default=here / "duckdb")
+    ap.add_argument("--staged-dir", type=pathlib.Path, default=here / "data" / "staged")
+    ap.add_argument("--from", dest="date_from", type=dt.date.fromisoformat, default=None)
+    ap.add_argument("--to", dest="date_to", type=dt.date.fromisoformat, default=None)
+    ap.add_argument(
+        "--incremental", action="store_true", help="merge only parts staged since the last build"
+    )
+    args = ap.parse_args(argv)
+    build_models(
+        args.warehouse_dir, args.staged_dir, args.date_from, args.date_to, args.incremental
+    )
 
 
 if __name__ == "__main__":
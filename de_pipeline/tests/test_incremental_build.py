@@ -0,0 +1,196 @@
+from __future__ import annotations
+import pathlib
+
+import duckdb
+import pytest
+
+from de_pipeline.src.ingest import ingest_raw_to_stage
+from de_pipeline.src.transform import build_models
+
+HEADER = "job_id,company_name,job_title,experience_level,location,posted_date\n"
+
+
+def _rows(wh: pathlib.Path, sql: str) -> list:
+    con = duckdb.connect(str(wh / "warehouse.duckdb"), read_only=True)
+    try:
+        return con.execute(sql).fetchall()
+    finally:
+        con.close()
+
+
+def test_incremental_merge_keeps_ids_and_reads_only_the_delta(tmp_path: pathlib.Path) -> None:
+    raw, staged, wh = tmp_path / "raw", tmp_path / "staged", tmp_path / "wh"
+    raw.mkdir()
+    (raw / "a.csv").write_text(
+        HEADER
+        + "1,Zeta,Data Engineer,Mid,NYC,2025-01-05\n"
+        + "2,Acme,Data Engineer,Senior,SF,2025-01-06\n"
+    )
+    ingest_raw_to_stage(raw, staged)
+    first = build_models(wh, staged, incremental=True)
+    assert (first["inserted"], first["parts_read"]) == (2, 1)
+    companies = dict(_rows(wh, "SELECT company_name, company_id FROM dim_company"))
+    titles = _rows(wh, "SELECT job_title_id, job_title, experience_level FROM dim_job_title")
+
+    # nothing staged since: nothing read
+    assert build_models(wh, staged, incremental=True)["parts_read"] == 0
+
+    (raw / "b.csv").write_text(
+        HEADER
+        + "2,Acme,Staff Data Engineer,Senior,SF,2025-02-01\n"  # newer posting of job 2
+        + "1,Zeta,Old Title,Mid,NYC,2024-12-01\n"  # older posting of job 1: ignored
+        + "3,Beta,Analyst,Junior,Austin,2025-02-03\n"
+    )
+    ingest_raw_to_stage(raw, staged)
+    second = build_models(wh, staged, incremental=True)
+    # only b.csv's parts (2024-12, 2025-02) are read; a.csv's part is older than the mark
+    assert (second["parts_read"], second["parts_total"]) == (2, 3)
+    assert (second["inserted"], second["updated"]) == (1, 1)
+
+    new_companies = dict(_rows(wh, "SELECT company_name, company_id FROM dim_company"))
+    assert {k: new_companies[k] for k in companies} == companies
+    assert new_companies["Beta"] == max(companies.values()) + 1
+    assert set(titles) <= set(
+        _rows(wh, "SELECT job_title_id, job_title, experience_level FROM dim_job_title")
+    )
+    facts = _rows(wh, "SELECT job_id, job_title, company_id FROM fact_job_postings ORDER BY 1")
+    assert facts == [
+        (1, "Data Engineer", companies["Zeta"]),
+        (2, "Staff Data Engineer", companies["Acme"]),
+        (3, "Analyst", new_companies["Beta"]),
+    ]
+
+
+def test_incremental_result_matches_full_build(tmp_path: pathlib.Path) -> None:
+    raw, staged = tmp_path / "raw", tmp_path / "staged"
+    raw.mkdir()
+    (raw / "a.csv").write_text(HEADER + "1,Acme,DE,Mid,NYC,2025-01-05\n")
+    ingest_raw_to_stage(raw, staged)
+    build_models(tmp_path / "inc", staged, incremental=True)
+    (raw / "b.csv").write_text(
+        HEADER + "1,Acme,DE,Senior,NYC,2025-03-05\n2,Beta,ML,Mid,SF,2025-03-07\n"
+    )
+    ingest_raw_to_stage(raw, staged)
+    build_models(tmp_path / "inc", staged, incremental=True)
+    build_models(tmp_path / "full", staged)
+
+    sql = "SELECT * EXCLUDE (company_id, location_id, job_title_id) FROM fact_job_postings"
+    assert sorted(_rows(tmp_path / "inc", sql)) == sorted(_rows(tmp_path / "full", sql))
+    # every fact row resolves to exactly one title member (title + level)
+    counts = _rows(tmp_path / "full", "SELECT COUNT(*), COUNT(job_title_id) FROM fact_job_postings")
+    assert counts == [(2, 2)]
+
+
+def test_build_runs_in_duckdb_under_configured_limits(tmp_path: pathlib.Path, monkeypatch) -> None:
+    from de_pipeline.src import transform
+
+    raw, staged, wh = tmp_path / "raw", tmp_path / "staged", tmp_path / "wh"
+    raw.mkdir()
+    rows = "".join(
+        f"{i},Co{i % 97},T{i % 13},Mid,City{i % 31},2025-01-{1 + i % 28:02d}\n"
+        for i in range(50_000)
+    )
+    (raw / "jobs.csv").write_text(HEADER + rows)
+    ingest_raw_to_stage(raw, staged)
+
+    monkeypatch.setattr(transform, "DUCKDB_THREADS", 2)
+    monkeypatch.setattr(transform, "DUCKDB_MEMORY_LIMIT", "64MB")
+    monkeypatch.setattr(transform, "DUCKDB_TEMP_DIR", str(tmp_path / "spill"))
+    con = transform._connect(tmp_path / "probe.duckdb")
+    settings = con.execute(
+        "SELECT current_setting('threads'), current_setting('memory_limit'), "
+        "current_setting('temp_directory')"
+    ).fetchone()
+    con.close()
+    assert settings[0] == 2 and settings[1].startswith("61.0 MiB")
+    assert settings[2] == str(tmp_path / "spill")
+
+    summary = build_models(wh, staged)
+    assert summary["rows_fact_job_postings"] == 50_000
+    assert _rows(wh, "SELECT COUNT(DISTINCT company_id) FROM fact_job_postings") == [(97,)]
+
+
+def test_rollup_tracks_the_fact_table_across_incremental_merges(tmp_path: pathlib.Path) -> None:
+    raw, staged, wh = tmp_path / "raw", tmp_path / "staged", tmp_path / "wh"
+    raw.mkdir()
+    (raw / "a.csv").write_text(
+        HEADER
+        + "1,Acme,DE,Mid,NYC,2025-01-05\n"
+        + "2,Acme,DE,Mid,NYC,2025-01-05\n"
+        + "3,Beta,ML,Mid,SF,2025-01-06\n"
+        + "4,Beta,ML,Mid,SF,\n"
+    )
+    ingest_raw_to_stage(raw, staged)
+    build_models(wh, staged, incremental=True)
+    # job 2 moves to a later day (leaving 01-05), job 5 is new
+    (raw / "b.csv").write_text(
+        HEADER + "2,Acme,DE,Mid,NYC,2025-01-07\n5,Gamma,DA,Mid,NYC,2025-01-05\n"
+    )
+    ingest_raw_to_stage(raw, staged)
+    build_models(wh, staged, incremental=True)
+
+    grain = "posted_date, location, company_name, job_title"
+    rollup = _rows(wh, f"SELECT {grain}, postings FROM rollup_job_postings ORDER BY ALL")
+    fact = _rows(wh, f"SELECT {grain}, COUNT(*) FROM fact_job_postings GROUP BY ALL ORDER BY ALL")
+    assert rollup == fact
+    assert sum(r[-1] for r in rollup) == 5
+
+
+def test_incremental_build_after_a_bounded_one_reads_every_month(tmp_path: pathlib.Path) -> None:
+    import datetime as dt
+
+    raw, staged, wh = tmp_path / "raw", tmp_path / "staged", tmp_path / "wh"
+    raw.mkdir()
+    (raw / "a.csv").write_text(
+        HEADER + "1,Acme,DE,Mid,NYC,2025-01-05\n2,Beta,ML,Mid,SF,2025-03-07\n"
+    )
+    ingest_raw_to_stage(raw, staged)
+    bounded = build_models(wh, staged, date_from=dt.date(2025, 3, 1))
+    # only the March part is scanned, not every part staged
+    assert (bounded["parts_read"], bounded["parts_total"]) == (1, 2)
+    assert bounded["rows_fact_job_postings"] == 1
+
+    # nothing was staged since, but January was never loaded: the mark can't be trusted
+    after = build_models(wh, staged, incremental=True)
+    assert (after["mode"], after["parts_read"], after["rows_fact_job_postings"]) == ("full", 2, 2)
+    assert build_models(wh, staged, incremental=True)["parts_read"] == 0
+
+
+def test_failed_merge_rolls_back_and_keeps_the_build_id(
+    tmp_path: pathlib.Path, monkeypatch
+) -> None:
+    from de_pipeline.src import transform
+
+    raw, staged, wh = tmp_path / "raw", tmp_path / "staged", tmp_path / "wh"
+    raw.mkdir()
+    (raw / "a.csv").write_text(HEADER + "1,Acme,DE,Mid,NYC,2025-01-05\n")
+    ingest_raw_to_stage(raw, staged)
+    first = build_models(wh, staged, incremental=True)
+    (raw / "b.csv").write_text(HEADER + "2,Beta,ML,Mid,SF,2025-02-07\n")
+    ingest_raw_to_stage(raw, staged)
+
+    opened = []
+    real_connect = transform._connect
+
+    def connect(db_path):
+        opened.append(real_connect(db_path))
+        return opened[-1]
+
+    def broken_bridges(con, cols, incremental):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(transform, "_connect", connect)
+    monkeypatch.setattr(transform, "_write_bridges", broken_bridges)
+    with pytest.raises(RuntimeError):
+        build_models(wh, staged, incremental=True)
+
+    # the connection was closed and the merged fact and dimension rows rolled back
+    with pytest.raises(duckdb.ConnectionException):
+        opened[0].execute("SELECT 1")
+    assert _rows(wh, "SELECT job_id FROM fact_job_postings") == [(1,)]
+    assert _rows(wh, "SELECT company_name FROM dim_company") == [("Acme",)]
+    state = dict(_rows(wh, f"SELECT key, value FROM {transform.STATE_TABLE}"))
+    assert state["build_id"] == first["build_id"]
+    assert transform.read_build_id(wh / "warehouse.duckdb") == first["build_id"]
+    monkeypatch.undo()
+    assert build_models(wh, staged, incremental=True)["inserted"] == 1
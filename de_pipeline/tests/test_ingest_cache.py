@@ -1,4 +1,5 @@
 from __future__ import annotations
+import os
 import pathlib
 import time
 
@@ -16,13 +17,90 @@ def test_ingest_skip_when_up_to_date(tmp_path: pathlib.Path) -> None:
     # stage once
     ingest_raw_to_stage(RAW, STAGED)
     # capture mtimes
-    staged_files = list(STAGED.glob("*.parquet"))
+    staged_files = list(STAGED.rglob("*.parquet"))
     assert staged_files, "no staged files after ingest"
-    before = {p.name: p.stat().st_mtime for p in staged_files}
+    # partitioned parts share file names across year=/month= dirs, so key by relative path
+    before = {p.relative_to(STAGED): p.stat().st_mtime for p in staged_files}
+    assert len(before) == len(staged_files)
 
     # re-run quickly; should skip (mtime unchanged)
     time.sleep(0.5)
     ingest_raw_to_stage(RAW, STAGED)
-    after = {p.name: p.stat().st_mtime for p in staged_files}
+    after = {p.relative_to(STAGED): p.stat().st_mtime for p in STAGED.rglob("*.parquet")}
 
+    assert len(after) == len(staged_files)
     assert before == after, "staged files should be unchanged when raw is older"
+
+
+CSV = "job_id,company_name,job_title,posted_date\n1,Acme, Data Engineer ,2025-01-02\n"
+
+
+def test_skip_decided_from_manifest_without_parsing(tmp_path: pathlib.Path, monkeypatch) -> None:
+    from de_pipeline.src import ingest
+
+    raw, staged = tmp_path / "raw", tmp_path / "staged"
+    raw.mkdir()
+    src = raw / "jobs.csv"
+    src.write_text(CSV)
+    ingest.ingest_raw_to_stage(raw, staged)
+    # keyed relative to raw_dir, not by absolute path
+    ((key, entry),) = ingest.load_manifest(staged).items()
+    assert key == "jobs.csv"
+    assert entry["parts"] == ["stg_ai_job_market/year=2025/month=1/part-jobs.parquet"]
+    assert entry["rows"] == 1
+
+    def _no_parse(path):
+        raise AssertionError("up-to-date input must not be parsed")
+
+    monkeypatch.setattr(ingest, "_scan_one_csv", _no_parse)
+    ingest.ingest_raw_to_stage(raw, staged)
+
+    # a new mtime with the same bytes (e.g. git checkout) is still a skip
+    later = time.time() + 60
+    os.utime(src, (later, later))
+    ingest.ingest_raw_to_stage(raw, staged)
+
+    # so does the same tree moved elsewhere
+    moved = tmp_path / "moved"
+    moved.mkdir()
+    raw, staged = raw.rename(moved / "raw"), staged.rename(moved / "staged")
+    src = raw / "jobs.csv"
+    ingest.ingest_raw_to_stage(raw, staged)
+    monkeypatch.undo()
+
+    # changed content is re-staged
+    src.write_text(CSV.replace("Acme", "Zeta"))
+    ingest.ingest_raw_to_stage(raw, staged)
+    new_entry = next(iter(ingest.load_manifest(staged).values()))
+    assert new_entry["sha256"] != entry["sha256"]
+
+
+@pytest.mark.skipif(not any(RAW.glob("*.csv")), reason="no raw csvs present")
+def test_streaming_ingest_matches_eager_read(tmp_path: pathlib.Path) -> None:
+    import polars as pl
+    from polars.testing import assert_frame_equal
+
+    from de_pipeline.src.ingest import _read_one_csv, _stage_one_csv
+
+    src = sorted(RAW.glob("*.csv"))[0]
+    out = tmp_path / "staged.parquet"
+    rows, cols = _stage_one_csv(src, out)
+    eager = _read_one_csv(src)
+    assert (rows, cols) == eager.shape
+    assert_frame_equal(pl.read_parquet(out), eager)
+
+
+def test_parallel_ingest_reports_failures_per_file(tmp_path: pathlib.Path) -> None:
+    from de_pipeline.src.ingest import ingest_raw_to_stage, load_manifest
+
+    raw, staged = tmp_path / "raw", tmp_path / "staged"
+    raw.mkdir()
+    for region in ("east", "west", "north"):
+        (raw / f"{region}.csv").write_text(f"region,value\n{region},1\n{region},2\n")
+    (raw / "broken.csv").write_text("region,value\nsouth,1,extra,fields\n")
+
+    with pytest.raises(RuntimeError, match="broken.csv"):
+        ingest_raw_to_stage(raw, staged, workers=3)
+
+    staged_names = {e["staged"] for e in load_manifest(staged).values()}
+    assert staged_names == {"stg_east.parquet", "stg_west.parquet", "stg_north.parquet"}
@@ -0,0 +1,65 @@
+from __future__ import annotations
+import datetime as dt
+import pathlib
+
+import pyarrow as pa
+
+from de_pipeline.src.ingest import ingest_raw_to_stage
+from de_pipeline.src.query_cache import QueryCache, query_key
+from de_pipeline.src.transform import build_models, read_build_id
+
+
+def _table(n: int) -> pa.Table:
+    return pa.table({"x": pa.array(range(n), type=pa.int64())})
+
+
+def test_hits_evictions_and_invalidation() -> None:
+    one = _table(1000).nbytes
+    cache = QueryCache(max_bytes=int(2.5 * one))
+    cache.sync("b1")
+    calls = []
+
+    def compute(key: str):
+        return lambda: calls.append(key) or _table(1000)
+
+    for key in ("a", "b", "a", "c", "a", "b"):
+        cache.get_or_compute(key, compute(key))
+    # a, b miss; a hits; c evicts b (least recently used); a hits; b misses again
+    assert calls == ["a", "b", "c", "b"]
+    s = cache.stats()
+    assert (s["hits"], s["misses"], s["evictions"], s["entries"]) == (2, 4, 2, 2)
+    assert s["bytes"] <= s["max_bytes"] and s["saved_s"] >= 0
+
+    cache.sync("b1")  # same build: kept
+    assert cache.stats()["entries"] == 2
+    cache.sync("b2")  # new build: dropped
+    assert cache.stats()["entries"] == 0 and cache.stats()["invalidations"] == 1
+
+    # a result bigger than the whole cache is returned but not kept
+    assert cache.get_or_compute("big", lambda: _table(10_000)).num_rows == 10_000
+    assert cache.stats()["entries"] == 0
+
+
+def test_query_key_normalizes_sql_and_params() -> None:
+    sql = "SELECT *\n  FROM t WHERE d BETWEEN $start AND $end"
+    params = {"end": dt.date(2025, 2, 1), "start": dt.date(2025, 1, 1)}
+    assert query_key(sql, params) == query_key(
+        " ".join(sql.split()), dict(reversed(params.items()))
+    )
+    assert query_key(sql, params) != query_key(sql, {**params, "end": dt.date(2025, 3, 1)})
+
+
+def test_build_id_changes_only_when_the_warehouse_does(tmp_path: pathlib.Path) -> None:
+    raw, staged, wh = tmp_path / "raw", tmp_path / "staged", tmp_path / "wh"
+    raw.mkdir()
+    (raw / "a.csv").write_text("job_id,company_name,job_title,posted_date\n1,Acme,DE,2025-01-05\n")
+    ingest_raw_to_stage(raw, staged)
+    db = wh / "warehouse.duckdb"
+    assert read_build_id(db) is None
+
+    first = build_models(wh, staged, incremental=True)["build_id"]
+    assert read_build_id(db) == first
+    # nothing new staged: same build
+    assert build_models(wh, staged, incremental=True)["build_id"] == first
+    assert build_models(wh, staged)["build_id"] != first
+    assert read_build_id(db) != first
@@ -0,0 +1,81 @@
+from __future__ import annotations
+import pathlib
+
+import datetime as dt
+
+import duckdb
+import polars as pl
+
+from de_pipeline.src.ingest import ingest_raw_to_stage, load_manifest
+from de_pipeline.src.transform import build_models
+
+HEADER = "job_id,company_name,job_title,location,posted_date\n"
+
+
+def test_one_part_per_raw_file_and_latest_posting_wins(tmp_path: pathlib.Path) -> None:
+    raw, staged, wh = tmp_path / "raw", tmp_path / "staged", tmp_path / "wh"
+    raw.mkdir()
+    (raw / "us.csv").write_text(
+        HEADER + "1,Acme,Data Engineer,NYC,2025-01-01\n2,Beta,ML Engineer,SF,2025-02-01\n"
+    )
+    (raw / "eu.csv").write_text(
+        HEADER + "1,Acme,Staff Data Engineer,NYC,2025-03-01\n3,Gamma,Analyst,Berlin,2025-01-15\n"
+    )
+    ingest_raw_to_stage(raw, staged, workers=2)
+
+    parts = sorted(p for e in load_manifest(staged).values() for p in e["parts"])
+    assert parts == [
+        "stg_ai_job_market/year=2025/month=1/part-eu.parquet",
+        "stg_ai_job_market/year=2025/month=1/part-us.parquet",
+        "stg_ai_job_market/year=2025/month=2/part-us.parquet",
+        "stg_ai_job_market/year=2025/month=3/part-eu.parquet",
+    ]
+
+    build_models(wh, staged)
+    con = duckdb.connect(str(wh / "warehouse.duckdb"), read_only=True)
+    rows = con.execute("SELECT job_id, job_title FROM fact_job_postings ORDER BY job_id").fetchall()
+    con.close()
+    assert rows == [(1, "Staff Data Engineer"), (2, "ML Engineer"), (3, "Analyst")]
+
+
+def test_reingest_rewrites_only_its_own_partitions(tmp_path: pathlib.Path) -> None:
+    raw, staged = tmp_path / "raw", tmp_path / "staged"
+    raw.mkdir()
+    (raw / "a.csv").write_text(HEADER + "1,Acme,DE,NYC,2025-01-05\n2,Acme,DE,NYC,2025-02-05\n")
+    (raw / "b.csv").write_text(HEADER + "3,Beta,ML,SF,2025-01-09\n4,Beta,ML,SF,not a date\n")
+    ingest_raw_to_stage(raw, staged)
+    dataset = staged / "stg_ai_job_market"
+    b_jan = dataset / "year=2025" / "month=1" / "part-b.parquet"
+    assert (dataset / "year=__HIVE_DEFAULT_PARTITION__").is_dir()
+    # partition keys live in the path; files keep every source column
+    assert pl.read_parquet(b_jan).columns == HEADER.strip().split(",")
+    b_mtime = b_jan.stat().st_mtime_ns
+
+    # a.csv moves its February posting to March: its February part goes away
+    (raw / "a.csv").write_text(HEADER + "1,Acme,DE,NYC,2025-01-05\n2,Acme,DE,NYC,2025-03-05\n")
+    ingest_raw_to_stage(raw, staged)
+    months = sorted(p.relative_to(dataset).as_posix() for p in dataset.glob("year=2025/*/*"))
+    assert months == [
+        "year=2025/month=1/part-a.parquet",
+        "year=2025/month=1/part-b.parquet",
+        "year=2025/month=3/part-a.parquet",
+    ]
+    assert b_jan.stat().st_mtime_ns == b_mtime
+    assert not list(dataset.glob(".tmp-*"))
+
+
+def test_date_bounded_build_reads_only_overlapping_partitions(
+    tmp_path: pathlib.Path, capsys
+) -> None:
+    raw, staged, wh = tmp_path / "raw", tmp_path / "staged", tmp_path / "wh"
+    raw.mkdir()
+    rows = "".join(f"{m},Acme,DE,NYC,2025-{m:02d}-10\n" for m in range(1, 13))
+    (raw / "jobs.csv").write_text(HEADER + rows + "13,Acme,DE,NYC,\n")
+    ingest_raw_to_stage(raw, staged)
+
+    build_models(wh, staged, date_from=dt.date(2025, 3, 15), date_to=dt.date(2025, 5, 1))
+    assert "Reading 3/13 staged part(s)" in capsys.readouterr().out
+    con = duckdb.connect(str(wh / "warehouse.duckdb"), read_only=True)
+    ids = con.execute("SELECT job_id FROM fact_job_postings ORDER BY job_id").fetchall()
+    con.close()
+    assert ids == [(4,)]
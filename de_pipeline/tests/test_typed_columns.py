@@ -0,0 +1,61 @@
+from __future__ import annotations
+import pathlib
+
+import duckdb
+import polars as pl
+
+from de_pipeline.src.ingest import ingest_raw_to_stage
+from de_pipeline.src.transform import build_models
+
+HEADER = (
+    "job_id,company_name,job_title,experience_level,industry,"
+    "salary_range_usd,skills_required,tools_preferred,posted_date\n"
+)
+
+
+def test_salary_bounds_and_categoricals_at_ingest(tmp_path: pathlib.Path) -> None:
+    raw, staged = tmp_path / "raw", tmp_path / "staged"
+    raw.mkdir()
+    (raw / "jobs.csv").write_text(
+        HEADER
+        + '1,Acme,DE, Mid ,Tech,92860-109598,"SQL, Python",dbt,2025-01-02\n'
+        + '2,Beta,ML,Senior,Tech,"$120,000 - $150,000",PyTorch,,2025-01-03\n'
+        + "3,Gamma,DA,Mid,Retail,competitive,,,2025-01-04\n"
+    )
+    ingest_raw_to_stage(raw, staged)
+    df = pl.read_parquet(next((staged / "stg_ai_job_market").rglob("*.parquet")))
+    assert df.schema["experience_level"] == pl.Categorical
+    assert df.schema["industry"] == pl.Categorical
+    assert df["experience_level"].to_list() == ["Mid", "Senior", "Mid"]
+    assert df["salary_min"].to_list() == [92860, 120000, None]
+    assert df["salary_max"].to_list() == [109598, 150000, None]
+
+
+def test_skill_and_tool_bridges(tmp_path: pathlib.Path) -> None:
+    raw, staged, wh = tmp_path / "raw", tmp_path / "staged", tmp_path / "wh"
+    raw.mkdir()
+    (raw / "a.csv").write_text(
+        HEADER
+        + '1,Acme,DE,Mid,Tech,1-2,"SQL, Python, SQL",dbt,2025-01-02\n'
+        + '2,Beta,ML,Senior,Tech,1-2,"Python, PyTorch","dbt, MLflow",2025-01-03\n'
+    )
+    ingest_raw_to_stage(raw, staged)
+    build_models(wh, staged, incremental=True)
+
+    (raw / "b.csv").write_text(HEADER + "1,Acme,DE,Mid,Tech,1-2,Rust,,2025-02-01\n")
+    ingest_raw_to_stage(raw, staged)
+    build_models(wh, staged, incremental=True)
+
+    con = duckdb.connect(str(wh / "warehouse.duckdb"), read_only=True)
+    skills = con.execute(
+        """
+        SELECT b.job_id, s.skill FROM bridge_job_skill b JOIN dim_skill s USING (skill_id)
+        ORDER BY 1, 2
+        """
+    ).fetchall()
+    tools = con.execute("SELECT job_id, tool_id FROM bridge_job_tool ORDER BY 1, 2").fetchall()
+    tool_ids = dict(con.execute("SELECT tool, tool_id FROM dim_tool").fetchall())
+    con.close()
+    # job 1's newer posting replaced its skills; job 2 was not touched
+    assert skills == [(1, "Rust"), (2, "PyTorch"), (2, "Python")]
+    assert tools == [(2, tool_ids["MLflow"]), (2, tool_ids["dbt"])]